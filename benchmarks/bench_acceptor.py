@@ -0,0 +1,109 @@
+"""
+Measures how many links per second the acceptor built from thousands of
+include and exclude values checks, the compiled single pattern against
+the composite of one acceptor per kind of value, and the compiled pattern
+behind the cache of recent verdicts. The links are drawn from a smaller
+number of distinct links, as the same links show up on many pages. The
+same is measured for an acceptor of globs with several stars only.
+
+    python -m benchmarks.bench_acceptor --values 2000 --links 10000
+"""
+import argparse
+import random
+import time
+from typing import List
+from deadseeker.common import DEFAULT_LINK_CACHE_SIZE
+from deadseeker.linkacceptor import (
+    CachingLinkAcceptor,
+    CompositeLinkAcceptor,
+    LinkAcceptor,
+    LinkAcceptorBuilder
+)
+
+WORDS = [
+    'api', 'blog', 'docs', 'guide', 'reference', 'release', 'assets',
+    'static', 'images', 'download', 'archive', 'search', 'tag', 'v1', 'v2'
+]
+
+
+def _value(rng: random.Random) -> str:
+    return '/'.join(rng.choice(WORDS) for _ in range(3)) + \
+        str(rng.randrange(1000))
+
+
+def _links(rng: random.Random, count: int, distinct: int) -> List[str]:
+    links = [
+        f'https://www.example.com/{_value(rng)}/page{i}.html'
+        for i in range(distinct)]
+    return [rng.choice(links) for _ in range(count)]
+
+
+def _build(rng: random.Random, count: int) -> LinkAcceptor:
+    return LinkAcceptorBuilder()\
+        .addExcludePrefix(
+            'mailto:', 'tel:',
+            *[f'https://www.example.com/{_value(rng)}' for _ in range(count)])\
+        .addExcludeSuffix(*[f'{_value(rng)}.pdf' for _ in range(count)])\
+        .addExcludeContained(*[_value(rng) for _ in range(count)])\
+        .addExcludeRegex(*[
+            f'/{rng.choice(WORDS)}/\\d+/{_value(rng)}$' for _ in range(count)])\
+        .addExcludeGlob(*[f'*/{_value(rng)}/*.png' for _ in range(count)])\
+        .build()
+
+
+def _build_globs(rng: random.Random, count: int) -> LinkAcceptor:
+    # the stars of these globs cannot be told apart by the text before
+    # them, like the ones of the globs that a site is excluded with
+    shapes = [
+        lambda: f'*/{_value(rng)}/*.png',
+        lambda: f'*/{rng.choice(WORDS)}/*/page{rng.randrange(1000)}*',
+        lambda: f'*/{rng.choice(WORDS)}/*{rng.randrange(1000)}/*.html'
+    ]
+    return LinkAcceptorBuilder()\
+        .addExcludeGlob(*[rng.choice(shapes)() for _ in range(count)])\
+        .build()
+
+
+def _measure(name: str, acceptor: LinkAcceptor, links: List[str]) -> int:
+    started = time.perf_counter()
+    accepted = sum(1 for link in links if acceptor.accepts(link))
+    elapsed = time.perf_counter() - started
+    print(f'{name:>9}: {len(links) / elapsed:10.0f} links/s')
+    return accepted
+
+
+def _compare(compiled: LinkAcceptor, links: List[str]) -> None:
+    assert isinstance(compiled, CompositeLinkAcceptor)
+    composite = CompositeLinkAcceptor(list(compiled.acceptors))
+    cached = CachingLinkAcceptor(compiled, DEFAULT_LINK_CACHE_SIZE)
+    accepted = _measure('composite', composite, links)
+    if accepted != _measure('compiled', compiled, links) or \
+            accepted != _measure('cached', cached, links):
+        raise SystemExit('The acceptors do not accept the same links')
+    hits, misses = cached.cache_info()
+    print(f'{hits / (hits + misses):.0%} of the cached links were hits,'
+          f' {accepted} of {len(links)} links were accepted')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--values', type=int, default=2000)
+    parser.add_argument('--links', type=int, default=10000)
+    parser.add_argument('--distinct', type=int, default=5000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+    links = _links(rng, args.links, args.distinct)
+    started = time.perf_counter()
+    compiled = _build(rng, args.values)
+    print(f'{args.values} values of each kind,'
+          f' compiled in {time.perf_counter() - started:.2f} s')
+    _compare(compiled, links)
+    started = time.perf_counter()
+    compiled = _build_globs(rng, args.values)
+    print(f'{args.values} globs with several stars,'
+          f' compiled in {time.perf_counter() - started:.2f} s')
+    _compare(compiled, links)
+
+
+if __name__ == '__main__':  # pragma: no mutate
+    main()
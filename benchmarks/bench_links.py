@@ -0,0 +1,82 @@
+"""
+Measures how many pages per second the links found on a page are turned
+into urls to visit, resolving and canonicalizing every link with urljoin
+against doing so once per distinct link with a pre-split page url, on
+pages whose links are mostly the same navigation repeated.
+
+    python -m benchmarks.bench_links --pages 2000 --nav 150 --repeat 3
+"""
+import argparse
+import random
+import time
+from typing import Callable, List
+from urllib.parse import urljoin
+from deadseeker.canonicalizer import DefaultUrlCanonicalizer
+from deadseeker.urlresolver import UrlResolver
+
+SITE_URL = 'https://site.example.com/docs/guide/'
+
+
+def _page_links(
+        rng: random.Random,
+        nav: List[str],
+        repeat: int,
+        content: int) -> List[str]:
+    # the navigation in the header, sidebar and footer, and the links
+    # in the text of the page
+    links = nav * repeat + [
+        f'../reference/topic{rng.randrange(1000)}.html#section{i}'
+        for i in range(content)]
+    rng.shuffle(links)
+    return links
+
+
+def _per_link(
+        page: str,
+        links: List[str],
+        canonicalize: Callable[[str], str]) -> int:
+    return len(set(canonicalize(urljoin(page, link)) for link in links))
+
+
+def _per_distinct_link(
+        page: str,
+        links: List[str],
+        canonicalize: Callable[[str], str]) -> int:
+    base = UrlResolver(page)
+    return len(set(
+        canonicalize(base.resolve(link)) for link in dict.fromkeys(links)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=2000)
+    parser.add_argument('--nav', type=int, default=150)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--content', type=int, default=30)
+    args = parser.parse_args()
+    rng = random.Random(42)
+    nav = [f'/docs/{rng.choice(["guide", "api", "blog"])}/page{i}.html'
+           for i in range(args.nav // 3)] + \
+        [f'page{i}.html' for i in range(args.nav // 3)] + \
+        [f'{SITE_URL}section{i}/' for i in range(args.nav - args.nav // 3 * 2)]
+    pages = [
+        (f'{SITE_URL}page{i}.html',
+         _page_links(rng, nav, args.repeat, args.content))
+        for i in range(args.pages)]
+    canonicalize = DefaultUrlCanonicalizer().canonicalize
+    print(f'{args.pages} pages of {len(pages[0][1])} links')
+    results = []
+    for name, handle in [
+            ('per link', _per_link),
+            ('per distinct', _per_distinct_link)]:
+        started = time.perf_counter()
+        results.append([
+            handle(page, links, canonicalize) for page, links in pages])
+        elapsed = time.perf_counter() - started
+        print(f'{name:>12}: {args.pages / elapsed:8.1f} pages/s')
+    if results[0] != results[1]:
+        raise SystemExit('The pages do not link to the same urls')
+
+
+if __name__ == '__main__':  # pragma: no mutate
+    main()
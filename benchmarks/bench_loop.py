@@ -0,0 +1,91 @@
+"""
+Measures the requests per second of a real crawl over http, with the
+asyncio event loop against uvloop, of a site served by a local aiohttp
+server in a separate process, like the mock server of the integration
+tests but with thousands of generated pages.
+
+    python -m benchmarks.bench_loop --pages 5000 --concurrency 200
+"""
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import time
+from aiohttp import web
+from deadseeker.common import SeekerConfig
+from deadseeker.deadseeker import DeadSeeker, uvloop
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+def _serve(port: int, pages: int, links_per_page: int) -> None:
+    async def page(request: web.Request) -> web.Response:
+        number = int(request.match_info.get('number', 0))
+        links = ''.join(
+            f'<a href="/page{(number * links_per_page + i) % pages}.html">'
+            f'page</a>\n' for i in range(1, links_per_page + 1))
+        return web.Response(
+            text=f'<html><body>{links}</body></html>',
+            content_type='text/html')
+
+    if uvloop is not None:
+        # the server should not be what is measured
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    app = web.Application()
+    # the crawl starts at the root, the home of all the pages
+    app.router.add_get('/', page)
+    app.router.add_get('/page{number:\\d+}.html', page)
+    web.run_app(app, host='localhost', port=port, print=None)
+
+
+def _crawl(url: str, concurrency: int, use_uvloop: bool) -> float:
+    config = SeekerConfig()
+    config.max_concurrent_requests = concurrency
+    config.connect_limit_per_host = concurrency
+    config.use_uvloop = use_uvloop
+    started = time.perf_counter()
+    results = DeadSeeker(config).seek(url)
+    elapsed = time.perf_counter() - started
+    if results.failures:
+        raise SystemExit(f'{len(results.failures)} requests failed')
+    return len(results.successes) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=5000)
+    parser.add_argument('--links', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=200)
+    args = parser.parse_args()
+    port = _free_port()
+    server = multiprocessing.Process(
+        target=_serve, args=(port, args.pages, args.links), daemon=True)
+    server.start()
+    url = f'http://localhost:{port}/'
+    try:
+        # waits for the server to listen
+        for _ in range(50):
+            try:
+                socket.create_connection(('localhost', port)).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        print(f'{args.pages} pages, {args.concurrency} concurrent requests')
+        loops = [('asyncio', False)]
+        if uvloop is not None:
+            loops.append(('uvloop', True))
+        else:
+            print('uvloop is not installed')
+        for name, use_uvloop in loops:
+            rate = _crawl(url, args.concurrency, use_uvloop)
+            print(f'{name:>8}: {rate:8.1f} requests/s')
+    finally:
+        server.terminate()
+
+
+if __name__ == '__main__':  # pragma: no mutate
+    main()
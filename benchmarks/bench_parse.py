@@ -0,0 +1,120 @@
+"""
+Measures the throughput of the link extraction on large html pages and
+how long the event loop is held up meanwhile, parsing in the loop with
+html.parser, lxml (if installed) and scan against parsing in worker pools.
+
+    python -m benchmarks.bench_parse --pages 40 --size 5000000 --workers 4
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+from deadseeker.common import (
+    HTML_PARSER_LXML,
+    SeekerConfig,
+    UrlFetchResponse,
+    UrlTarget
+)
+from deadseeker.linkacceptor import DefaultLinkAcceptorFactory
+from deadseeker.linkparser import (
+    DefaultLinkParser,
+    LinkParser,
+    LxmlLinkParser,
+    PooledLinkParser,
+    ScanLinkParser,
+    etree
+)
+
+SITE_URL = 'https://site.example.com/'
+# how often the loop is asked to wake up while the pages are parsed
+TICK = 0.01
+
+
+def _page(number: int, size: int) -> str:
+    # text formatted with several tags for each link, like documentation
+    link = '<p class="text"><span class="w">Some</span> <em>text</em> ' + \
+        '<code class="n">of</code> <strong>page</strong> <span>{1}</span>' + \
+        ' <a href="/section{0}/page{1}.html" title="Page">page {1}</a>' + \
+        ' and <img src="/images/{1}.png" alt="image"></p>\n'
+    parts: List[str] = ['<html><body>\n']
+    length = 0
+    i = 0
+    while length < size:
+        part = link.format(number, i)
+        parts.append(part)
+        length += len(part)
+        i += 1
+    parts.append('</body></html>\n')
+    return ''.join(parts)
+
+
+async def _parse_all(linkparser: LinkParser, pages: List[str]) -> float:
+    '''Parses the pages concurrently, returns the longest loop stall'''
+    stall = 0.0
+    running = True
+
+    async def _ticker() -> None:
+        nonlocal stall
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(TICK)
+            stall = max(stall, time.perf_counter() - started - TICK)
+
+    async def _parse(number: int, html: str) -> None:
+        url = f'{SITE_URL}page{number}.html'
+        resp = UrlFetchResponse(UrlTarget(SITE_URL, url, 1))
+        resp.html = html
+        await linkparser.parse_async(resp)
+
+    ticker = asyncio.ensure_future(_ticker())
+    await asyncio.gather(*[_parse(i, html) for i, html in enumerate(pages)])
+    running = False
+    await ticker
+    return stall
+
+
+def _measure(name: str, linkparser: LinkParser, pages: List[str]) -> None:
+    # the first page starts the pools, which is not what is measured
+    asyncio.run(_parse_all(linkparser, pages[:1]))
+    started = time.perf_counter()
+    stall = asyncio.run(_parse_all(linkparser, pages))
+    elapsed = time.perf_counter() - started
+    linkparser.close()
+    megabytes = sum(map(len, pages)) / 1000000
+    print(f'{name:>15}: {len(pages) / elapsed:8.1f} pages/s,'
+          f' {megabytes / elapsed:8.1f} MB/s,'
+          f' loop stalled up to {stall * 1000:8.1f} ms')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--size', type=int, default=5000000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    config = SeekerConfig()
+    linkacceptor = DefaultLinkAcceptorFactory().get_link_acceptor(config)
+    pages = [_page(i, args.size) for i in range(args.pages)]
+    print(f'{args.pages} pages of {args.size} characters')
+    _measure('html.parser', DefaultLinkParser(config, linkacceptor), pages)
+    if etree is not None:
+        _measure('lxml', LxmlLinkParser(config, linkacceptor), pages)
+    _measure('scan', ScanLinkParser(config, linkacceptor), pages)
+    _measure(
+        f'{args.workers} threads',
+        PooledLinkParser(config, linkacceptor, args.workers, args.size + 1),
+        pages)
+    _measure(
+        f'{args.workers} procs',
+        PooledLinkParser(config, linkacceptor, args.workers, 0),
+        pages)
+    if etree is not None:
+        config.html_parser = HTML_PARSER_LXML
+        _measure(
+            f'{args.workers} lxml procs',
+            PooledLinkParser(config, linkacceptor, args.workers, 0),
+            pages)
+
+
+if __name__ == '__main__':  # pragma: no mutate
+    main()
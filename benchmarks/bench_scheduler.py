@@ -0,0 +1,95 @@
+"""
+Compares the wall time of the pipelined worker pool in DeadSeeker
+against the previous level-by-level crawl loop, where every depth
+had to be completed before the next one was scheduled.
+
+    python -m benchmarks.bench_scheduler --pages 2000 --slow-ratio 0.01
+"""
+import argparse
+import asyncio
+import time
+from typing import Deque, List, Optional, Set
+from urllib.parse import urljoin
+from deadseeker.common import (
+    SeekerConfig,
+    SeekResults,
+    UrlFetchResponseHandler,
+    UrlTarget
+)
+from deadseeker.deadseeker import DeadSeeker
+from deadseeker.responsecache import NoResponseCache
+from deadseeker.retrybudget import RetryBudget
+from .synthetic import SITE_URL, SyntheticSite, synthetic_seeker
+
+
+class LevelByLevelDeadSeeker(DeadSeeker):
+    async def _main(
+            self,
+            urls: List[str],
+            responsehandler: Optional[UrlFetchResponseHandler] = None
+            ) -> SeekResults:
+        started = time.perf_counter()
+        results = SeekResults()
+        visited: Set[str] = set(urls)
+        targets: Deque[UrlTarget] = Deque[UrlTarget]()
+        for url in urls:
+            targets.appendleft(UrlTarget(url, url, self.config.max_depth))
+        linkacceptor = self.linkacceptorfactory.get_link_acceptor(self.config)
+        linkparser = \
+            self.linkparserfactory.get_link_parser(self.config, linkacceptor)
+        retrybudget = RetryBudget()
+        responsefetcher = self.responsefetcherfactory.get_response_fetcher(
+                                self.config, NoResponseCache(), linkparser,
+                                retrybudget)
+        async with self.clientsessionfactory.get_client_session(
+                self.config, retrybudget) as session:
+            while targets:
+                tasks = []
+                while targets:
+                    tasks.append(asyncio.create_task(
+                        responsefetcher.fetch_response(
+                            session, targets.pop())))
+                for task in asyncio.as_completed(tasks):
+                    resp = await task
+                    results.successes.append(resp)
+                    if resp.html and resp.urltarget.depth != 0:
+                        for link in linkparser.parse(resp):
+                            link = urljoin(resp.urltarget.url, link)
+                            if link not in visited:
+                                visited.add(link)
+                                targets.appendleft(
+                                    resp.urltarget.child(link))
+        results.elapsed = (time.perf_counter() - started) * 1000
+        return results
+
+
+def _run(seeker: DeadSeeker) -> SeekResults:
+    return seeker.seek(SITE_URL)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=2000)
+    parser.add_argument('--links-per-page', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.005)
+    parser.add_argument('--slow-ratio', type=float, default=0.01)
+    parser.add_argument('--slow-latency', type=float, default=0.5)
+    args = parser.parse_args()
+    site = SyntheticSite(
+        args.pages,
+        args.links_per_page,
+        args.latency,
+        args.slow_ratio,
+        args.slow_latency)
+    config = SeekerConfig()
+    for name, seeker_class in [
+            ('level-by-level', LevelByLevelDeadSeeker),
+            ('pipelined', DeadSeeker)]:
+        results = _run(synthetic_seeker(site, config, seeker_class))
+        fetched = len(results.successes) + len(results.failures)
+        print(f'{name:>16}: {results.elapsed:10.1f} ms'
+              f' for {fetched} urls')
+
+
+if __name__ == '__main__':  # pragma: no mutate
+    main()
@@ -0,0 +1,64 @@
+"""
+Measures the memory per url and the lookup throughput of the
+VisitedSet implementations on urls with long tracking query strings.
+
+    python -m benchmarks.bench_visited --urls 200000
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Iterator
+from deadseeker.visited import (
+    BloomVisitedSet,
+    ExactVisitedSet,
+    HashedVisitedSet,
+    VisitedSet
+)
+
+
+# the urls are generated on the fly, like the ones found while crawling,
+# so that the memory of a url counts only if the visited set keeps it
+def _urls(count: int) -> Iterator[str]:
+    for i in range(count):
+        yield f'https://docs.example.com/reference/module{i % 500}/' + \
+            f'page{i}.html?utm_source=newsletter&utm_medium=email' + \
+            f'&utm_campaign=c{i}&session=8f3a9c2b7d1e4f60{i:08d}'
+
+
+def _measure(
+        name: str,
+        factory: Callable[[], VisitedSet],
+        count: int) -> None:
+    tracemalloc.start()
+    visited = factory()
+    started = time.perf_counter()
+    for url in _urls(count):
+        visited.add(url)
+    inserted = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    started = time.perf_counter()
+    for url in _urls(count):
+        visited.add(url)
+    looked_up = time.perf_counter() - started
+    visited.close()
+    print(f'{name:>9}: {memory / count:8.1f} bytes/url in memory,'
+          f' {count / inserted:10.0f} new urls/s,'
+          f' {count / looked_up:10.0f} known urls/s')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--urls', type=int, default=200000)
+    args = parser.parse_args()
+    count = args.urls
+    average = sum(map(len, _urls(count))) / count
+    print(f'{count} urls, {average:.0f} characters on average')
+    _measure('exact', ExactVisitedSet, count)
+    _measure('hashed64', lambda: HashedVisitedSet(64), count)
+    _measure('hashed128', lambda: HashedVisitedSet(128), count)
+    _measure('bloom', lambda: BloomVisitedSet(count), count)
+
+
+if __name__ == '__main__':  # pragma: no mutate
+    main()
@@ -0,0 +1,118 @@
+"""
+Helpers to crawl a generated, in-memory web site so that the crawl
+machinery of DeadSeeker can be measured without any network traffic.
+"""
+import asyncio
+import random
+from typing import Dict, List
+from deadseeker.common import SeekerConfig, UrlFetchResponse, UrlTarget
+from deadseeker.clientsession import ClientSessionFactory
+from deadseeker.deadseeker import DeadSeeker
+from deadseeker.linkacceptor import LinkAcceptor
+from deadseeker.linkparser import LinkParser, LinkParserFactory
+from deadseeker.responsefetcher import ResponseFetcher, ResponseFetcherFactory
+from deadseeker.responsecache import ResponseCache
+from deadseeker.retrybudget import RetryBudget
+from aiohttp_retry.types import ClientType
+
+SITE_URL = 'http://bench.test/'
+
+
+class SyntheticSite:
+    def __init__(
+            self,
+            pages: int,
+            links_per_page: int,
+            latency: float,
+            slow_ratio: float = 0.0,
+            slow_latency: float = 0.0,
+            seed: int = 42) -> None:
+        rnd = random.Random(seed)
+        self.urls = [SITE_URL] + \
+            [f'{SITE_URL}page{i}.html' for i in range(1, pages)]
+        self.links: Dict[str, List[str]] = {}
+        self.latencies: Dict[str, float] = {}
+        for index, url in enumerate(self.urls):
+            # a spanning tree keeps every page reachable, the random
+            # links add the usual cross linking of navigation menus
+            children = self.urls[index * links_per_page + 1:
+                                 (index + 1) * links_per_page + 1]
+            extra = rnd.sample(self.urls, min(links_per_page, pages))
+            self.links[url] = children + extra
+            slow = rnd.random() < slow_ratio
+            self.latencies[url] = slow_latency if slow else latency
+
+
+class _SyntheticSession:
+    async def __aenter__(self) -> '_SyntheticSession':
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        pass
+
+
+class SyntheticClientSessionFactory(ClientSessionFactory):
+    def get_client_session(
+            self,
+            config: SeekerConfig,
+            retrybudget: RetryBudget) -> ClientType:
+        return _SyntheticSession()  # type: ignore
+
+
+class SyntheticResponseFetcher(ResponseFetcher):
+    def __init__(self, site: SyntheticSite) -> None:
+        self.site = site
+
+    async def fetch_response(
+            self,
+            session: ClientType,
+            urltarget: UrlTarget) -> UrlFetchResponse:
+        resp = UrlFetchResponse(urltarget)
+        await asyncio.sleep(self.site.latencies[urltarget.url])
+        resp.status = 200
+        resp.elapsed = 0.0
+        resp.html = urltarget.url
+        return resp
+
+
+class SyntheticResponseFetcherFactory(ResponseFetcherFactory):
+    def __init__(self, site: SyntheticSite) -> None:
+        self.site = site
+
+    def get_response_fetcher(
+            self,
+            config: SeekerConfig,
+            cache: ResponseCache,
+            linkparser: LinkParser,
+            retrybudget: RetryBudget) -> ResponseFetcher:
+        return SyntheticResponseFetcher(self.site)
+
+
+class SyntheticLinkParser(LinkParser):
+    def __init__(self, site: SyntheticSite) -> None:
+        self.site = site
+
+    def parse(self, resp: UrlFetchResponse) -> List[str]:
+        return self.site.links[resp.urltarget.url]
+
+
+class SyntheticLinkParserFactory(LinkParserFactory):
+    def __init__(self, site: SyntheticSite) -> None:
+        self.site = site
+
+    def get_link_parser(
+            self,
+            config: SeekerConfig,
+            linkacceptor: LinkAcceptor) -> LinkParser:
+        return SyntheticLinkParser(self.site)
+
+
+def synthetic_seeker(
+        site: SyntheticSite,
+        config: SeekerConfig,
+        seeker_class: type = DeadSeeker) -> DeadSeeker:
+    seeker: DeadSeeker = seeker_class(config)
+    seeker.clientsessionfactory = SyntheticClientSessionFactory()
+    seeker.responsefetcherfactory = SyntheticResponseFetcherFactory(site)
+    seeker.linkparserfactory = SyntheticLinkParserFactory(site)
+    return seeker
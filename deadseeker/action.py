@@ -36,13 +36,52 @@ def run_action() -> None:
     config = SeekerConfig()
     config.search_attrs = inputvalidator.get_search_attrs()
     config.connect_limit_per_host = inputvalidator.get_connect_limit_per_host()
+    config.adaptive_connect_limit = \
+        inputvalidator.get_adaptive_connect_limit()
+    config.min_connect_limit_per_host = \
+        inputvalidator.get_min_connect_limit_per_host()
+    config.max_connect_limit_per_host = \
+        inputvalidator.get_max_connect_limit_per_host()
+    config.requests_per_second_per_host = \
+        inputvalidator.get_requests_per_second_per_host()
+    config.circuit_breaker_threshold = \
+        inputvalidator.get_circuit_breaker_threshold()
+    config.circuit_breaker_cooldown = \
+        inputvalidator.get_circuit_breaker_cooldown()
     config.timeout = inputvalidator.get_timeout()
+    config.deadline = inputvalidator.get_deadline()
+    config.max_failures = inputvalidator.get_max_failures()
+    config.max_concurrent_requests = \
+        inputvalidator.get_max_concurrent_requests()
+    config.max_frontier_size = inputvalidator.get_max_frontier_size()
+    config.frontier_memory_size = inputvalidator.get_frontier_memory_size()
+    config.frontier_spill_dir = inputvalidator.get_frontier_spill_dir()
+    config.visited_index = inputvalidator.get_visited_index()
+    config.visited_bloom_capacity = \
+        inputvalidator.get_visited_bloom_capacity()
+    config.canonicalize_urls = inputvalidator.get_canonicalize_urls()
+    config.sort_query_params = inputvalidator.get_sort_query_params()
+    config.drop_query_params = inputvalidator.get_drop_query_params()
+    config.max_referrers = inputvalidator.get_max_referrers()
+    config.cache_dir = inputvalidator.get_cache_dir()
+    config.offsite_cache_ttl = inputvalidator.get_offsite_cache_ttl()
+    config.checkpoint_file = inputvalidator.get_checkpoint_file()
+    config.resume = inputvalidator.get_resume()
+    config.stream_html = inputvalidator.get_stream_html()
+    config.parse_workers = inputvalidator.get_parse_workers()
+    config.parse_process_threshold = \
+        inputvalidator.get_parse_process_threshold()
+    config.html_parser = inputvalidator.get_html_parser()
+    config.link_cache_size = inputvalidator.get_link_cache_size()
+    config.use_uvloop = inputvalidator.get_use_uvloop()
     config.max_tries = inputvalidator.get_retry_maxtries()
     config.max_time = inputvalidator.get_retry_maxtime()
+    config.retry_budget = inputvalidator.get_retry_budget()
+    config.retry_budget_percent = inputvalidator.get_retry_budget_percent()
     config.alwaysgetonsite = inputvalidator.get_alwaysgetonsite()
     config.resolvebeforefilter = inputvalidator.get_resolvebeforefilter()
     for inclusion in ['in', 'ex']:
-        for strategy in ['prefix', 'suffix', 'contained']:
+        for strategy in ['prefix', 'suffix', 'contained', 'regex', 'glob']:
             attrname = f'{inclusion}clude{strategy}'
             getmethodname = f'get_{attrname}'
             getmethod = getattr(inputvalidator, getmethodname)
@@ -0,0 +1,149 @@
+from abc import abstractmethod, ABC
+from fnmatch import fnmatchcase
+from typing import Hashable, List, Set
+from urllib.parse import urlsplit, urlunsplit
+from .common import SeekerConfig
+from .visited import VisitedSet, HashedVisitedSet, url_hash
+
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+
+def remove_dot_segments(path: str) -> str:
+    '''Resolves "." and ".." path segments as described in RFC 3986'''
+    output: List[str] = []
+    for segment in path.split('/'):
+        if segment == '.':
+            continue
+        if segment == '..':
+            # never pop the empty segment in front of the leading slash
+            if len(output) > 1:
+                output.pop()
+            continue
+        output.append(segment)
+    if path.endswith(('/.', '/..')):
+        output.append('')
+    return '/'.join(output)
+
+
+class UrlCanonicalizer(ABC):
+    @abstractmethod  # pragma: no mutate
+    def canonicalize(self, url: str) -> str:
+        '''Returns the form of the url that is used to detect duplicates'''
+        pass
+
+
+class UrlCanonicalizerFactory(ABC):
+    @abstractmethod  # pragma: no mutate
+    def get_url_canonicalizer(self, config: SeekerConfig) -> UrlCanonicalizer:
+        pass
+
+
+class DefaultUrlCanonicalizerFactory(UrlCanonicalizerFactory):
+    def get_url_canonicalizer(self, config: SeekerConfig) -> UrlCanonicalizer:
+        return DefaultUrlCanonicalizer(
+            normalize=config.canonicalize_urls,
+            sort_query=config.sort_query_params,
+            drop_params=config.drop_query_params)
+
+
+class DefaultUrlCanonicalizer(UrlCanonicalizer):
+    def __init__(
+            self,
+            normalize: bool = True,
+            sort_query: bool = False,
+            drop_params: List[str] = []) -> None:
+        self.normalize = normalize
+        self.sort_query = sort_query
+        # names of query parameters to drop, may contain wildcards (utm_*)
+        self.drop_params = drop_params
+
+    def canonicalize(self, url: str) -> str:
+        if not (self.normalize or self.sort_query or self.drop_params):
+            return url
+        try:
+            parts = urlsplit(url)
+        except ValueError:
+            # not a valid url, nothing we could do about it
+            return url
+        scheme, netloc, path, query, fragment = parts
+        if self.normalize:
+            scheme = scheme.lower()
+            fragment = ''
+            if scheme in DEFAULT_PORTS:
+                netloc = self._netloc(scheme, netloc)
+                path = remove_dot_segments(path) or '/'
+        if self.sort_query or self.drop_params:
+            query = self._query(query)
+        return urlunsplit((scheme, netloc, path, query, fragment))
+
+    def _netloc(self, scheme: str, netloc: str) -> str:
+        # the user info is case sensitive, the host and port are not
+        userinfo, at, hostport = netloc.rpartition('@')
+        hostport = hostport.lower()
+        default_port = ':' + DEFAULT_PORTS[scheme]
+        if hostport.endswith(default_port):
+            hostport = hostport[:-len(default_port)]
+        elif hostport.endswith(':'):
+            hostport = hostport[:-1]
+        return userinfo + at + hostport
+
+    def _query(self, query: str) -> str:
+        # the parameters are kept as they are encoded in the url,
+        # only their order and presence is changed
+        params = [
+            param for param in query.split('&')
+            if param and not self._dropped(param.partition('=')[0])]
+        if self.sort_query:
+            params.sort()
+        return '&'.join(params)
+
+    def _dropped(self, name: str) -> bool:
+        return any(fnmatchcase(name, pattern) for pattern in self.drop_params)
+
+
+class CanonicalVisitedSet(VisitedSet):
+    '''
+    Checks the canonical form of the urls against the wrapped VisitedSet
+    and counts the fetches that were saved by doing so, i.e. the distinct
+    urls that would have been fetched as well without canonicalization.
+    '''
+
+    def __init__(
+            self,
+            visited: VisitedSet,
+            canonicalizer: UrlCanonicalizer) -> None:
+        self.visited = visited
+        self.canonicalizer = canonicalizer
+        self.duplicates = 0
+        # only the urls that differ from their canonical form are tracked,
+        # which usually are few compared to all the visited ones
+        self._aliases = HashedVisitedSet()
+        self._aliased_keys: Set[int] = set()
+
+    def add(self, url: str) -> bool:
+        return self.add_canonical(url, self.canonicalizer.canonicalize(url))
+
+    def key(self, url: str) -> Hashable:
+        return self.visited.key(url)
+
+    def add_canonical(self, url: str, key: str) -> bool:
+        '''Same as add, with the canonical form of the url already known'''
+        if key == url:
+            if self.visited.add(key):
+                return True
+            # the canonical url itself shows up after one of its aliases
+            key_hash = url_hash(key)
+            if key_hash in self._aliased_keys:
+                self._aliased_keys.remove(key_hash)
+                self.duplicates += 1
+            return False
+        if not self._aliases.add(url):
+            return False
+        if self.visited.add(key):
+            self._aliased_keys.add(url_hash(key))
+            return True
+        self.duplicates += 1
+        return False
+
+    def close(self) -> None:
+        self.visited.close()
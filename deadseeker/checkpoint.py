@@ -0,0 +1,253 @@
+import json
+import os
+import time
+from abc import abstractmethod, ABC
+from typing import Any, Dict, List, Optional, Tuple
+from .common import SeekerConfig, UrlFetchResponse, UrlTarget
+from .depths import NO_LINKS
+
+# the journaled records are written to the file at least this often
+FLUSH_INTERVAL: float = 5.0
+
+# a queued url, the depth left it was found with and the depth left its
+# links were queued with, None if they were not (yet) or NO_LINKS if it
+# had none
+Found = Tuple[str, int, Optional[int]]
+Restored = Tuple[List[Found], List[UrlTarget], List[UrlFetchResponse]]
+
+
+class RestoredError(Exception):
+    '''The error of a url that failed before the crawl was resumed'''
+
+    def __init__(self, name: str, message: str) -> None:
+        super().__init__(message)
+        # the name of the type of the original error
+        self.name = name
+
+
+class Checkpoint(ABC):
+    @abstractmethod  # pragma: no mutate
+    def queued(self, target: UrlTarget) -> None:
+        '''Records a target that was added to the frontier'''
+        pass
+
+    @abstractmethod  # pragma: no mutate
+    def done(self, resp: UrlFetchResponse) -> None:
+        '''Records the response of a target whose links were queued'''
+        pass
+
+    def expanded(self, target: UrlTarget) -> None:
+        '''Records the depth left that the links of a target are queued with'''
+        pass
+
+    def found(self, parent: UrlTarget, url: str) -> None:
+        '''
+        Records a link to a queued url that was found again with more
+        depth left, before the links of the url were queued
+        '''
+        pass
+
+    def restore(self) -> Restored:
+        '''
+        Returns the urls that were found by the previous crawl with their
+        depths, the targets that were queued but not done and the
+        responses of the targets that were done
+        '''
+        return [], [], []
+
+    def close(self) -> None:
+        pass
+
+
+class CheckpointFactory(ABC):
+    @abstractmethod  # pragma: no mutate
+    def get_checkpoint(self, config: SeekerConfig) -> Checkpoint:
+        pass
+
+
+class DefaultCheckpointFactory(CheckpointFactory):
+    def get_checkpoint(self, config: SeekerConfig) -> Checkpoint:
+        if config.checkpoint_file:
+            return JournalCheckpoint(config.checkpoint_file, config.resume)
+        return NoCheckpoint()
+
+
+class NoCheckpoint(Checkpoint):
+    def queued(self, target: UrlTarget) -> None:
+        pass
+
+    def done(self, resp: UrlFetchResponse) -> None:
+        pass
+
+
+# Appends a line of json to the file for every target that is queued and
+# for every response that is done, so nothing is ever rewritten. Targets
+# are numbered in the order they were queued and refer to their parent by
+# number, which keeps the lines short however deep the crawl goes:
+#   ["q", null, url, depth]       a seed
+#   ["q", parent, url]            a link found on the page of the parent
+#   ["r", parent, url]            a link found again with more depth left
+#   ["f", parent, url]            the same, before the links of the url
+#                                 were queued
+#   ["x", target, depth]          the depth left the links of the target
+#                                 are queued with
+#   ["d", target, status, elapsed, error type, error message, url]
+# where the url is only there if it changed because of a redirect. The
+# responses of the targets that were found again are not restored, as
+# their urls were reported already. A target that was done without an
+# "x" record had no links to queue.
+# The links of a page are queued before the page is done, so that every
+# part of the file that was written is a consistent state of the crawl.
+class JournalCheckpoint(Checkpoint):
+    def __init__(self, path: str, resume: bool = False) -> None:
+        self.path = path
+        self._queued = 0
+        # the queued urls of the targets that are not done yet, to tell
+        # whether they were redirected
+        self._urls: Dict[int, str] = {}
+        self._restored: Restored = ([], [], [])
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if resume and os.path.exists(path):
+            self._restored = self._replay()
+        else:
+            open(path, 'w').close()
+        self._file = open(path, 'a', encoding='utf-8')
+        self._flushed = time.monotonic()
+
+    def _replay(self) -> Restored:
+        targets: List[UrlTarget] = []
+        found: List[Found] = []
+        # the entries of found of every target
+        entries: List[int] = []
+        done: Dict[int, UrlFetchResponse] = {}
+        end = 0
+        with open(self.path, 'rb') as file:
+            for line in file:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError(line)
+                    record = json.loads(line)
+                except ValueError:
+                    # the last line was not written completely
+                    break
+                kind = record[0]
+                if kind == 'd':
+                    done[record[1]] = self._response(targets, record)
+                    url, depth, expanded = found[entries[record[1]]]
+                    if expanded is None:
+                        found[entries[record[1]]] = url, depth, NO_LINKS
+                elif kind == 'x':
+                    targets[record[1]].depth = record[2]
+                    url, depth, _ = found[entries[record[1]]]
+                    found[entries[record[1]]] = url, depth, record[2]
+                elif kind == 'f':
+                    depth = targets[record[1]].depth - 1
+                    found.append((record[2], depth, None))
+                else:
+                    target = self._target(targets, record)
+                    targets.append(target)
+                    entries.append(len(found))
+                    found.append((record[2], target.depth, None))
+                end += len(line)
+        with open(self.path, 'r+b') as file:
+            file.truncate(end)
+        pending = [
+            target for number, target in enumerate(targets)
+            if number not in done]
+        for target in pending:
+            self._urls[self._number(target)] = target.url
+        reported = [
+            resp for resp in done.values() if not resp.urltarget.revisit]
+        return found, pending, reported
+
+    def _target(
+            self,
+            targets: List[UrlTarget],
+            record: List[Any]) -> UrlTarget:
+        if record[1] is None:
+            target = UrlTarget(record[2], record[2], record[3])
+        else:
+            target = targets[record[1]].child(record[2])
+        target.revisit = record[0] == 'r'
+        target.number = self._queued
+        self._queued += 1
+        return target
+
+    def _response(
+            self,
+            targets: List[UrlTarget],
+            record: List[Any]) -> UrlFetchResponse:
+        _, number, status, elapsed, errortype, message = record[:6]
+        resp = UrlFetchResponse(targets[number])
+        if len(record) > 6:
+            resp.urltarget.url = record[6]
+        resp.status = status
+        resp.elapsed = elapsed
+        if errortype is not None:
+            resp.error = RestoredError(errortype, message)
+        return resp
+
+    def restore(self) -> Restored:
+        restored = self._restored
+        self._restored = ([], [], [])
+        return restored
+
+    def queued(self, target: UrlTarget) -> None:
+        if target.parent is None:
+            record = ['q', None, target.url, target.depth]
+        else:
+            record = [
+                'r' if target.revisit else 'q', target.parent.number,
+                target.url]
+        target.number = self._queued
+        self._urls[target.number] = target.url
+        self._queued += 1
+        self._write(record)
+
+    def expanded(self, target: UrlTarget) -> None:
+        if target.depth < 0:
+            # without a depth limit every url is expanded all the way
+            return
+        self._write(['x', self._number(target), target.depth])
+
+    def found(self, parent: UrlTarget, url: str) -> None:
+        self._write(['f', self._number(parent), url])
+
+    def done(self, resp: UrlFetchResponse) -> None:
+        error = resp.error
+        if error is None:
+            errortype = message = None
+        elif isinstance(error, RestoredError):
+            errortype, message = error.name, str(error)
+        else:
+            errortype, message = type(error).__name__, str(error)
+        number = self._number(resp.urltarget)
+        record = [
+            'd', number, resp.status,
+            round(getattr(resp, 'elapsed', 0.0), 2), errortype, message]
+        if self._urls.pop(number, None) != resp.urltarget.url:
+            record.append(resp.urltarget.url)
+        self._write(record)
+
+    def _number(self, target: UrlTarget) -> int:
+        assert target.number is not None, \
+            f'{target.url} was not queued'  # pragma: no mutate
+        return target.number
+
+    def _write(self, record: List[Any]) -> None:
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        now = time.monotonic()
+        if now - self._flushed >= FLUSH_INTERVAL:
+            self._flush()
+            self._flushed = now
+
+    def _flush(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._flush()
+            self._file.close()
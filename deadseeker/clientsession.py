@@ -1,9 +1,13 @@
-from .common import SeekerConfig
+from .common import SeekerConfig, SeekResults
+from .hostlimiter import THROTTLE_STATUSES
+from .retrybudget import RetryBudget
 import aiohttp
 import asyncio
 import logging
 from types import SimpleNamespace
+from typing import Any, Iterable, Iterator, Optional, Set, Type
 from aiohttp import (
+    ClientResponse,
     TraceConfig,
     TraceRequestStartParams,
     TCPConnector,
@@ -15,16 +19,133 @@ from abc import abstractmethod, ABC
 
 logger = logging.getLogger(__name__)
 
+SERVER_ERROR_STATUSES: Set[int] = set(range(500, 600))
+
+
+class _BudgetedStatuses:
+    '''
+    The statuses that are retried, for as long as the retry budget allows
+    it. The budget is only asked once one of them is answered.
+    '''
+
+    def __init__(self, statuses: Iterable[int], budget: RetryBudget) -> None:
+        self.statuses = set(statuses)
+        self.budget = budget
+
+    def __contains__(self, status: object) -> bool:
+        return status in self.statuses and self.budget.available()
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.statuses)
+
+
+class RetriedError(Exception):
+    '''
+    Raised to aiohttp_retry for an error of a request that is to be
+    retried, it is the only exception that aiohttp_retry retries.
+    '''
+
+
+class BudgetedRetry(ExponentialRetry):
+    '''
+    Retries with exponential backoff while the retry budget allows it.
+    aiohttp_retry only retries the statuses it is given, which are none
+    once the budget is spent. They are read for every response, so the
+    budget is only asked about the statuses to retry. The exceptions are
+    decided on by BudgetedSession, which raises the ones to retry as
+    RetriedError.
+    '''
+
+    def __init__(
+            self,
+            budget: RetryBudget,
+            exceptions: Iterable[Type[Exception]] = (),
+            **kwargs: Any) -> None:
+        self.budget = budget
+        super().__init__(exceptions={RetriedError}, **kwargs)
+        self.retried = tuple(exceptions)
+
+    @property
+    def statuses(self) -> Iterable[int]:
+        return self._statuses
+
+    @statuses.setter
+    def statuses(self, statuses: Iterable[int]) -> None:
+        self._statuses = _BudgetedStatuses(statuses, self.budget)
+
+    def retries(self, error: Exception, attempt: int) -> bool:
+        '''Tells whether the error of the attempt of a request is retried'''
+        return isinstance(error, self.retried) and \
+            attempt < self.attempts and self.budget.available()
+
+    def get_timeout(
+            self,
+            attempt: int,
+            response: Optional[ClientResponse] = None) -> float:
+        # only asked for right before retrying
+        self.budget.retry()
+        return super().get_timeout(attempt, response)
+
+
+class BudgetedSession:
+    '''
+    The session that RetryClient sends every attempt of a request with,
+    the errors that the retry options retry are raised as RetriedError,
+    the others and the ones that are not retried as they are.
+    '''
+
+    def __init__(
+            self,
+            session: aiohttp.ClientSession,
+            retry_options: BudgetedRetry) -> None:
+        self.session = session
+        self.retry_options = retry_options
+
+    async def request(
+            self,
+            method: str,
+            url: Any,
+            **kwargs: Any) -> ClientResponse:
+        try:
+            return await self.session.request(method, url, **kwargs)
+        except Exception as e:
+            attempt = kwargs['trace_request_ctx']['current_attempt']
+            if self.retry_options.retries(e, attempt):
+                raise RetriedError(f'{e!r} is retried') from e
+            raise
+
+    async def close(self) -> None:
+        await self.session.close()
+
 
 class ClientSessionFactory(ABC):
     @abstractmethod  # pragma: no mutate
-    def get_client_session(self, config: SeekerConfig) -> ClientType:
+    def get_client_session(
+            self,
+            config: SeekerConfig,
+            retrybudget: RetryBudget) -> ClientType:
+        pass
+
+    def add_statistics(self, results: SeekResults) -> None:
         pass
 
 
 class DefaultClientSessionFactory(ClientSessionFactory):
 
-    def get_client_session(self, config: SeekerConfig) -> ClientType:
+    def __init__(self) -> None:
+        # of the last session
+        self.retrybudget = RetryBudget()
+
+    def add_statistics(self, results: SeekResults) -> None:
+        results.requests = self.retrybudget.requests
+        results.retries = self.retrybudget.retries
+
+    def get_client_session(
+            self,
+            config: SeekerConfig,
+            retrybudget: RetryBudget) -> ClientType:
+        self.retrybudget = retrybudget
+
         async def _on_request_start(
             session: ClientType,
             trace_config_ctx: SimpleNamespace,
@@ -32,6 +153,8 @@ class DefaultClientSessionFactory(ClientSessionFactory):
         ) -> None:
             current_attempt = \
                 trace_config_ctx.trace_request_ctx['current_attempt']
+            if current_attempt == 1:
+                retrybudget.request()
             if (current_attempt > 1):
                 logger.warning(
                     f'::warn ::Retry Attempt #{current_attempt} ' +
@@ -39,21 +162,34 @@ class DefaultClientSessionFactory(ClientSessionFactory):
         trace_config = TraceConfig()
         trace_config.on_request_start.append(_on_request_start)
         limit_per_host = max(0, config.connect_limit_per_host)
+        if config.adaptive_connect_limit:
+            # the limits of the hosts are kept by the response fetcher
+            limit_per_host = max(1, config.max_connect_limit_per_host)
         connector = TCPConnector(
             limit_per_host=limit_per_host,
             ttl_dns_cache=600  # 10-minute DNS cache
         )
-        retry_options = ExponentialRetry(
+        # the error statuses are raised as ClientResponseError, which
+        # are not retried, the response fetcher retries the throttled
+        # requests itself once their host may be asked again
+        retry_options = BudgetedRetry(
+                            retrybudget,
                             attempts=config.max_tries,
                             max_timeout=config.max_time,
+                            statuses=SERVER_ERROR_STATUSES - THROTTLE_STATUSES,
+                            retry_all_server_errors=False,
                             exceptions={
-                                aiohttp.ClientError,
+                                aiohttp.ClientConnectionError,
+                                aiohttp.ClientPayloadError,
                                 asyncio.TimeoutError
                             })
-        return RetryClient(
-                raise_for_status=True,
+        session = aiohttp.ClientSession(
                 connector=connector,
                 timeout=ClientTimeout(total=config.timeout),
                 headers={'User-Agent': config.agent},
-                retry_options=retry_options,
                 trace_configs=[trace_config])
+        return RetryClient(
+                client_session=BudgetedSession(
+                    session, retry_options),  # type: ignore[arg-type]
+                raise_for_status=True,
+                retry_options=retry_options)
@@ -8,8 +8,37 @@ DEFAULT_RETRY_MAX_TIME: int = 30
 DEFAULT_EXCLUDE_PREFIX: List[str] = ['mailto:', 'tel:']
 DEFAULT_MAX_DEPTH: int = -1
 DEFAULT_CONNECT_LIMIT_PER_HOST: int = 10
+DEFAULT_MIN_CONNECT_LIMIT_PER_HOST: int = 1
+DEFAULT_MAX_CONNECT_LIMIT_PER_HOST: int = 100
+DEFAULT_CIRCUIT_BREAKER_THRESHOLD: int = 0
+DEFAULT_CIRCUIT_BREAKER_COOLDOWN: int = 30
 DEFAULT_TIMEOUT: int = 60
 DEFAULT_SEARCH_ATTRS: Set[str] = set(['href', 'src'])
+DEFAULT_MAX_CONCURRENT_REQUESTS: int = 100
+DEFAULT_MAX_FRONTIER_SIZE: int = 10000
+DEFAULT_FRONTIER_MEMORY_SIZE: int = 0
+VISITED_INDEX_EXACT: str = 'exact'
+VISITED_INDEX_HASHED: str = 'hashed'
+VISITED_INDEX_BLOOM: str = 'bloom'
+VISITED_INDEXES: List[str] = [
+    VISITED_INDEX_EXACT, VISITED_INDEX_HASHED, VISITED_INDEX_BLOOM]
+DEFAULT_VISITED_INDEX: str = VISITED_INDEX_HASHED
+DEFAULT_VISITED_HASH_BITS: int = 64
+DEFAULT_VISITED_BLOOM_CAPACITY: int = 1000000
+DEFAULT_CANONICALIZE_URLS: bool = True
+DEFAULT_MAX_REFERRERS: int = 100
+DEFAULT_OFFSITE_CACHE_TTL: int = 0
+DEFAULT_PARSE_WORKERS: int = 0
+DEFAULT_PARSE_PROCESS_THRESHOLD: int = 262144
+HTML_PARSER_BUILTIN: str = 'html.parser'
+HTML_PARSER_LXML: str = 'lxml'
+HTML_PARSER_SCAN: str = 'scan'
+HTML_PARSERS: List[str] = [
+    HTML_PARSER_BUILTIN, HTML_PARSER_LXML, HTML_PARSER_SCAN]
+DEFAULT_HTML_PARSER: str = HTML_PARSER_BUILTIN
+DEFAULT_LINK_CACHE_SIZE: int = 10000
+CACHED_NOT_MODIFIED: str = 'not modified'
+CACHED_WITHIN_TTL: str = 'within ttl'
 
 
 class SeekerConfig:
@@ -23,6 +52,10 @@ class SeekerConfig:
         self.excludesuffix: List[str] = []
         self.includecontained: List[str] = []
         self.excludecontained: List[str] = []
+        self.includeregex: List[str] = []
+        self.excluderegex: List[str] = []
+        self.includeglob: List[str] = []
+        self.excludeglob: List[str] = []
         self.search_attrs: Set[str] = DEFAULT_SEARCH_ATTRS
         self.agent: str = DEFAULT_WEB_AGENT
         self.alwaysgetonsite: bool = False
@@ -30,6 +63,44 @@ class SeekerConfig:
         self.connect_limit_per_host: int = \
             DEFAULT_CONNECT_LIMIT_PER_HOST
         self.timeout: int = DEFAULT_TIMEOUT
+        # seconds that the whole crawl may take, 0 for no limit
+        self.deadline: int = 0
+        # broken links after which the crawl stops, 0 for no limit
+        self.max_failures: int = 0
+        self.max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS
+        self.max_frontier_size: int = DEFAULT_MAX_FRONTIER_SIZE
+        self.frontier_memory_size: int = DEFAULT_FRONTIER_MEMORY_SIZE
+        self.frontier_spill_dir: Optional[str] = None
+        self.visited_index: str = DEFAULT_VISITED_INDEX
+        self.visited_hash_bits: int = DEFAULT_VISITED_HASH_BITS
+        self.visited_bloom_capacity: int = DEFAULT_VISITED_BLOOM_CAPACITY
+        self.canonicalize_urls: bool = DEFAULT_CANONICALIZE_URLS
+        self.sort_query_params: bool = False
+        self.drop_query_params: List[str] = []
+        self.max_referrers: int = DEFAULT_MAX_REFERRERS
+        self.cache_dir: Optional[str] = None
+        self.offsite_cache_ttl: int = DEFAULT_OFFSITE_CACHE_TTL
+        # journal of the crawl, to continue it from if resume is set
+        self.checkpoint_file: Optional[str] = None
+        self.resume: bool = False
+        self.stream_html: bool = False
+        self.parse_workers: int = DEFAULT_PARSE_WORKERS
+        self.parse_process_threshold: int = DEFAULT_PARSE_PROCESS_THRESHOLD
+        self.html_parser: str = DEFAULT_HTML_PARSER
+        self.link_cache_size: int = DEFAULT_LINK_CACHE_SIZE
+        self.use_uvloop: bool = False
+        self.adaptive_connect_limit: bool = False
+        self.min_connect_limit_per_host: int = \
+            DEFAULT_MIN_CONNECT_LIMIT_PER_HOST
+        self.max_connect_limit_per_host: int = \
+            DEFAULT_MAX_CONNECT_LIMIT_PER_HOST
+        self.requests_per_second_per_host: int = 0
+        self.circuit_breaker_threshold: int = \
+            DEFAULT_CIRCUIT_BREAKER_THRESHOLD
+        self.circuit_breaker_cooldown: int = DEFAULT_CIRCUIT_BREAKER_COOLDOWN
+        # retries allowed for the whole crawl, unlimited without both
+        self.retry_budget: int = -1
+        self.retry_budget_percent: int = 0
 
 
 class UrlTarget():
@@ -39,6 +110,14 @@ class UrlTarget():
         self.depth = depth
         # We don't know the parent element (yet)
         self.parent: Optional[UrlTarget] = None
+        # the number of the target in the checkpoint journal, if any,
+        # as the url changes when the target is redirected
+        self.number: Optional[int] = None
+        # the target of a url that was found again with more depth left
+        # after its links were queued, which only queues them again
+        self.revisit = False
+        # the try of the url, raised when it is throttled and tried again
+        self.attempt = 1
 
     def child(self, url: str) -> 'UrlTarget':
         child = UrlTarget(self.home, url, self.depth - 1)
@@ -53,6 +132,21 @@ class UrlTarget():
             return []
 
 
+class CachedResponse():
+    '''What is remembered about a url between runs'''
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.status: int = 0
+        self.content_type: Optional[str] = None
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        # the accepted links, only known for onsite html pages
+        self.links: Optional[List[str]] = None
+        # seconds since the epoch of the last fetch or revalidation
+        self.checked: float = 0.0
+
+
 class UrlFetchResponse():
     def __init__(self, urltarget: UrlTarget):
         self.urltarget = urltarget
@@ -60,15 +154,72 @@ class UrlFetchResponse():
         self.status: int = 0
         self.error: Optional[Exception] = None
         self.html: Optional[str] = None
+        # for failures, the pages that link to the url (at most
+        # max_referrers of them) and the number of all those pages
+        self.referrers: List[str] = []
+        self.referrer_count: int = 0
+        # links taken from the cache or parsed while the html was
+        # downloaded, instead of being parsed from html
+        self.links: Optional[List[str]] = None
+        # how the response was taken from the cache, if it was
+        # (CACHED_NOT_MODIFIED or CACHED_WITHIN_TTL)
+        self.cached: Optional[str] = None
+        self.cache_entry: Optional[CachedResponse] = None
+        # seconds after which the url is to be fetched again, when it
+        # was not its host's turn yet or the host throttled it
+        self.retry_in: Optional[float] = None
+
+
+class HostStats():
+    '''What was learned about a host while crawling'''
+
+    def __init__(self, host: str, limit: float) -> None:
+        self.host = host
+        # the number of concurrent requests allowed at the end
+        self.limit = limit
+        self.peak_limit = limit
+        self.requests: int = 0
+        # responses with 429 or 503 and timeouts
+        self.throttled: int = 0
+        self.backoffs: int = 0
+        # requests tried again after the host throttled them, and the
+        # seconds that the host was paused for, as asked by Retry-After
+        self.retries: int = 0
+        self.paused: float = 0.0
+        # times the host was taken for down, and its urls that failed
+        # without being requested because of that
+        self.circuit_opens: int = 0
+        self.failed_fast: int = 0
 
 
 class UrlFetchResponseHandler:
     def handle_response(self, resp: UrlFetchResponse) -> None:
         pass
 
+    def handle_results(self, results: 'SeekResults') -> None:
+        pass
+
 
 class SeekResults:
     def __init__(self) -> None:
         self.successes: List[UrlFetchResponse] = list()
         self.failures: List[UrlFetchResponse] = list()
         self.elapsed: float
+        # fetches that were skipped because of the url canonicalization
+        self.canonical_duplicates: int = 0
+        # HEAD requests not sent to hosts that do not support them
+        self.head_requests_skipped: int = 0
+        # lookups of the link acceptance and resolution caches
+        self.accept_cache_hits: int = 0
+        self.accept_cache_misses: int = 0
+        self.urljoin_cache_hits: int = 0
+        self.urljoin_cache_misses: int = 0
+        # what was learned about the hosts, see HostLimiter
+        self.hosts: List[HostStats] = list()
+        # requests sent for the urls, and retries of them after
+        # connection errors, timeouts and server errors
+        self.requests: int = 0
+        self.retries: int = 0
+        # urls that were not checked as the deadline or the maximum
+        # number of failures was reached
+        self.unvisited: int = 0
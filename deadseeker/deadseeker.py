@@ -1,8 +1,32 @@
 import asyncio
-from urllib.parse import urljoin
-from typing import List, Set, Deque, Optional, Union
-from .timer import Timer
+import math
+from typing import (
+    Any, Awaitable, Callable, Coroutine, List, Optional, Union
+)
+from .timer import Deadline, Timer
+from .frontier import Frontier
+from .visited import VisitedSetFactory, DefaultVisitedSetFactory
+from .referrers import ReferrerIndex
+from .depths import NO_LINKS, DepthIndex, new_depth_index
+from .retrybudget import RetryBudget
+from .headsupport import url_host
+from .checkpoint import (
+    Checkpoint,
+    CheckpointFactory,
+    DefaultCheckpointFactory
+)
+from .urlresolver import UrlResolver
+from .responsecache import (
+    ResponseCacheFactory,
+    DefaultResponseCacheFactory
+)
+from .canonicalizer import (
+    CanonicalVisitedSet,
+    UrlCanonicalizerFactory,
+    DefaultUrlCanonicalizerFactory
+)
 import logging
+from aiohttp_retry.types import ClientType
 from .clientsession import ClientSessionFactory, DefaultClientSessionFactory
 from .common import (
     SeekerConfig,
@@ -12,6 +36,7 @@ from .common import (
     UrlFetchResponseHandler
 )
 from .responsefetcher import (
+    ResponseFetcher,
     ResponseFetcherFactory,
     DefaultResponseFetcherFactory
 )
@@ -24,6 +49,10 @@ from .linkparser import (
     LinkParserFactory,
     DefaultLinkParserFactory
 )
+try:
+    import uvloop  # type: ignore
+except ImportError:  # pragma: no cover
+    uvloop = None  # type: ignore
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +68,28 @@ class DeadSeeker:
             DefaultLinkAcceptorFactory()
         self.linkparserfactory: LinkParserFactory =\
             DefaultLinkParserFactory()
+        self.visitedsetfactory: VisitedSetFactory =\
+            DefaultVisitedSetFactory()
+        self.urlcanonicalizerfactory: UrlCanonicalizerFactory =\
+            DefaultUrlCanonicalizerFactory()
+        self.responsecachefactory: ResponseCacheFactory =\
+            DefaultResponseCacheFactory()
+        self.checkpointfactory: CheckpointFactory =\
+            DefaultCheckpointFactory()
+
+    def _run(self, main: Coroutine[Any, Any, SeekResults]) -> SeekResults:
+        if not self.config.use_uvloop:
+            return asyncio.run(main)
+        if uvloop is None:
+            logger.warning(
+                'uvloop is not installed, using the asyncio event loop instead')
+            return asyncio.run(main)
+        policy = asyncio.get_event_loop_policy()
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        try:
+            return asyncio.run(main)
+        finally:
+            asyncio.set_event_loop_policy(policy)
 
     async def _main(
             self,
@@ -46,62 +97,314 @@ class DeadSeeker:
             responsehandler: Optional[UrlFetchResponseHandler] = None
             ) -> SeekResults:
         timer = Timer()
+        # the requests in flight are given the last tenth of the time,
+        # but no longer than a request may take
+        deadline = Deadline(
+            self.config.deadline,
+            min(self.config.timeout, self.config.deadline / 10))
         results = SeekResults()
-        visited: Set[str] = set()  # to keep track of visited and queued URLs
-        targets: Deque[UrlTarget] = Deque[UrlTarget]()  # queued URLs only
-        for url in urls:
-            visited.add(url)
-            targets.appendleft(UrlTarget(url, url, self.config.max_depth))
+        # to keep track of visited and queued URLs, duplicates are
+        # detected on the canonical form of the URLs
+        visited = CanonicalVisitedSet(
+            self.visitedsetfactory.get_visited_set(self.config),
+            self.urlcanonicalizerfactory.get_url_canonicalizer(self.config))
+        # pages linking to each url, so that broken links can be reported
+        # with all their pages and not only with the first one found
+        referrers = ReferrerIndex(self.config.max_referrers)
+        # the links of a url are queued again when it is found through a
+        # path with more depth left after they were queued
+        depths = new_depth_index(self.config, visited)
+        checkpoint = self.checkpointfactory.get_checkpoint(self.config)
+        seeds = self._restore(
+            checkpoint, visited, depths, results, responsehandler)
+        seeds.extend(self._seeds(urls, visited, checkpoint))
+        workers = max(1, self.config.max_concurrent_requests)
+        targets = Frontier(
+            self.config.max_frontier_size,
+            workers,
+            self.config.frontier_memory_size,
+            self.config.frontier_spill_dir)
         linkacceptor = self.linkacceptorfactory.get_link_acceptor(self.config)
         linkparser = \
             self.linkparserfactory.get_link_parser(self.config, linkacceptor)
+        cache = self.responsecachefactory.get_response_cache(
+            self.config, visited.canonicalizer)
+        # shared by the retries of the session and the throttled requests
+        # that the response fetcher tries again
+        retrybudget = RetryBudget(
+            self.config.retry_budget, self.config.retry_budget_percent)
         responsefetcher = self.responsefetcherfactory.get_response_fetcher(
-                                self.config)
+                                self.config, cache, linkparser, retrybudget)
         async with self.clientsessionfactory.get_client_session(
-                self.config) as session:
-            while targets:
-                tasks = []
-                while targets:  # iterate all targets of one depth
-                    urltarget = targets.pop()  # pragma: no mutate
-                    tasks.append(
-                        asyncio.create_task(
-                            responsefetcher.fetch_response(
-                                session, urltarget)))
-                for task in asyncio.as_completed(tasks):  # completed first
-                    resp = await task
-                    assert isinstance(resp, UrlFetchResponse), \
-                        "Expected to get an UrlFetchResponse from the festh_response task"  # pragma: no mutate
-                    if responsehandler:
-                        responsehandler.handle_response(resp)
-                    if resp.error:
-                        results.failures.append(resp)
-                    else:
-                        results.successes.append(resp)
-                    self._parse_response(visited, targets, linkparser, resp)
+                self.config, retrybudget) as session:
+
+            async def _worker() -> None:
+                while True:
+                    urltarget = await targets.get()
+                    try:
+                        if deadline.closing():
+                            # the queued urls are only counted
+                            results.unvisited += 1
+                            continue
+                        # the url of the target changes on a redirect
+                        key = visited.canonicalizer.canonicalize(
+                            urltarget.url)
+                        host = url_host(urltarget.url)
+                        resp = await self._fetch(
+                            responsefetcher, session, urltarget, results)
+                        if resp.retry_in != math.inf:
+                            # the request was released, a url of the host
+                            # that waits for one may go
+                            targets.resume(host)
+                        if resp.retry_in is not None:
+                            # the other hosts go on in the meantime
+                            targets.defer(
+                                urltarget, url_host(urltarget.url),
+                                resp.retry_in)
+                            continue
+                        self._add_result(results, resp, responsehandler)
+                        await self._parse_response(
+                            visited, referrers, targets, linkparser,
+                            checkpoint, depths, key, resp)
+                        # the links were queued, the page and the links
+                        # parsed while it was downloaded are not kept
+                        # with the results
+                        resp.html = None
+                        resp.links = None
+                        checkpoint.done(resp)
+                        cache.put(resp)
+                        if 0 < self.config.max_failures <= \
+                                len(results.failures):
+                            # stops the crawl, see _run_workers
+                            return
+                    finally:
+                        targets.task_done()
+
+            # the crawl was neither cancelled nor stopped early
+            finished = False
+            try:
+                await self._run_workers(
+                    targets, seeds, workers, _worker, deadline.remaining())
+                results.unvisited += targets.qsize()
+                finished = not results.unvisited
+            finally:
+                checkpoint.close()
+                targets.close()
+                visited.close()
+                cache.close()
+                linkparser.close(wait=finished)
+        results.canonical_duplicates = visited.duplicates
+        self._report_referrers(visited, referrers, results)
+        self.clientsessionfactory.add_statistics(results)
+        responsefetcher.add_statistics(results)
+        linkparser.add_statistics(results)
         results.elapsed = timer.stop() * 1000
+        if responsehandler:
+            responsehandler.handle_results(results)
         return results
 
-    def _parse_response(
+    async def _run_workers(
+            self,
+            targets: Frontier,
+            seeds: List[UrlTarget],
+            count: int,
+            worker: Callable[[], Awaitable[None]],
+            timeout: Optional[float] = None) -> None:
+        # Every worker picks up the next target as soon as it is done with
+        # its current one, so newly discovered links get scheduled while
+        # slower requests are still in flight (no per-depth barrier).
+        # The number of workers is the global limit of requests in flight.
+        # Whatever is still running after the timeout (if any) or once a
+        # worker returns is cancelled, and so is everything when the crawl
+        # itself is cancelled, before the caller closes what they use.
+        tasks = [asyncio.ensure_future(worker()) for _ in range(count)]
+        try:
+            for seed in seeds:
+                await targets.put(seed)
+            tasks.append(asyncio.ensure_future(targets.join()))
+            done, _ = await asyncio.wait(
+                tasks, timeout=timeout,
+                return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for task in done:
+            # re-raise anything that made a worker stop unexpectedly
+            task.result()
+
+    async def _fetch(
             self,
-            visited: Set[str],
-            targets: Deque[UrlTarget],
+            responsefetcher: ResponseFetcher,
+            session: ClientType,
+            urltarget: UrlTarget,
+            results: SeekResults) -> UrlFetchResponse:
+        try:
+            resp = await responsefetcher.fetch_response(session, urltarget)
+        except asyncio.CancelledError:
+            # the request was still in flight at the deadline
+            results.unvisited += 1
+            raise
+        assert isinstance(resp, UrlFetchResponse), \
+            "Expected to get an UrlFetchResponse from the festh_response task"  # pragma: no mutate
+        return resp
+
+    def _restore(
+            self,
+            checkpoint: Checkpoint,
+            visited: CanonicalVisitedSet,
+            depths: DepthIndex,
+            results: SeekResults,
+            responsehandler: Optional[UrlFetchResponseHandler]
+            ) -> List[UrlTarget]:
+        '''Takes over the results and the frontier of a previous crawl'''
+        found, pending, done = checkpoint.restore()
+        for url, depth, expanded in found:
+            key = visited.canonicalizer.canonicalize(url)
+            visited.add_canonical(url, key)
+            depths.found(key, depth)
+            if expanded == NO_LINKS:
+                depths.no_links(key)
+            elif expanded is not None:
+                depths.expand(key, expanded)
+        for resp in done:
+            self._add_result(results, resp, responsehandler)
+        return pending
+
+    def _seeds(
+            self,
+            urls: List[str],
+            visited: CanonicalVisitedSet,
+            checkpoint: Checkpoint) -> List[UrlTarget]:
+        seeds: List[UrlTarget] = []
+        for url in urls:
+            if visited.add(url):
+                seed = UrlTarget(url, url, self.config.max_depth)
+                checkpoint.queued(seed)
+                seeds.append(seed)
+        return seeds
+
+    def _add_result(
+            self,
+            results: SeekResults,
+            resp: UrlFetchResponse,
+            responsehandler: Optional[UrlFetchResponseHandler]) -> None:
+        if resp.urltarget.revisit:
+            # reported already, only fetched again for its links
+            return
+        if responsehandler:
+            responsehandler.handle_response(resp)
+        if resp.error:
+            results.failures.append(resp)
+        else:
+            results.successes.append(resp)
+
+    def _report_referrers(
+            self,
+            visited: CanonicalVisitedSet,
+            referrers: ReferrerIndex,
+            results: SeekResults) -> None:
+        for resp in results.failures:
+            resp.referrers, resp.referrer_count = referrers.get(
+                visited.canonicalizer.canonicalize(resp.urltarget.url))
+
+    async def _parse_response(
+            self,
+            visited: CanonicalVisitedSet,
+            referrers: ReferrerIndex,
+            targets: Frontier,
             linkparser: LinkParser,
+            checkpoint: Checkpoint,
+            depths: DepthIndex,
+            key: str,
             resp: UrlFetchResponse) -> None:
-        depth = resp.urltarget.depth
-        if resp.html and depth != 0:
-            links = linkparser.parse(resp)
-            base = resp.urltarget.url
-            for newurl in links:
-                newurl = urljoin(base, newurl)
-                if newurl not in visited:
-                    visited.add(newurl)
-                    targets.appendleft(resp.urltarget.child(newurl))
+        if resp.links is None and not resp.html:
+            depths.no_links(key)
+            return
+        depth = resp.urltarget.depth = depths.expand(key, resp.urltarget.depth)
+        checkpoint.expanded(resp.urltarget)
+        if depth == 0:
+            return
+        links = await self._get_links(linkparser, resp)
+        if not links:
+            return
+        base = UrlResolver(resp.urltarget.url)
+        page_id = referrers.page_id(base.base)
+        # the same link is often repeated on a page, like in its navigation
+        for newurl in dict.fromkeys(links):
+            newurl = base.resolve(newurl)
+            key = visited.canonicalizer.canonicalize(newurl)
+            referrers.add(key, page_id)
+            if visited.add_canonical(newurl, key):
+                depths.found(key, depth - 1)
+                child = resp.urltarget.child(newurl)
+            elif not depths.deeper(key, depth - 1):
+                continue
+            elif depths.found(key, depth - 1):
+                child = resp.urltarget.child(newurl)
+                child.revisit = True
+            else:
+                # its links are going to be queued with this depth
+                checkpoint.found(resp.urltarget, newurl)
+                continue
+            checkpoint.queued(child)
+            # waits while the frontier is full (backpressure)
+            await targets.put(child)
+
+    async def _get_links(
+            self,
+            linkparser: LinkParser,
+            resp: UrlFetchResponse) -> List[str]:
+        if resp.links is not None:
+            # the links were cached or parsed while downloading
+            links = resp.links
+        elif resp.html:
+            # may be parsed in another thread or process
+            links = await linkparser.parse_async(resp)
+        else:
+            return []
+        if resp.cache_entry is not None:
+            resp.cache_entry.links = links
+        return links
 
     def seek(
             self,
             urls: Union[str, List[str]],
             responsehandler: Optional[UrlFetchResponseHandler] = None) -> SeekResults:
         url_list = [urls] if isinstance(urls, str) else urls
-        results = asyncio.run(self._main(url_list, responsehandler))
+        results = self._run(self._main(url_list, responsehandler))
+        if results.unvisited:
+            if 0 < self.config.max_failures <= len(results.failures):
+                reason = f'after {len(results.failures)} failures'
+            else:
+                reason = f'at the deadline of {self.config.deadline} s'
+            logger.warning(
+                f'::warn ::Stopped {reason},'
+                f' {results.unvisited} urls were left unvisited')
+        logger.debug(
+            'URL canonicalization saved'
+            f' {results.canonical_duplicates} fetches')
+        logger.debug(
+            f'Skipped {results.head_requests_skipped} HEAD requests'
+            ' to hosts without HEAD support')
+        logger.debug(
+            'Link acceptance cache:'
+            f' {results.accept_cache_hits} hits,'
+            f' {results.accept_cache_misses} misses')
+        logger.debug(
+            'Link resolution cache:'
+            f' {results.urljoin_cache_hits} hits,'
+            f' {results.urljoin_cache_misses} misses')
+        logger.debug(
+            f'Retried {results.retries} of {results.requests} requests')
+        for host in results.hosts:
+            limit = f'limit {host.limit:.1f} (peak {host.peak_limit:.1f})' \
+                if host.limit else 'no limit'
+            logger.debug(
+                f'Host {host.host}: {limit}, {host.requests} requests,'
+                f' {host.throttled} throttled, {host.backoffs} backoffs,'
+                f' {host.retries} retries, paused {host.paused:.1f} s,'
+                f' down {host.circuit_opens} times,'
+                f' {host.failed_fast} failed fast')
         logger.debug(f'Process took {results.elapsed:.2f} ms')
         return results
@@ -0,0 +1,86 @@
+import sys
+from typing import Callable, Dict, Hashable
+from .common import SeekerConfig
+from .visited import VisitedSet
+
+# the depth of a url without links, which is never expanded again
+NO_LINKS = sys.maxsize
+# shared by all of the urls without links
+_NO_LINKS_VALUE = -1 - NO_LINKS
+
+
+class DepthIndex:
+    '''Expands every url with the depth left of the first path to it'''
+
+    def found(self, key: str, depth: int) -> bool:
+        '''
+        Records a url that was linked with depth left, tells whether its
+        links have to be queued again
+        '''
+        return False
+
+    def deeper(self, key: str, depth: int) -> bool:
+        '''Tells whether a url was not linked with that much depth left'''
+        return False
+
+    def expand(self, key: str, depth: int) -> int:
+        '''The depth left to queue the links of a url with'''
+        return depth
+
+    def no_links(self, key: str) -> None:
+        '''Records a url that has no links to queue'''
+        pass
+
+
+class BestDepthIndex(DepthIndex):
+    '''
+    Keeps the most depth left of the paths to every url, as the workers
+    do not find the urls in the order of their depth: a url that is
+    reached through a slow page may have been found through a longer
+    path already. The links of a url are queued with the most depth
+    left at the time, and once more when a path with more depth left is
+    found after that.
+    '''
+
+    def __init__(self, key: Callable[[str], Hashable] = str) -> None:
+        # keyed like the visited set, by the url itself or by its hash,
+        # so that two urls are only told apart if the visited set does.
+        # The value is the most depth left found for a url, or once its
+        # links were queued, -1 - the depth left they were queued with,
+        # so one dict entry is all that is kept per url.
+        self._key = key
+        self._depths: Dict[Hashable, int] = {}
+
+    def found(self, key: str, depth: int) -> bool:
+        url_key = self._key(key)
+        value = self._depths.get(url_key)
+        if value is None or 0 <= value < depth:
+            self._depths[url_key] = depth
+            return False
+        if value >= 0 or depth <= -1 - value:
+            return False
+        # expanded with less depth left, left out until it is again
+        self._depths[url_key] = depth
+        return True
+
+    def deeper(self, key: str, depth: int) -> bool:
+        value = self._depths.get(self._key(key))
+        return value is None or depth > (value if value >= 0 else -1 - value)
+
+    def expand(self, key: str, depth: int) -> int:
+        url_key = self._key(key)
+        value = self._depths.get(url_key)
+        if value is not None:
+            depth = max(depth, value if value >= 0 else -1 - value)
+        self._depths[url_key] = -1 - depth
+        return depth
+
+    def no_links(self, key: str) -> None:
+        self._depths[self._key(key)] = _NO_LINKS_VALUE
+
+
+def new_depth_index(config: SeekerConfig, visited: VisitedSet) -> DepthIndex:
+    if config.max_depth < 0:
+        # every path goes all the way
+        return DepthIndex()
+    return BestDepthIndex(visited.key)
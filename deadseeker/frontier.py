@@ -0,0 +1,211 @@
+import asyncio
+import json
+import math
+import tempfile
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional
+from .common import UrlTarget
+
+if TYPE_CHECKING:  # pragma: no cover
+    _TargetQueue = asyncio.Queue[UrlTarget]
+else:
+    _TargetQueue = asyncio.Queue
+
+
+def encode_target(target: UrlTarget) -> str:
+    return json.dumps([
+        target.home, target.url, target.depth, target.parent_urls(),
+        target.number, target.revisit])
+
+
+def decode_target(line: str) -> UrlTarget:
+    home, url, depth, parent_urls, number, revisit = json.loads(line)
+    # rebuild the chain of parents so that the navigation path survives
+    target: Optional[UrlTarget] = None
+    parent_depth = depth + len(parent_urls)
+    for parent_url in parent_urls + [url]:
+        parent = target
+        target = UrlTarget(home, parent_url, parent_depth)
+        target.parent = parent
+        parent_depth -= 1
+    assert target is not None  # pragma: no mutate
+    target.number = number
+    target.revisit = revisit
+    return target
+
+
+class TargetSpillFile:
+    '''
+    Append-only temporary file that holds the overflow of the frontier.
+    Targets are read back in the order they were written.
+    '''
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self._file = tempfile.TemporaryFile(mode='w+b', dir=directory)
+        self._read_pos = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, target: UrlTarget) -> None:
+        self._file.seek(0, 2)
+        self._file.write(encode_target(target).encode('utf-8') + b'\n')
+        self._count += 1
+
+    def read(self, count: int) -> List[UrlTarget]:
+        self._file.seek(self._read_pos)
+        targets: List[UrlTarget] = []
+        while self._count and len(targets) < count:
+            line = self._file.readline().decode('utf-8')
+            targets.append(decode_target(line))
+            self._count -= 1
+        self._read_pos = self._file.tell()
+        if not self._count:
+            # everything was read back, give the disk space back
+            self._file.seek(0)
+            self._file.truncate()
+            self._read_pos = 0
+        return targets
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class Frontier(_TargetQueue):
+    '''
+    FIFO queue of the UrlTargets that still have to be fetched.
+
+    Once maxsize targets are queued, put() waits until a worker takes
+    one off the queue, so link discovery is throttled to the pace of
+    fetching instead of queueing everything that was found. The workers
+    are also the producers of new targets, therefore the last consumer
+    is always let through to avoid that all of them wait on each other.
+
+    With a positive memory_size only that many targets are kept in
+    memory, the rest is spilled to a file in spill_dir and read back
+    once the in-memory window has been worked off.
+
+    A target that may not be fetched yet, like one of a host that asked
+    for a pause, is deferred: it is parked with the other targets of its
+    key (the host) instead of holding up a worker, and handed out again
+    once the delay is over. The parked targets of a key are handed out
+    one at a time, the next one as soon as the previous one was taken,
+    so that a key with many parked targets does not flood the workers
+    with targets that are only going to be parked again.
+    '''
+
+    def __init__(
+            self,
+            maxsize: int = 0,
+            consumers: int = 1,
+            memory_size: int = 0,
+            spill_dir: Optional[str] = None) -> None:
+        self.memory_size = memory_size
+        self._spill: Optional[TargetSpillFile] = None
+        if memory_size > 0:
+            self._spill = TargetSpillFile(spill_dir)
+        super().__init__(maxsize=max(0, maxsize))
+        self.consumers = consumers
+        self._producers = 0
+        self._parked: Dict[str, Deque[UrlTarget]] = {}
+        self._parked_count = 0
+        # the pending hand-out of the parked targets of every key, None
+        # for the keys whose targets wait for resume()
+        self._wakeups: Dict[str, Optional[asyncio.TimerHandle]] = {}
+        # the keys of the targets that were handed out and not taken yet
+        self._handed_out: Dict[int, str] = {}
+
+    def _init(self, maxsize: int) -> None:
+        self._targets: Deque[UrlTarget] = deque()
+
+    def qsize(self) -> int:
+        spilled = len(self._spill) if self._spill else 0
+        return len(self._targets) + spilled + self._parked_count
+
+    def empty(self) -> bool:
+        # the parked targets are not ready to be taken
+        return not self._targets and not self._spill
+
+    def _put(self, item: UrlTarget) -> None:
+        if self._spill is not None and (
+                len(self._spill) or len(self._targets) >= self.memory_size):
+            self._spill.append(item)
+        else:
+            self._targets.append(item)
+
+    def _get(self) -> UrlTarget:
+        if not self._targets and self._spill:
+            self._targets.extend(self._spill.read(self.memory_size))
+        item = self._targets.popleft()
+        key = self._handed_out.pop(id(item), None)
+        if key is not None:
+            asyncio.get_running_loop().call_soon(self._hand_out_next, key)
+        return item
+
+    def defer(self, item: UrlTarget, key: str, delay: float) -> None:
+        '''
+        Parks a target that was taken off the frontier, until delay
+        seconds from now, or until resume() of its key with an infinite
+        delay. It is not done, task_done() of its get() does not finish
+        it.
+        '''
+        self._parked.setdefault(key, deque()).append(item)
+        self._parked_count += 1
+        # the same as a put(), which lets join() wait for the target
+        self._unfinished_tasks += 1  # type: ignore [attr-defined]
+        self._finished.clear()  # type: ignore [attr-defined]
+        if delay == math.inf:
+            self._wakeups.setdefault(key, None)
+            return
+        loop = asyncio.get_running_loop()
+        wakeup = self._wakeups.get(key)
+        if wakeup is None or wakeup.when() > loop.time() + delay:
+            if wakeup is not None:
+                wakeup.cancel()
+            self._wakeups[key] = loop.call_later(delay, self._wake, key)
+
+    def resume(self, key: str) -> None:
+        '''Hands out a target of the key that waits for this'''
+        if key in self._wakeups and self._wakeups[key] is None:
+            self._wake(key)
+
+    def _wake(self, key: str) -> None:
+        del self._wakeups[key]
+        self._hand_out(key)
+
+    def _hand_out_next(self, key: str) -> None:
+        if key not in self._wakeups:
+            # the previous target was not parked again
+            self._hand_out(key)
+
+    def _hand_out(self, key: str) -> None:
+        parked = self._parked.get(key)
+        if not parked:
+            return
+        item = parked.popleft()
+        if not parked:
+            del self._parked[key]
+        self._parked_count -= 1
+        # ahead of the others, it has waited long enough
+        self._targets.appendleft(item)
+        self._handed_out[id(item)] = key
+        self._wakeup_next(self._getters)  # type: ignore [attr-defined]
+
+    def full(self) -> bool:
+        return super().full() and self._producers < self.consumers
+
+    async def put(self, item: UrlTarget) -> None:
+        self._producers += 1
+        try:
+            await super().put(item)
+        finally:
+            self._producers -= 1
+
+    def close(self) -> None:
+        for wakeup in self._wakeups.values():
+            if wakeup is not None:
+                wakeup.cancel()
+        self._wakeups.clear()
+        if self._spill is not None:
+            self._spill.close()
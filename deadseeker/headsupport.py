@@ -0,0 +1,51 @@
+from typing import Dict, Set
+from urllib.parse import urlsplit
+from .responsecache import ResponseCache
+
+# answers to a HEAD request that mean the server does not implement it
+HEAD_UNSUPPORTED_STATUSES: Set[int] = set([405, 501])
+# unsupported answers after which a host is not sent HEAD requests anymore
+HEAD_UNSUPPORTED_THRESHOLD: int = 2
+
+
+def url_host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+class HeadSupport:
+    '''
+    Learns which hosts do not support HEAD requests, so that their urls
+    are fetched with GET right away instead of with a HEAD request that
+    is going to fail first.
+
+    A host that answered a HEAD request successfully is assumed to
+    support it, a few unsupported answers then only concern single urls.
+    The hosts that were learned are kept in the response cache.
+    '''
+
+    def __init__(self, cache: ResponseCache) -> None:
+        self.cache = cache
+        self._supported: Set[str] = set()
+        self._unsupported_answers: Dict[str, int] = {}
+        self._unsupported: Set[str] = cache.get_hosts_without_head()
+        # number of HEAD requests (round trips) that were not sent
+        self.skipped = 0
+
+    def should_skip(self, url: str) -> bool:
+        if url_host(url) in self._unsupported:
+            self.skipped += 1
+            return True
+        return False
+
+    def supported(self, url: str) -> None:
+        self._supported.add(url_host(url))
+
+    def unsupported(self, url: str) -> None:
+        host = url_host(url)
+        if host in self._supported or host in self._unsupported:
+            return
+        answers = self._unsupported_answers.get(host, 0) + 1
+        self._unsupported_answers[host] = answers
+        if answers >= HEAD_UNSUPPORTED_THRESHOLD:
+            self._unsupported.add(host)
+            self.cache.add_host_without_head(host)
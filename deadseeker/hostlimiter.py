@@ -0,0 +1,361 @@
+import asyncio
+import logging
+import math
+import time
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+from aiohttp import ClientConnectionError, ClientResponseError
+from .common import HostStats, SeekerConfig, UrlFetchResponse
+from .headsupport import url_host
+from .retrybudget import RetryBudget
+
+logger = logging.getLogger(__name__)
+
+# answers of a host that is overloaded or throttles us
+THROTTLE_STATUSES = frozenset([429, 503])
+# a response that is this many times slower than the fastest one of its
+# host is a sign of a loaded host, the limit is not raised on it
+LATENCY_TOLERANCE: float = 3.0
+# seconds that a host is paused when it throttles without Retry-After
+DEFAULT_RETRY_AFTER: float = 1.0
+# errors of requests that did not get an answer of the host at all
+CONNECTION_ERRORS = (ClientConnectionError, asyncio.TimeoutError)
+
+
+class HostUnavailableError(Exception):
+    '''The error of the urls that are not requested as their host is down'''
+    pass
+
+
+def retry_after(resp: UrlFetchResponse) -> Optional[float]:
+    '''Seconds that the Retry-After header of a response asks to wait'''
+    error = resp.error
+    if not isinstance(error, ClientResponseError) or not error.headers:
+        return None
+    value = error.headers.get('Retry-After', '').strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        # HTTP dates are in GMT
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, when.timestamp() - time.time())
+
+
+def is_throttled(resp: UrlFetchResponse) -> bool:
+    return resp.status in THROTTLE_STATUSES or \
+        isinstance(resp.error, asyncio.TimeoutError)
+
+
+class HostLimiter:
+    '''Lets any number of requests to a host run at the same time'''
+
+    def delay(self, url: str) -> float:
+        '''
+        Seconds until a request to the host of the url may be sent, or
+        math.inf until one of the requests to the host is released
+        '''
+        return 0.0
+
+    def turn_delay(self, url: str) -> float:
+        '''Seconds until an acquired url may send one more request'''
+        return 0.0
+
+    async def acquire(self, url: str) -> float:
+        '''Takes the turn of a request that delay() lets be sent now'''
+        return time.monotonic()
+
+    def turn(self, url: str) -> None:
+        '''Takes the turn of one more request of an acquired url'''
+        pass
+
+    def release(
+            self,
+            url: str,
+            resp: UrlFetchResponse,
+            acquired: float) -> None:
+        '''Learns from the response of a request that was acquired'''
+        pass
+
+    def should_retry(self, resp: UrlFetchResponse, attempt: int) -> bool:
+        '''Tells whether a released response is to be fetched again'''
+        return False
+
+    def get_stats(self) -> List[HostStats]:
+        return []
+
+
+def new_host_limiter(
+        config: SeekerConfig,
+        retrybudget: Optional[RetryBudget] = None) -> HostLimiter:
+    rate = max(0, config.requests_per_second_per_host)
+    threshold = max(0, config.circuit_breaker_threshold)
+    cooldown = max(0, config.circuit_breaker_cooldown)
+    if not config.adaptive_connect_limit:
+        return PacedHostLimiter(
+            rate, config.max_tries, config.max_time, threshold, cooldown,
+            retrybudget)
+    maximum = max(1, config.max_connect_limit_per_host)
+    minimum = min(maximum, max(1, config.min_connect_limit_per_host))
+    initial = config.connect_limit_per_host or maximum
+    return AdaptiveHostLimiter(
+        min(maximum, max(minimum, initial)), minimum, maximum,
+        rate, config.max_tries, config.max_time, threshold, cooldown,
+        retrybudget)
+
+
+class _HostState:
+    def __init__(self, host: str, limit: float) -> None:
+        self.stats = HostStats(host, limit)
+        self.limit = limit
+        # the limit is doubled per round until the host first backs off
+        self.slow_start = True
+        self.in_flight = 0
+        self.min_latency: Optional[float] = None
+        self.backed_off = 0.0
+        # no request is sent before these (monotonic) times
+        self.paused_until = 0.0
+        self.next_turn = 0.0
+        self.failures_in_row = 0
+        # while the circuit is open, the urls of the host are failed
+        # without being requested, until a probe gets an answer again
+        self.open_until: Optional[float] = None
+        self.probing = False
+
+    @property
+    def allowed(self) -> int:
+        return int(self.limit)
+
+
+class PacedHostLimiter(HostLimiter):
+    '''
+    Sends the requests to every host no faster than the requests per
+    second allowed (if any), and pauses all requests to a host when it
+    answers with 429 or 503, for as long as its Retry-After header asks
+    for, but at most max_time seconds. The throttled requests are tried
+    again after the pause, up to max_tries times, unless the host asks
+    for a longer pause than that. Nothing waits here: delay() tells how
+    long the url has to wait for its turn, so that it can be put aside
+    while the urls of the other hosts are fetched.
+
+    After failure_threshold connection errors or timeouts in a row (if
+    set), the host is taken for down and its urls fail right away with
+    a HostUnavailableError. Once every cooldown seconds (if set), one
+    url is requested again as a probe, which brings the host back if
+    it gets an answer.
+
+    The throttled requests are retries of the retry budget (if given) as
+    well, they are not tried again once it is spent.
+    '''
+
+    def __init__(
+            self,
+            requests_per_second: int = 0,
+            max_tries: int = 1,
+            max_time: float = 0.0,
+            failure_threshold: int = 0,
+            cooldown: float = 0.0,
+            retrybudget: Optional[RetryBudget] = None) -> None:
+        self.interval = \
+            1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self.max_tries = max_tries
+        self.max_time = max_time
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.retrybudget = retrybudget or RetryBudget()
+        self.initial = 0
+        self._hosts: Dict[str, _HostState] = {}
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(host, self.initial)
+        return state
+
+    def delay(self, url: str) -> float:
+        if self._is_open(self._state(url_host(url))):
+            # its urls fail right away
+            return 0.0
+        return self.turn_delay(url)
+
+    def turn_delay(self, url: str) -> float:
+        state = self._state(url_host(url))
+        start = max(state.paused_until, state.next_turn)
+        return max(0.0, start - time.monotonic())
+
+    async def acquire(self, url: str) -> float:
+        state = self._state(url_host(url))
+        self._admit(state, url)
+        self._reserve(state)
+        return time.monotonic()
+
+    def turn(self, url: str) -> None:
+        self._reserve(self._state(url_host(url)))
+
+    def _is_open(self, state: _HostState) -> bool:
+        return state.open_until is not None and (
+            self.cooldown <= 0 or state.probing or
+            time.monotonic() < state.open_until)
+
+    def _admit(self, state: _HostState, url: str) -> None:
+        '''Fails the url if its host is down, or makes it the probe'''
+        if state.open_until is None:
+            return
+        if self._is_open(state):
+            raise self._unavailable(state, url)
+        state.probing = True
+
+    def _unavailable(
+            self, state: _HostState, url: str) -> HostUnavailableError:
+        state.stats.failed_fast += 1
+        return HostUnavailableError(
+            f'{state.stats.host} is not requested after'
+            f' {state.failures_in_row} connection errors or timeouts')
+
+    def _reserve(self, state: _HostState) -> None:
+        start = max(time.monotonic(), state.paused_until, state.next_turn)
+        state.next_turn = start + self.interval
+
+    def release(
+            self,
+            url: str,
+            resp: UrlFetchResponse,
+            acquired: float) -> None:
+        state = self._state(url_host(url))
+        state.stats.requests += 1
+        if is_throttled(resp):
+            state.stats.throttled += 1
+        if resp.status in THROTTLE_STATUSES:
+            delay = retry_after(resp)
+            if delay is None:
+                delay = DEFAULT_RETRY_AFTER
+            now = time.monotonic()
+            until = now + min(delay, self.max_time)
+            if until > state.paused_until:
+                state.stats.paused += until - max(state.paused_until, now)
+                state.paused_until = until
+        if isinstance(resp.error, CONNECTION_ERRORS):
+            state.failures_in_row += 1
+            if state.probing or (
+                    state.open_until is None and
+                    0 < self.failure_threshold <= state.failures_in_row):
+                self._open(state)
+        elif resp.status:
+            # the host answered, whatever it was
+            state.failures_in_row = 0
+            state.open_until = None
+            state.probing = False
+        elif state.probing:
+            # the probe ended without telling whether the host is back,
+            # like when it was cancelled or its url was invalid
+            self._reopen(state)
+
+    def _reopen(self, state: _HostState) -> None:
+        '''Waits another cooldown for the next probe'''
+        state.open_until = time.monotonic() + self.cooldown
+        state.probing = False
+
+    def _open(self, state: _HostState) -> None:
+        state.open_until = time.monotonic() + self.cooldown
+        state.probing = False
+        state.stats.circuit_opens += 1
+        logger.warning(
+            f'::warn ::Not requesting {state.stats.host} after'
+            f' {state.failures_in_row} connection errors or timeouts'
+            ' in a row')
+
+    def should_retry(self, resp: UrlFetchResponse, attempt: int) -> bool:
+        if resp.status not in THROTTLE_STATUSES or \
+                attempt >= self.max_tries or \
+                (retry_after(resp) or 0.0) > self.max_time or \
+                not self.retrybudget.available():
+            return False
+        self.retrybudget.retry()
+        url = resp.urltarget.url
+        self._state(url_host(url)).stats.retries += 1
+        logger.warning(
+            f'::warn ::Retry Attempt #{attempt + 1} ' +
+            f'of {self.max_tries} after {resp.status}: {url}')
+        return True
+
+    def get_stats(self) -> List[HostStats]:
+        return [state.stats for state in self._hosts.values()]
+
+
+class AdaptiveHostLimiter(PacedHostLimiter):
+    '''
+    Adapts the number of concurrent requests of every host on its own
+    (additive increase, multiplicative decrease, like TCP congestion
+    control does). A host starts at the initial limit, which is raised
+    while its responses stay fast and free of errors and halved when it
+    answers with 429 or 503 or times out, always within the bounds.
+    The urls of a host that has reached its limit are put aside until
+    one of its requests is released, the other hosts are not held up.
+    '''
+
+    def __init__(
+            self,
+            initial: int,
+            minimum: int,
+            maximum: int,
+            requests_per_second: int = 0,
+            max_tries: int = 1,
+            max_time: float = 0.0,
+            failure_threshold: int = 0,
+            cooldown: float = 0.0,
+            retrybudget: Optional[RetryBudget] = None) -> None:
+        super().__init__(
+            requests_per_second, max_tries, max_time,
+            failure_threshold, cooldown, retrybudget)
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def delay(self, url: str) -> float:
+        state = self._state(url_host(url))
+        if not self._is_open(state) and state.in_flight >= state.allowed:
+            return math.inf
+        return super().delay(url)
+
+    async def acquire(self, url: str) -> float:
+        acquired = await super().acquire(url)
+        self._state(url_host(url)).in_flight += 1
+        return acquired
+
+    def release(
+            self,
+            url: str,
+            resp: UrlFetchResponse,
+            acquired: float) -> None:
+        super().release(url, resp, acquired)
+        state = self._state(url_host(url))
+        state.in_flight -= 1
+        if is_throttled(resp):
+            # the requests that were sent before the last back off do
+            # not make the host back off once more
+            if acquired >= state.backed_off:
+                self._back_off(state)
+        elif 0 < resp.status < 500:
+            self._grow(state, resp.elapsed)
+
+    def _back_off(self, state: _HostState) -> None:
+        state.limit = max(self.minimum, state.limit / 2)
+        state.slow_start = False
+        state.backed_off = time.monotonic()
+        state.stats.backoffs += 1
+        state.stats.limit = state.limit
+
+    def _grow(self, state: _HostState, latency: float) -> None:
+        if state.min_latency is None or latency < state.min_latency:
+            state.min_latency = latency
+        if latency > LATENCY_TOLERANCE * max(state.min_latency, 1.0):
+            return
+        # with one more request per round trip of all of the requests
+        step = 1.0 if state.slow_start else 1.0 / state.allowed
+        state.limit = min(self.maximum, state.limit + step)
+        state.stats.limit = state.limit
+        state.stats.peak_limit = max(state.stats.peak_limit, state.limit)
@@ -9,7 +9,25 @@ from deadseeker.common import (
     DEFAULT_WEB_AGENT,
     DEFAULT_MAX_DEPTH,
     DEFAULT_CONNECT_LIMIT_PER_HOST,
-    DEFAULT_TIMEOUT
+    DEFAULT_MIN_CONNECT_LIMIT_PER_HOST,
+    DEFAULT_MAX_CONNECT_LIMIT_PER_HOST,
+    DEFAULT_CIRCUIT_BREAKER_THRESHOLD,
+    DEFAULT_CIRCUIT_BREAKER_COOLDOWN,
+    DEFAULT_TIMEOUT,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_MAX_FRONTIER_SIZE,
+    DEFAULT_FRONTIER_MEMORY_SIZE,
+    DEFAULT_VISITED_INDEX,
+    DEFAULT_VISITED_BLOOM_CAPACITY,
+    DEFAULT_CANONICALIZE_URLS,
+    DEFAULT_MAX_REFERRERS,
+    DEFAULT_OFFSITE_CACHE_TTL,
+    DEFAULT_PARSE_WORKERS,
+    DEFAULT_PARSE_PROCESS_THRESHOLD,
+    DEFAULT_LINK_CACHE_SIZE,
+    DEFAULT_HTML_PARSER,
+    HTML_PARSERS,
+    VISITED_INDEXES
 )
 
 
@@ -46,9 +64,123 @@ class InputValidator:
         return self._numeric(
             'INPUT_CONNECT_LIMIT_PER_HOST', DEFAULT_CONNECT_LIMIT_PER_HOST)
 
+    def get_adaptive_connect_limit(self) -> bool:
+        return self._get_boolean(
+            self.inputs.get('INPUT_ADAPTIVE_CONNECT_LIMIT'))
+
+    def get_min_connect_limit_per_host(self) -> int:
+        return self._numeric(
+            'INPUT_MIN_CONNECT_LIMIT_PER_HOST',
+            DEFAULT_MIN_CONNECT_LIMIT_PER_HOST)
+
+    def get_max_connect_limit_per_host(self) -> int:
+        return self._numeric(
+            'INPUT_MAX_CONNECT_LIMIT_PER_HOST',
+            DEFAULT_MAX_CONNECT_LIMIT_PER_HOST)
+
+    def get_requests_per_second_per_host(self) -> int:
+        return self._numeric('INPUT_REQUESTS_PER_SECOND_PER_HOST', 0)
+
+    def get_retry_budget(self) -> int:
+        return self._numeric('INPUT_RETRY_BUDGET', -1)
+
+    def get_retry_budget_percent(self) -> int:
+        return self._numeric('INPUT_RETRY_BUDGET_PERCENT', 0)
+
+    def get_circuit_breaker_threshold(self) -> int:
+        return self._numeric(
+            'INPUT_CIRCUIT_BREAKER_THRESHOLD',
+            DEFAULT_CIRCUIT_BREAKER_THRESHOLD)
+
+    def get_circuit_breaker_cooldown(self) -> int:
+        return self._numeric(
+            'INPUT_CIRCUIT_BREAKER_COOLDOWN',
+            DEFAULT_CIRCUIT_BREAKER_COOLDOWN)
+
     def get_timeout(self) -> int:
         return self._numeric('INPUT_TIMEOUT', DEFAULT_TIMEOUT)
 
+    def get_deadline(self) -> int:
+        return self._numeric('INPUT_DEADLINE', 0)
+
+    def get_max_failures(self) -> int:
+        return self._numeric('INPUT_MAX_FAILURES', 0)
+
+    def get_max_concurrent_requests(self) -> int:
+        return self._numeric(
+            'INPUT_MAX_CONCURRENT_REQUESTS', DEFAULT_MAX_CONCURRENT_REQUESTS)
+
+    def get_max_frontier_size(self) -> int:
+        return self._numeric(
+            'INPUT_MAX_FRONTIER_SIZE', DEFAULT_MAX_FRONTIER_SIZE)
+
+    def get_frontier_memory_size(self) -> int:
+        return self._numeric(
+            'INPUT_FRONTIER_MEMORY_SIZE', DEFAULT_FRONTIER_MEMORY_SIZE)
+
+    def get_frontier_spill_dir(self) -> Optional[str]:
+        return self.inputs.get('INPUT_FRONTIER_SPILL_DIR') or None
+
+    def get_visited_index(self) -> str:
+        valueStr = self.inputs.get('INPUT_VISITED_INDEX')
+        if valueStr:
+            index = valueStr.strip().lower()
+            assert index in VISITED_INDEXES, \
+                "'INPUT_VISITED_INDEX' environment variable" +\
+                f" expected to be one of: {', '.join(VISITED_INDEXES)}"
+            return index
+        return DEFAULT_VISITED_INDEX
+
+    def get_visited_bloom_capacity(self) -> int:
+        return self._numeric(
+            'INPUT_VISITED_BLOOM_CAPACITY', DEFAULT_VISITED_BLOOM_CAPACITY)
+
+    def get_canonicalize_urls(self) -> bool:
+        valueStr = self.inputs.get('INPUT_CANONICALIZE_URLS')
+        if valueStr:
+            return self._get_boolean(valueStr)
+        return DEFAULT_CANONICALIZE_URLS
+
+    def get_sort_query_params(self) -> bool:
+        return self._get_boolean(self.inputs.get('INPUT_SORT_QUERY_PARAMS'))
+
+    def get_drop_query_params(self) -> List[str]:
+        return self._splitAndTrim('INPUT_DROP_QUERY_PARAMS')
+
+    def get_max_referrers(self) -> int:
+        return self._numeric('INPUT_MAX_REFERRERS', DEFAULT_MAX_REFERRERS)
+
+    def get_cache_dir(self) -> Optional[str]:
+        return self.inputs.get('INPUT_CACHE_DIR') or None
+
+    def get_checkpoint_file(self) -> Optional[str]:
+        return self.inputs.get('INPUT_CHECKPOINT_FILE') or None
+
+    def get_offsite_cache_ttl(self) -> int:
+        return self._numeric(
+            'INPUT_OFFSITE_CACHE_TTL', DEFAULT_OFFSITE_CACHE_TTL)
+
+    def get_parse_workers(self) -> int:
+        return self._numeric('INPUT_PARSE_WORKERS', DEFAULT_PARSE_WORKERS)
+
+    def get_parse_process_threshold(self) -> int:
+        return self._numeric(
+            'INPUT_PARSE_PROCESS_THRESHOLD', DEFAULT_PARSE_PROCESS_THRESHOLD)
+
+    def get_html_parser(self) -> str:
+        valueStr = self.inputs.get('INPUT_HTML_PARSER')
+        if valueStr:
+            html_parser = valueStr.strip().lower()
+            assert html_parser in HTML_PARSERS, \
+                "'INPUT_HTML_PARSER' environment variable" +\
+                f" expected to be one of: {', '.join(HTML_PARSERS)}"
+            return html_parser
+        return DEFAULT_HTML_PARSER
+
+    def get_link_cache_size(self) -> int:
+        return self._numeric(
+            'INPUT_LINK_CACHE_SIZE', DEFAULT_LINK_CACHE_SIZE)
+
     def get_verbosity(self) -> Union[bool, int]:
         verboseStr = self.inputs.get('INPUT_VERBOSE')
         if (verboseStr):
@@ -65,6 +197,15 @@ class InputValidator:
     def get_alwaysgetonsite(self) -> bool:
         return self._get_boolean(self.inputs.get('INPUT_ALWAYS_GET_ONSITE'))
 
+    def get_resume(self) -> bool:
+        return self._get_boolean(self.inputs.get('INPUT_RESUME'))
+
+    def get_stream_html(self) -> bool:
+        return self._get_boolean(self.inputs.get('INPUT_STREAM_HTML'))
+
+    def get_use_uvloop(self) -> bool:
+        return self._get_boolean(self.inputs.get('INPUT_USE_UVLOOP'))
+
     def get_resolvebeforefilter(self) -> bool:
         return self._get_boolean(
             self.inputs.get('INPUT_RESOLVE_BEFORE_FILTERING'))
@@ -93,6 +234,18 @@ class InputValidator:
     def get_excludecontained(self) -> List[str]:
         return self._splitAndTrim('INPUT_EXCLUDE_URL_CONTAINED')
 
+    def get_includeregex(self) -> List[str]:
+        return self._regexes('INPUT_INCLUDE_URL_REGEX')
+
+    def get_excluderegex(self) -> List[str]:
+        return self._regexes('INPUT_EXCLUDE_URL_REGEX')
+
+    def get_includeglob(self) -> List[str]:
+        return self._splitAndTrim('INPUT_INCLUDE_URL_GLOB')
+
+    def get_excludeglob(self) -> List[str]:
+        return self._splitAndTrim('INPUT_EXCLUDE_URL_GLOB')
+
     def get_webagent(self) -> str:
         valueStr = self.inputs.get('INPUT_WEB_AGENT_STRING')
         if valueStr:
@@ -112,3 +265,21 @@ class InputValidator:
     def _splitAndTrim(self, name: str) -> List[str]:
         valueStr = self.inputs.get(name)
         return [] if not valueStr else [x.strip() for x in valueStr.split(',')]
+
+    def _regexes(self, name: str) -> List[str]:
+        # one per line, as regular expressions may contain commas
+        valueStr = self.inputs.get(name)
+        regexes = [] if not valueStr else \
+            [x.strip() for x in valueStr.splitlines() if x.strip()]
+        for regex in regexes:
+            assert self._compiles(regex), \
+                f"'{name}' environment variable" +\
+                f" expected to contain valid regular expression: {regex}"
+        return regexes
+
+    def _compiles(self, regex: str) -> bool:
+        try:
+            re.compile(regex)
+            return True
+        except re.error:
+            return False
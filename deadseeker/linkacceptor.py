@@ -1,8 +1,26 @@
-from typing import List, TypeVar, Generic
+from typing import Any, Dict, Iterable, List, Tuple, TypeVar, Generic
 from abc import abstractmethod, ABC
+from fnmatch import translate
+from functools import lru_cache
+import itertools
+import re
+import sys
 from .common import SeekerConfig
 
 T = TypeVar('T')  # pragma: no mutate
+# flags at the start of a regular expression, which apply to all of it
+_GLOBAL_FLAGS = re.compile(r'\(\?([aiLmsux]+)\)')
+# a character that matches itself, maybe escaped, in a regular expression
+_REGEX_LITERAL = re.compile(r'[^.^$*+?{}\[\]\\|()]|\\[^\w]')
+_QUANTIFIERS = ('*', '+', '?', '{')
+# the parts of a glob, the brackets are closed as fnmatch finds them, the
+# exclamation mark after a bracket is always taken as the negation
+_GLOB_TOKEN = re.compile(r'\*+|\[(?:!|(?!!)).[^\]]*\]|.', re.DOTALL)
+# an escaped character, which refers to a group by number if it is a digit,
+# or the condition on a group given by number
+_REGEX_ESCAPE = re.compile(r'\\(.)|\(\?\((\d)', re.DOTALL)
+# numbers the groups that emulate atomic groups before python 3.11
+_atomic_names = itertools.count()
 
 
 class LinkAcceptor(ABC):
@@ -19,14 +37,22 @@ class LinkAcceptorFactory(ABC):
 
 class DefaultLinkAcceptorFactory(LinkAcceptorFactory):
     def get_link_acceptor(self, config: SeekerConfig) -> LinkAcceptor:
-        return LinkAcceptorBuilder()\
+        acceptor = LinkAcceptorBuilder()\
             .addIncludePrefix(*config.includeprefix)\
             .addExcludePrefix(*config.excludeprefix)\
             .addIncludeSuffix(*config.includesuffix)\
             .addExcludeSuffix(*config.excludesuffix)\
             .addIncludeContained(*config.includecontained)\
             .addExcludeContained(*config.excludecontained)\
+            .addIncludeRegex(*config.includeregex)\
+            .addExcludeRegex(*config.excluderegex)\
+            .addIncludeGlob(*config.includeglob)\
+            .addExcludeGlob(*config.excludeglob)\
             .build()
+        if config.link_cache_size > 0 and \
+                not isinstance(acceptor, AcceptAllLinkAcceptor):
+            return CachingLinkAcceptor(acceptor, config.link_cache_size)
+        return acceptor
 
 
 class AbstractLinkAcceptor(LinkAcceptor, Generic[T]):
@@ -68,11 +94,53 @@ class IncludeContainedLinkAcceptor(AbstractLinkAcceptor[str]):
         return any(s in link for s in self.values)
 
 
+class IncludeRegexLinkAcceptor(AbstractLinkAcceptor[str]):
+    def __init__(self, values: List[str]) -> None:
+        super().__init__(values)
+        self.patterns = [re.compile(value) for value in values]
+
+    def accepts(self, link: str) -> bool:
+        return any(p.search(link) for p in self.patterns)
+
+
+class IncludeGlobLinkAcceptor(AbstractLinkAcceptor[str]):
+    def __init__(self, values: List[str]) -> None:
+        super().__init__(values)
+        self.patterns = [re.compile(translate(value)) for value in values]
+
+    def accepts(self, link: str) -> bool:
+        return any(p.match(link) for p in self.patterns)
+
+
 class AcceptAllLinkAcceptor(LinkAcceptor):
     def accepts(self, link: str) -> bool:
         return True
 
 
+class CachingLinkAcceptor(LinkAcceptor):
+    '''
+    Remembers the verdicts of the source for the size most recently
+    checked links, the navigation links show up on every page.
+    '''
+
+    def __init__(self, source: LinkAcceptor, size: int) -> None:
+        self.source = source
+        self.size = size
+        self._accepts = lru_cache(maxsize=size)(source.accepts)
+
+    def accepts(self, link: str) -> bool:
+        return self._accepts(link)
+
+    def cache_info(self) -> Tuple[int, int]:
+        '''The number of cache hits and misses'''
+        info = self._accepts.cache_info()
+        return info.hits, info.misses
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # the cache itself cannot be pickled, the copy starts empty
+        return CachingLinkAcceptor, (self.source, self.size)
+
+
 class LinkAcceptorBuilder:
     def __init__(self) -> None:
         self.acceptors: List[LinkAcceptor] = []
@@ -110,7 +178,203 @@ class LinkAcceptorBuilder:
                 IncludeContainedLinkAcceptor(list(args))))
         return self
 
+    def addIncludeRegex(self, *args: str) -> 'LinkAcceptorBuilder':
+        if args:
+            self.acceptors.append(IncludeRegexLinkAcceptor(list(args)))
+        return self
+
+    def addExcludeRegex(self, *args: str) -> 'LinkAcceptorBuilder':
+        if args:
+            self.acceptors.append(NotLinkAcceptor(
+                IncludeRegexLinkAcceptor(list(args))))
+        return self
+
+    def addIncludeGlob(self, *args: str) -> 'LinkAcceptorBuilder':
+        if args:
+            self.acceptors.append(IncludeGlobLinkAcceptor(list(args)))
+        return self
+
+    def addExcludeGlob(self, *args: str) -> 'LinkAcceptorBuilder':
+        if args:
+            self.acceptors.append(NotLinkAcceptor(
+                IncludeGlobLinkAcceptor(list(args))))
+        return self
+
     def build(self) -> LinkAcceptor:
-        if self.acceptors:
+        if not self.acceptors:
+            return AcceptAllLinkAcceptor()
+        try:
+            return CompiledLinkAcceptor(self.acceptors)
+        except re.error:
+            # regular expressions that cannot be combined into one, like
+            # with the same group names or with groups referred to by
+            # number, which are numbered differently once combined
             return CompositeLinkAcceptor(self.acceptors)
-        return AcceptAllLinkAcceptor()
+
+
+def trie_pattern(values: List[str], at_end: bool = False) -> str:
+    '''
+    A regular expression that matches any of the values, where the values
+    that share a beginning share the branch of the pattern, so that every
+    character of a link is compared once and not once per value. With
+    at_end, the match has to end at the end of the link.
+    '''
+    return _trie_pattern(
+        ([re.escape(char) for char in value] for value in values), at_end)
+
+
+def glob_pattern(globs: List[str]) -> str:
+    '''
+    A regular expression that matches the links that match any of the
+    globs as a whole, like fnmatchcase does, sharing the branches of the
+    globs that have the same beginning like trie_pattern. In a glob with
+    more than one star, the first star and the text up to the next one
+    match atomically, at the first place the text is found, and the rest
+    is translated by fnmatch, which keeps the stars from trying every way
+    to split the link between them. Globs that are the same up to their
+    second star still share the branch.
+    '''
+    return _trie_pattern(map(_glob_parts, globs), at_end=True)
+
+
+def _glob_parts(glob: str) -> List[str]:
+    tokens = _GLOB_TOKEN.findall(glob)
+    stars = [index for index, token in enumerate(tokens) if token[0] == '*']
+    if len(stars) < 2:
+        return [_glob_token(token) for token in tokens]
+    parts = [_glob_token(token) for token in tokens[:stars[0]]]
+    parts.append(_atomic('.*?' + ''.join(
+        _glob_token(token) for token in tokens[stars[0] + 1:stars[1]])))
+    parts.append(translate(''.join(tokens[stars[1]:]))[4:-3])
+    return parts
+
+
+def _glob_token(token: str) -> str:
+    if token[0] == '*':
+        return '.*'
+    if token == '?':
+        return '.'
+    if token[0] == '[' and len(token) > 1:
+        return translate(token)[4:-3]
+    return re.escape(token)
+
+
+def _atomic(regex: str) -> str:
+    '''
+    The regex in a group that is not backtracked into once it matched,
+    emulated like fnmatch does where atomic groups are not supported
+    '''
+    if sys.version_info >= (3, 11):
+        return f'(?>{regex})'
+    name = f'a{next(_atomic_names)}'
+    return f'(?=(?P<{name}>{regex}))(?P={name})'
+
+
+def _trie_pattern(values: Iterable[List[str]], at_end: bool) -> str:
+    '''trie_pattern of values that are split into parts of a pattern'''
+    trie: Dict[str, Dict] = {}
+    for value in values:
+        node = trie
+        for part in value:
+            node = node.setdefault(part, {})
+        # marks the end of a value
+        node[''] = {}
+    return _node_pattern(trie, at_end)
+
+
+def regex_pattern(regexes: List[str]) -> str:
+    '''
+    A regular expression that matches where any of the regexes matches,
+    the literal beginnings of the regexes share branches like trie_pattern
+    '''
+    for regex in regexes:
+        if any(
+                digit or escaped in '123456789'
+                for escaped, digit in _REGEX_ESCAPE.findall(regex)):
+            raise re.error(f'{regex} refers to a group by number')
+    return _trie_pattern(map(_regex_parts, regexes), at_end=False)
+
+
+def _regex_parts(regex: str) -> List[str]:
+    if '|' in regex or _GLOBAL_FLAGS.match(regex):
+        # the beginning is not the same for all of its matches
+        return [_scoped(regex)]
+    parts: List[str] = []
+    pos = 0
+    if regex.startswith('^'):
+        parts.append('^')
+        pos = 1
+    while True:
+        match = _REGEX_LITERAL.match(regex, pos)
+        # a quantified character belongs to the rest
+        if not match or regex[match.end():match.end() + 1] in _QUANTIFIERS:
+            break
+        parts.append(match.group())
+        pos = match.end()
+    if pos < len(regex):
+        parts.append(_scoped(regex[pos:]))
+    return parts
+
+
+def _scoped(regex: str) -> str:
+    '''
+    The regex in a group with its own flags, the flags at its start
+    would apply to the whole pattern it is combined into otherwise
+    '''
+    flags = ''
+    match = _GLOBAL_FLAGS.match(regex)
+    if match:
+        flags, regex = match.group(1), regex[match.end():]
+    if 's' not in flags:
+        # the combined pattern matches newlines with the dot
+        flags += '-s'
+    return f'(?{flags}:{regex})'
+
+
+def _node_pattern(node: Dict[str, Dict], at_end: bool) -> str:
+    if '' in node and not at_end:
+        # a value ends here, that matches whatever comes after
+        return ''
+    branches = [
+        part + _node_pattern(child, at_end)
+        for part, child in sorted(node.items()) if part]
+    if '' in node:
+        branches.append(r'\Z')
+    if len(branches) == 1:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')'
+
+
+class CompiledLinkAcceptor(CompositeLinkAcceptor):
+    '''
+    Accepts the same links as CompositeLinkAcceptor with a single regular
+    expression, which has one lookahead per acceptor, so that a link is
+    checked against all of the values in one call.
+    '''
+
+    def __init__(self, acceptors: List[LinkAcceptor]) -> None:
+        super().__init__(acceptors)
+        self.pattern = re.compile(
+            ''.join(self._lookahead(acceptor) for acceptor in acceptors),
+            re.DOTALL)
+
+    def _lookahead(self, acceptor: LinkAcceptor) -> str:
+        if isinstance(acceptor, NotLinkAcceptor):
+            return '(?!' + self._pattern(acceptor.source) + ')'
+        return '(?=' + self._pattern(acceptor) + ')'
+
+    def _pattern(self, acceptor: LinkAcceptor) -> str:
+        if isinstance(acceptor, IncludePrefixLinkAcceptor):
+            return trie_pattern(list(acceptor.values))
+        if isinstance(acceptor, IncludeSuffixLinkAcceptor):
+            return '.*' + trie_pattern(list(acceptor.values), at_end=True)
+        if isinstance(acceptor, IncludeContainedLinkAcceptor):
+            return '.*?' + trie_pattern(list(acceptor.values))
+        if isinstance(acceptor, IncludeRegexLinkAcceptor):
+            return '.*?' + regex_pattern(list(acceptor.values))
+        if isinstance(acceptor, IncludeGlobLinkAcceptor):
+            return glob_pattern(list(acceptor.values))
+        raise ValueError(f'Cannot compile {type(acceptor).__name__}')
+
+    def accepts(self, link: str) -> bool:
+        return self.pattern.match(link) is not None
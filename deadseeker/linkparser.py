@@ -1,19 +1,89 @@
-from .linkacceptor import LinkAcceptor
+from .linkacceptor import CachingLinkAcceptor, LinkAcceptor
+from html import unescape
 from html.parser import HTMLParser
 from urllib.parse import urljoin
-from typing import List, Tuple, Optional
+from typing import (
+    Any, Callable, Dict, Iterable, Iterator, List, Tuple, Optional, Set
+)
+from functools import lru_cache
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
 import logging
-from .common import SeekerConfig, UrlFetchResponse
+import multiprocessing
+import re
+import sys
+from .common import (
+    HTML_PARSER_LXML,
+    HTML_PARSER_SCAN,
+    SeekerConfig,
+    SeekResults,
+    UrlTarget,
+    UrlFetchResponse
+)
 from abc import abstractmethod, ABC
 
+try:
+    from lxml import etree  # type: ignore
+except ImportError:  # pragma: no cover
+    etree = None
+
 logger = logging.getLogger(__name__)
 
 
+class LinkStream(ABC):
+    '''Extracts the links of a page from its html as it arrives'''
+
+    @abstractmethod  # pragma: no mutate
+    def feed(self, data: str) -> None:
+        pass
+
+    @abstractmethod  # pragma: no mutate
+    def close(self) -> List[str]:
+        '''Returns all the links, once the html is complete'''
+        pass
+
+
 class LinkParser(ABC):
     @abstractmethod  # pragma: no mutate
     def parse(self, resp: UrlFetchResponse) -> List[str]:
         pass
 
+    def stream(self, resp: UrlFetchResponse) -> LinkStream:
+        return BufferedLinkStream(self, resp)
+
+    async def parse_async(self, resp: UrlFetchResponse) -> List[str]:
+        '''Same as parse, parsers that can should not block the loop'''
+        return self.parse(resp)
+
+    def add_statistics(self, results: SeekResults) -> None:
+        pass
+
+    def close(self, wait: bool = True) -> None:
+        '''
+        Without wait, the parses that are still queued are dropped, like
+        when the crawl was cancelled or stopped early
+        '''
+        pass
+
+
+# For parsers that need the whole html at once
+class BufferedLinkStream(LinkStream):
+    def __init__(self, linkparser: LinkParser, resp: UrlFetchResponse) -> None:
+        self.linkparser = linkparser
+        self.resp = resp
+        self.chunks: List[str] = []
+
+    def feed(self, data: str) -> None:
+        self.chunks.append(data)
+
+    def close(self) -> List[str]:
+        self.resp.html = ''.join(self.chunks)
+        self.chunks.clear()
+        try:
+            return self.linkparser.parse(self.resp)
+        finally:
+            self.resp.html = None
+
 
 class LinkParserFactory(ABC):
     @abstractmethod  # pragma: no mutate
@@ -31,53 +101,437 @@ class DefaultLinkParser(LinkParser):
             linkacceptor: LinkAcceptor) -> None:
         self.config = config
         self.linkacceptor = linkacceptor
+        self.urljoin: Callable[[str, str], str] = urljoin
+        if config.link_cache_size > 0:
+            # the links are resolved against the url of their page, which
+            # only gives hits for the links repeated on a page
+            self.urljoin = lru_cache(maxsize=config.link_cache_size)(urljoin)
 
     def parse(self, resp: UrlFetchResponse) -> List[str]:
-        parser = LinkHtmlParser(resp, self.config, self.linkacceptor)
+        parser = LinkHtmlParser(
+            resp, self.config, self.linkacceptor, self.urljoin)
         parser.parse()
         return parser.links
 
+    def stream(self, resp: UrlFetchResponse) -> LinkStream:
+        return HtmlLinkStream(LinkHtmlParser(
+            resp, self.config, self.linkacceptor, self.urljoin))
+
+    def add_statistics(self, results: SeekResults) -> None:
+        if isinstance(self.linkacceptor, CachingLinkAcceptor):
+            results.accept_cache_hits, results.accept_cache_misses = \
+                self.linkacceptor.cache_info()
+        cache_info = getattr(self.urljoin, 'cache_info', None)
+        if cache_info:
+            info = cache_info()
+            results.urljoin_cache_hits = info.hits
+            results.urljoin_cache_misses = info.misses
+
+
+class HtmlLinkStream(LinkStream):
+    def __init__(self, parser: 'LinkHtmlParser') -> None:
+        self.parser = parser
+
+    def feed(self, data: str) -> None:
+        self.parser.feed(data)
+
+    def close(self) -> List[str]:
+        self.parser.close()
+        return self.parser.links
+
 
 class DefaultLinkParserFactory(LinkParserFactory):
     def get_link_parser(
             self,
             config: SeekerConfig,
             linkacceptor: LinkAcceptor) -> LinkParser:
-        return DefaultLinkParser(config, linkacceptor)
+        if config.parse_workers > 0:
+            return PooledLinkParser(
+                config,
+                linkacceptor,
+                config.parse_workers,
+                config.parse_process_threshold)
+        return new_link_parser(config, linkacceptor)
 
 
-class LinkHtmlParser(HTMLParser):
+def new_link_parser(
+        config: SeekerConfig,
+        linkacceptor: LinkAcceptor) -> DefaultLinkParser:
+    '''Returns the parser of the configured html_parser backend'''
+    if config.html_parser == HTML_PARSER_LXML:
+        if etree is not None:
+            return LxmlLinkParser(config, linkacceptor)
+        logger.warning('lxml is not installed, using html.parser instead')
+    if config.html_parser == HTML_PARSER_SCAN:
+        return ScanLinkParser(config, linkacceptor)
+    return DefaultLinkParser(config, linkacceptor)
+
+
+# the parser of a worker process, set up once when the process starts
+_process_parser: Optional[DefaultLinkParser] = None
+
+
+def _init_parse_process(
+        search_attrs: Set[str],
+        resolvebeforefilter: bool,
+        html_parser: str,
+        link_cache_size: int,
+        linkacceptor: LinkAcceptor) -> None:
+    global _process_parser
+    config = SeekerConfig()
+    config.search_attrs = search_attrs
+    config.resolvebeforefilter = resolvebeforefilter
+    config.html_parser = html_parser
+    config.link_cache_size = link_cache_size
+    _process_parser = new_link_parser(config, linkacceptor)
+
+
+def _parse_in_process(url: str, html: str) -> List[str]:
+    assert _process_parser, 'The parse process was not initialized'
+    resp = UrlFetchResponse(UrlTarget(url, url, 0))
+    resp.html = html
+    return _process_parser.parse(resp)
+
+
+class PooledLinkParser(DefaultLinkParser):
+    '''
+    Parses the html off the event loop, so that a large page does not
+    hold up the other responses. Pages from process_threshold characters
+    on are parsed in worker processes, which run on all the cores, the
+    smaller ones in threads, for which shipping them would cost more.
+
+    Only the url and the html of a page are sent to a worker process,
+    the parser settings and the acceptor are sent once when it starts.
+    '''
+
+    def __init__(
+            self,
+            config: SeekerConfig,
+            linkacceptor: LinkAcceptor,
+            workers: int,
+            process_threshold: int) -> None:
+        super().__init__(config, linkacceptor)
+        self.linkparser = new_link_parser(config, linkacceptor)
+        self.workers = max(1, workers)
+        self.process_threshold = process_threshold
+        # both pools are only started once there is a page for them
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+
+    def parse(self, resp: UrlFetchResponse) -> List[str]:
+        return self.linkparser.parse(resp)
+
+    def stream(self, resp: UrlFetchResponse) -> LinkStream:
+        return self.linkparser.stream(resp)
+
+    def add_statistics(self, results: SeekResults) -> None:
+        # only the lookups of this process, those of the worker
+        # processes are not known
+        self.linkparser.add_statistics(results)
+
+    async def parse_async(self, resp: UrlFetchResponse) -> List[str]:
+        if not resp.html:
+            return []
+        loop = asyncio.get_running_loop()
+        if len(resp.html) >= self.process_threshold:
+            return await loop.run_in_executor(
+                self._process_pool(),
+                _parse_in_process,
+                resp.urltarget.url,
+                resp.html)
+        return await loop.run_in_executor(
+            self._thread_pool(), self.parse, resp)
+
+    def _thread_pool(self) -> Executor:
+        if not self._threads:
+            self._threads = ThreadPoolExecutor(
+                self.workers, thread_name_prefix='deadseeker-parse')
+        return self._threads
+
+    def _process_pool(self) -> Executor:
+        if not self._processes:
+            # forking a process that runs an event loop and threads is
+            # not safe, the workers are started from scratch instead
+            self._processes = ProcessPoolExecutor(
+                self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_parse_process,
+                initargs=(
+                    self.config.search_attrs,
+                    self.config.resolvebeforefilter,
+                    self.config.html_parser,
+                    self.config.link_cache_size,
+                    self.linkacceptor))
+        return self._processes
+
+    def close(self, wait: bool = True) -> None:
+        for executor in (self._threads, self._processes):
+            if not executor:
+                continue
+            if wait:
+                executor.shutdown()
+            elif sys.version_info >= (3, 9):
+                # neither waits for the queued parses nor for the worker
+                # processes that are still starting
+                executor.shutdown(wait=False, cancel_futures=True)
+            else:  # pragma: no cover
+                executor.shutdown(wait=False)
+        self._threads = None
+        self._processes = None
+
+
+class LinkCollector:
+    '''Keeps the accepted links found in the attributes of the tags'''
+
     def __init__(
             self,
             resp: UrlFetchResponse,
             config: SeekerConfig,
-            linkacceptor: LinkAcceptor):
+            linkacceptor: LinkAcceptor,
+            resolve: Callable[[str, str], str] = urljoin):
         self.resp = resp
         self.config = config
         self.linkacceptor = linkacceptor
+        self.resolve = resolve
         self.links: List[str] = list()
-        super().__init__()
 
-    def reset(self) -> None:
-        super().reset()
-        self.links.clear()
-
-    def handle_starttag(
-            self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
-        '''Override parent method and check tag for our attributes'''
+    def handle_attrs(
+            self, attrs: Iterable[Tuple[str, Optional[str]]]) -> None:
         for attr in attrs:
             # ('href', 'http://google.com')
             if attr[0] in self.config.search_attrs:
                 url = attr[1]
                 if url:
                     if self.config.resolvebeforefilter:
-                        url = urljoin(self.resp.urltarget.url, url)
+                        url = self.resolve(self.resp.urltarget.url, url)
                     if self.linkacceptor.accepts(url):
                         logger.debug(f'Accepting url: {url}')
                         self.links.append(url)
                     else:
                         logger.debug(f'Skipping url: {url}')
 
+
+class LinkHtmlParser(HTMLParser, LinkCollector):
+    def __init__(
+            self,
+            resp: UrlFetchResponse,
+            config: SeekerConfig,
+            linkacceptor: LinkAcceptor,
+            resolve: Callable[[str, str], str] = urljoin):
+        LinkCollector.__init__(self, resp, config, linkacceptor, resolve)
+        HTMLParser.__init__(self)
+
+    def reset(self) -> None:
+        super().reset()
+        self.links.clear()
+
+    def handle_starttag(
+            self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        '''Override parent method and check tag for our attributes'''
+        self.handle_attrs(attrs)
+
     def parse(self) -> None:
         if self.resp.html:
             super().feed(self.resp.html)
+
+
+class LxmlLinkParser(DefaultLinkParser):
+    '''
+    Finds the same links as DefaultLinkParser with the C parser of lxml,
+    which calls back for every start tag without building a tree
+    '''
+
+    def parse(self, resp: UrlFetchResponse) -> List[str]:
+        stream = self.stream(resp)
+        if resp.html:
+            stream.feed(resp.html)
+        return stream.close()
+
+    def stream(self, resp: UrlFetchResponse) -> LinkStream:
+        return LxmlLinkStream(
+            LxmlLinkTarget(
+                resp, self.config, self.linkacceptor, self.urljoin))
+
+
+class LxmlLinkTarget(LinkCollector):
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        self.handle_attrs(attrib.items())
+
+    def close(self) -> List[str]:
+        return self.links
+
+
+class LxmlLinkStream(LinkStream):
+    def __init__(self, target: LxmlLinkTarget) -> None:
+        self.target = target
+        # huge_tree lifts the limits of libxml2 on very large pages
+        self.parser: Any = etree.HTMLParser(target=target, huge_tree=True)
+        self.empty = True
+
+    def feed(self, data: str) -> None:
+        if data:
+            self.empty = False
+            self.parser.feed(data)
+
+    def close(self) -> List[str]:
+        if self.empty:
+            # lxml fails on a document without any content
+            return self.target.close()
+        return self.parser.close()
+
+
+# The markup that ScanLinkParser has to tell apart. A match skips the text
+# and the tags that have none of the names (the {names} placeholder) in
+# their attributes, and it stops at the next comment, declaration, element
+# with text content, or tag that may have a link (the group).
+_SCAN = r'''
+    (?:[^<]+
+      | <(?![a-zA-Z!?/])
+      | </[^>]*(?:>|\Z)                     # end tag
+      | <(?!(?i:script|style)[\t\n\r\f />\x00])
+        [a-zA-Z][^\t\n\r\f />\x00]*(?![^\t\n\r\f />\x00])
+        (?:(?!{names})[^>=]|=\s*"[^"]*"|=\s*'[^']*'|=(?!\s*["']))*>
+    )*
+    (?:<!--.*?(?:--\s*>|\Z)                 # comment, the rest if unclosed
+      | <!\[.*?(?:\]\s*\]\s*>|\Z)           # marked section, like CDATA
+      | <[!?][^>]*(?:>|\Z)                  # declaration, processing instruction
+      | (<)                                 # start tag
+      | \Z
+    )
+'''
+# The start tags are decoded with the regular expressions of html.parser
+# (locatestarttagend_tolerant, tagfind_tolerant and attrfind_tolerant)
+_START_TAG_END = re.compile(r'''
+  <[a-zA-Z][^\t\n\r\f />\x00]*
+  (?:[\s/]*
+    (?:(?<=['"\s/])[^\s/>][^\s/=>]*
+      (?:\s*=+\s*
+        (?:'[^']*'
+          |"[^"]*"
+          |(?!['"])[^>\s]*
+         )
+        \s*
+       )?(?:\s|/(?!>))*
+     )*
+   )?
+  \s*
+''', re.VERBOSE)
+_TAG_NAME = re.compile(r'([a-zA-Z][^\t\n\r\f />\x00]*)(?:\s|/(?!>))*')
+_ATTRIBUTE = re.compile(
+    r'((?<=[\'"\s/])[^\s/>][^\s/=>]*)(\s*=+\s*'
+    r'(\'[^\']*\'|"[^"]*"|(?![\'"])[^>\s]*))?(?:\s|/(?!>))*')
+# characters after a start tag that html.parser takes for an unfinished one
+_UNFINISHED = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ=/')
+# elements whose content is text, up to their end tag
+_CDATA_ELEMENTS = ('script', 'style')
+
+Attributes = List[Tuple[str, Optional[str]]]
+
+
+class ScanLinkParser(DefaultLinkParser):
+    '''
+    Finds the same links as DefaultLinkParser without tokenizing the whole
+    page: the regular expression engine skips over the tags that have no
+    attribute of search_attrs, only the others are decoded.
+    '''
+
+    def __init__(
+            self,
+            config: SeekerConfig,
+            linkacceptor: LinkAcceptor) -> None:
+        super().__init__(config, linkacceptor)
+        self._scanners: Dict[Tuple[str, ...], 're.Pattern[str]'] = {}
+
+    def parse(self, resp: UrlFetchResponse) -> List[str]:
+        collector = LinkCollector(
+            resp, self.config, self.linkacceptor, self.urljoin)
+        if resp.html:
+            for attrs in self._tags(resp.html):
+                collector.handle_attrs(attrs)
+        return collector.links
+
+    def stream(self, resp: UrlFetchResponse) -> LinkStream:
+        return BufferedLinkStream(self, resp)
+
+    def _scanner(self) -> 're.Pattern[str]':
+        names = tuple(sorted(self.config.search_attrs))
+        scanner = self._scanners.get(names)
+        if scanner is None:
+            needle = '|'.join(re.escape(name) for name in names) or '(?!)'
+            scanner = re.compile(
+                _SCAN.replace('{names}', f'(?i:{needle})'),
+                re.VERBOSE | re.DOTALL)
+            self._scanners[names] = scanner
+        return scanner
+
+    def _tags(self, html: str) -> Iterator[Attributes]:
+        '''Yields the attributes of the tags that may have a link'''
+        scanner = self._scanner()
+        pos = 0
+        while pos < len(html):
+            match = scanner.match(html, pos)
+            assert match, 'The scanner always matches'  # pragma: no mutate
+            pos = match.end()
+            if not match.group(1):
+                continue
+            start = pos - 1
+            end = self._tag_end(html, start)
+            if end < 0:
+                # html.parser takes an unfinished tag and the rest for text
+                return
+            pos = end
+            if html[end - 1] != '>':
+                # neither a tag, html.parser takes it for text
+                continue
+            name, attrs, closed = self._start_tag(html, start, end)
+            if attrs is None:
+                continue
+            yield attrs
+            if not closed and name in _CDATA_ELEMENTS:
+                cdata_end = re.compile(rf'</\s*{name}\s*>', re.IGNORECASE)\
+                    .search(html, pos)
+                pos = cdata_end.end() if cdata_end else len(html)
+
+    def _tag_end(self, html: str, start: int) -> int:
+        '''Same as check_for_whole_start_tag of html.parser'''
+        end = _START_TAG_END.match(html, start).end()  # type: ignore
+        next = html[end:end + 1]
+        if next == '>':
+            return end + 1
+        if html.startswith('/>', end):
+            return end + 2
+        if not next or next in _UNFINISHED:
+            return -1
+        return max(end, start + 1)
+
+    def _start_tag(
+            self,
+            html: str,
+            start: int,
+            end: int) -> Tuple[str, Optional[Attributes], bool]:
+        '''
+        The name, the decoded attributes (None if the tag is taken for
+        text) and whether the tag closes itself, like parse_starttag
+        '''
+        match = _TAG_NAME.match(html, start + 1)
+        assert match, 'A start tag starts with its name'  # pragma: no mutate
+        name = match.group(1).lower()
+        pos = match.end()
+        attrs: Attributes = []
+        for match in _ATTRIBUTE.finditer(html, pos, end):
+            if match.start() != pos:
+                break
+            attrname, rest, value = match.group(1, 2, 3)
+            if not rest:
+                value = None
+            elif value[:1] == '\'' == value[-1:] or \
+                    value[:1] == '"' == value[-1:]:
+                value = value[1:-1]
+            if value and '&' in value:
+                value = unescape(value)
+            attrs.append((attrname.lower(), value))
+            pos = match.end()
+        rest = html[pos:end].strip()
+        if rest not in ('>', '/>'):
+            return name, None, False
+        return name, attrs, rest == '/>'
@@ -1,4 +1,5 @@
-from .common import UrlFetchResponse, UrlFetchResponseHandler
+from .checkpoint import RestoredError
+from .common import UrlFetchResponse, UrlFetchResponseHandler, SeekResults
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,7 +13,8 @@ class LoggingUrlFetchResponseHandler(UrlFetchResponseHandler):
         elapsedstr = f'{elapsed:.2f} ms'
         error = resp.error
         if error:
-            errortype = type(error).__name__
+            errortype = error.name if isinstance(error, RestoredError) \
+                else type(error).__name__
 
             navigation_path = " -> ".join(resp.urltarget.parent_urls())
             navigation_path_msg = ""
@@ -26,4 +28,16 @@ class LoggingUrlFetchResponseHandler(UrlFetchResponseHandler):
                     f'::error ::{errortype}: {str(error)} - {url}{navigation_path_msg}')
             logger.debug("The following exception occured", exc_info=error)
         else:
-            logger.info(f'{status} - {url} - {elapsedstr}')
+            cached = f' (cached, {resp.cached})' if resp.cached else ''
+            logger.info(f'{status} - {url} - {elapsedstr}{cached}')
+
+    def handle_results(self, results: SeekResults) -> None:
+        for resp in results.failures:
+            count = resp.referrer_count
+            if count > 1:
+                referrers = ", ".join(resp.referrers)
+                if count > len(resp.referrers):
+                    referrers += f' and {count - len(resp.referrers)} more'
+                logger.warning(
+                    f'::warn ::{resp.urltarget.url} is linked from'
+                    f' {count} pages: {referrers}')
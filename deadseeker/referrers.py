@@ -0,0 +1,62 @@
+from array import array
+from typing import TYPE_CHECKING, Dict, List, Tuple, Union
+from .common import DEFAULT_MAX_REFERRERS
+from .visited import url_hash
+
+if TYPE_CHECKING:  # pragma: no cover
+    _PageIds = array[int]
+else:
+    _PageIds = array
+
+
+class ReferrerIndex:
+    '''
+    Keeps for every url the pages that link to it, also after the url was
+    fetched, so that a broken link can be reported with all of its pages.
+
+    The pages are interned to integer ids and the urls are keyed by their
+    hash, so a referrer costs a few bytes instead of a UrlTarget. At most
+    max_referrers pages are kept per url, any further ones are counted.
+    '''
+
+    def __init__(self, max_referrers: int = DEFAULT_MAX_REFERRERS) -> None:
+        self.max_referrers = max(1, max_referrers)
+        self._page_ids: Dict[str, int] = {}
+        self._pages: List[str] = []
+        # most urls are linked from a single page, that one is kept as
+        # a plain int, the others get an array of 32 bit page ids
+        self._referrers: Dict[int, Union[int, _PageIds]] = {}
+        self._overflow: Dict[int, int] = {}
+
+    def page_id(self, url: str) -> int:
+        page_id = self._page_ids.get(url)
+        if page_id is None:
+            page_id = len(self._pages)
+            self._page_ids[url] = page_id
+            self._pages.append(url)
+        return page_id
+
+    def add(self, url: str, page_id: int) -> None:
+        key = url_hash(url)
+        page_ids = self._referrers.get(key)
+        if page_ids is None:
+            self._referrers[key] = page_id
+        elif isinstance(page_ids, int):
+            if page_ids != page_id:
+                self._referrers[key] = array('I', [page_ids, page_id])
+        elif page_id not in page_ids:
+            if len(page_ids) < self.max_referrers:
+                page_ids.append(page_id)
+            else:
+                self._overflow[key] = self._overflow.get(key, 0) + 1
+
+    def get(self, url: str) -> Tuple[List[str], int]:
+        '''Returns the kept referrers of the url and the number of all'''
+        key = url_hash(url)
+        page_ids = self._referrers.get(key)
+        if page_ids is None:
+            return [], 0
+        if isinstance(page_ids, int):
+            return [self._pages[page_ids]], 1
+        referrers = [self._pages[page_id] for page_id in page_ids]
+        return referrers, len(referrers) + self._overflow.get(key, 0)
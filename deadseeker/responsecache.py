@@ -0,0 +1,160 @@
+import json
+import os
+import sqlite3
+from abc import abstractmethod, ABC
+from typing import Optional, Set
+from .canonicalizer import UrlCanonicalizer
+from .common import CachedResponse, SeekerConfig, UrlFetchResponse
+
+CACHE_FILE_NAME = 'deadseeker-cache.sqlite'
+# the cached responses are committed in batches of this size
+COMMIT_INTERVAL = 100
+
+
+def links_fingerprint(config: SeekerConfig) -> str:
+    '''Settings that decide which links are kept when parsing a page'''
+    return json.dumps([
+        sorted(config.search_attrs),
+        config.resolvebeforefilter,
+        config.includeprefix,
+        config.excludeprefix,
+        config.includesuffix,
+        config.excludesuffix,
+        config.includecontained,
+        config.excludecontained,
+        config.includeregex,
+        config.excluderegex,
+        config.includeglob,
+        config.excludeglob
+    ])
+
+
+class ResponseCache(ABC):
+    @abstractmethod  # pragma: no mutate
+    def get(self, url: str) -> Optional[CachedResponse]:
+        '''
+        Returns the entry of the url that the fetcher fills in, it is
+        prefilled with what is known from previous runs
+        '''
+        pass
+
+    @abstractmethod  # pragma: no mutate
+    def put(self, resp: UrlFetchResponse) -> None:
+        '''Stores the cache entry of a response that was handled'''
+        pass
+
+    def get_hosts_without_head(self) -> Set[str]:
+        return set()
+
+    def add_host_without_head(self, host: str) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class ResponseCacheFactory(ABC):
+    @abstractmethod  # pragma: no mutate
+    def get_response_cache(
+            self,
+            config: SeekerConfig,
+            canonicalizer: UrlCanonicalizer) -> ResponseCache:
+        pass
+
+
+class DefaultResponseCacheFactory(ResponseCacheFactory):
+    def get_response_cache(
+            self,
+            config: SeekerConfig,
+            canonicalizer: UrlCanonicalizer) -> ResponseCache:
+        if config.cache_dir:
+            return SqliteResponseCache(
+                config.cache_dir,
+                canonicalizer,
+                links_fingerprint(config))
+        return NoResponseCache()
+
+
+class NoResponseCache(ResponseCache):
+    def get(self, url: str) -> Optional[CachedResponse]:
+        return None
+
+    def put(self, resp: UrlFetchResponse) -> None:
+        pass
+
+
+# Keeps the responses in a sqlite database in the cache directory, keyed
+# by the canonical url, so that the directory can be kept between runs.
+class SqliteResponseCache(ResponseCache):
+    def __init__(
+            self,
+            directory: str,
+            canonicalizer: UrlCanonicalizer,
+            fingerprint: str = '') -> None:
+        self.canonicalizer = canonicalizer
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, CACHE_FILE_NAME)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute('PRAGMA synchronous=OFF')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'url TEXT PRIMARY KEY, status INTEGER, content_type TEXT,'
+            ' etag TEXT, last_modified TEXT, links TEXT, checked REAL)')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS hosts_without_head ('
+            'host TEXT PRIMARY KEY)')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS settings ('
+            'name TEXT PRIMARY KEY, value TEXT)')
+        row = self.db.execute(
+            "SELECT value FROM settings WHERE name = 'links'").fetchone()
+        if not row or row[0] != fingerprint:
+            # the links were filtered with other settings, parse again
+            self.db.execute('UPDATE responses SET links = NULL')
+            self.db.execute(
+                "INSERT OR REPLACE INTO settings VALUES ('links', ?)",
+                (fingerprint,))
+        self.db.commit()
+        self._uncommitted = 0
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        entry = CachedResponse(url)
+        row = self.db.execute(
+            'SELECT status, content_type, etag, last_modified, links,'
+            ' checked FROM responses WHERE url = ?',
+            (self.canonicalizer.canonicalize(url),)).fetchone()
+        if row:
+            entry.status, entry.content_type, entry.etag, \
+                entry.last_modified, links, entry.checked = row
+            entry.links = None if links is None else json.loads(links)
+        return entry
+
+    def put(self, resp: UrlFetchResponse) -> None:
+        entry = resp.cache_entry
+        # the entry is not needed in memory anymore
+        resp.cache_entry = None
+        if entry is None or resp.error or not entry.status:
+            return
+        links = None if entry.links is None else json.dumps(entry.links)
+        self.db.execute(
+            'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (self.canonicalizer.canonicalize(entry.url), entry.status,
+             entry.content_type, entry.etag, entry.last_modified, links,
+             entry.checked))
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_INTERVAL:
+            self.db.commit()
+            self._uncommitted = 0
+
+    def get_hosts_without_head(self) -> Set[str]:
+        return set(
+            row[0] for row in
+            self.db.execute('SELECT host FROM hosts_without_head'))
+
+    def add_host_without_head(self, host: str) -> None:
+        self.db.execute(
+            'INSERT OR IGNORE INTO hosts_without_head VALUES (?)', (host,))
+
+    def close(self) -> None:
+        self.db.commit()
+        self.db.close()
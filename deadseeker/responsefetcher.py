@@ -1,9 +1,28 @@
-from .common import UrlFetchResponse, UrlTarget, SeekerConfig
+from .common import (
+    CachedResponse,
+    UrlFetchResponse,
+    UrlTarget,
+    SeekerConfig,
+    SeekResults,
+    CACHED_NOT_MODIFIED,
+    CACHED_WITHIN_TTL
+)
+from .responsecache import ResponseCache, NoResponseCache
+from .headsupport import HeadSupport, HEAD_UNSUPPORTED_STATUSES
+from .hostlimiter import HostLimiter, HostUnavailableError, new_host_limiter
+from .linkparser import LinkParser, LinkStream
+from .retrybudget import RetryBudget
 from aiohttp import ClientResponse
 from aiohttp_retry.types import ClientType
 from abc import abstractmethod, ABC
+from typing import Dict, List, Optional, Set
 from .timer import Timer
 import aiohttp
+import codecs
+import time
+
+# bytes of the html that are decoded and parsed at once when streaming
+STREAM_CHUNK_SIZE: int = 64 * 1024
 
 
 class ResponseFetcher:
@@ -13,31 +32,94 @@ class ResponseFetcher:
             urltarget: UrlTarget) -> UrlFetchResponse:
         pass
 
+    def add_statistics(self, results: SeekResults) -> None:
+        pass
+
 
 class ResponseFetcherFactory(ABC):
     @abstractmethod  # pragma: no mutate
     def get_response_fetcher(
             self,
-            config: SeekerConfig) -> ResponseFetcher:
+            config: SeekerConfig,
+            cache: ResponseCache,
+            linkparser: LinkParser,
+            retrybudget: RetryBudget) -> ResponseFetcher:
         pass
 
 
 class DefaultResponseFetcherFactory(ResponseFetcherFactory):
     def get_response_fetcher(
             self,
-            config: SeekerConfig) -> ResponseFetcher:
+            config: SeekerConfig,
+            cache: ResponseCache,
+            linkparser: LinkParser,
+            retrybudget: RetryBudget) -> ResponseFetcher:
+        ttl = config.offsite_cache_ttl
+        streamparser = linkparser if config.stream_html else None
+        hostlimiter = new_host_limiter(config, retrybudget)
         if (config.alwaysgetonsite):
-            return AlwaysGetIfOnSiteResponseFetcher()
-        return HeadThenGetIfHtmlResponseFetcher()
+            return AlwaysGetIfOnSiteResponseFetcher(
+                cache, ttl, streamparser, hostlimiter)
+        return HeadThenGetIfHtmlResponseFetcher(
+            cache, ttl, streamparser, hostlimiter)
 
 
 class AbstractResponseFetcher(ResponseFetcher, ABC):
 
+    def __init__(
+            self,
+            cache: ResponseCache = NoResponseCache(),
+            offsite_ttl: int = 0,
+            streamparser: Optional[LinkParser] = None,
+            hostlimiter: HostLimiter = HostLimiter()) -> None:
+        self.cache = cache
+        # seconds that a successful offsite verdict is reused
+        self.offsite_ttl = offsite_ttl
+        # when set, the links are parsed while the html is downloaded
+        # and the html itself is not kept
+        self.streamparser = streamparser
+        self.hostlimiter = hostlimiter
+
+    def add_statistics(self, results: SeekResults) -> None:
+        results.hosts = self.hostlimiter.get_stats()
+
     async def fetch_response(
             self,
             session: ClientType,
             urltarget: UrlTarget) -> UrlFetchResponse:
+        entry = self.cache.get(urltarget.url)
+        if entry is not None and self._is_fresh_offsite(entry, urltarget):
+            resp = UrlFetchResponse(urltarget)
+            resp.status = entry.status
+            resp.cached = CACHED_WITHIN_TTL
+            resp.elapsed = 0.0
+            return resp
+        resp = await self._fetch_once(session, urltarget, entry)
+        if self.hostlimiter.should_retry(resp, urltarget.attempt):
+            # fetched again once its host may be asked, see retry_in
+            urltarget.attempt += 1
+            resp.retry_in = self.hostlimiter.delay(urltarget.url)
+        return resp
+
+    async def _fetch_once(
+            self,
+            session: ClientType,
+            urltarget: UrlTarget,
+            entry: Optional[CachedResponse]) -> UrlFetchResponse:
         resp = UrlFetchResponse(urltarget)
+        resp.cache_entry = entry
+        url = urltarget.url
+        delay = self.hostlimiter.delay(url)
+        if delay > 0:
+            # not waiting for the turn of the url, others can go first
+            resp.retry_in = delay
+            return resp
+        try:
+            acquired = await self.hostlimiter.acquire(url)
+        except HostUnavailableError as e:
+            resp.error = e
+            resp.elapsed = 0.0
+            return resp
         timer = Timer()
         try:
             await self._inner_fetch(session, resp, urltarget, timer)
@@ -46,9 +128,21 @@ class AbstractResponseFetcher(ResponseFetcher, ABC):
             resp.error = e
         except Exception as e:
             resp.error = e
-        resp.elapsed = timer.stop()*1000
+        finally:
+            resp.elapsed = timer.stop()*1000
+            self.hostlimiter.release(url, resp, acquired)
         return resp
 
+    def _is_fresh_offsite(
+            self,
+            entry: CachedResponse,
+            urltarget: UrlTarget) -> bool:
+        return bool(
+            self.offsite_ttl > 0 and
+            entry.status and
+            not is_onsite(urltarget) and
+            time.time() - entry.checked < self.offsite_ttl)
+
     @abstractmethod  # pragma: no mutate
     async def _inner_fetch(
             self,
@@ -65,15 +159,29 @@ class AbstractResponseFetcher(ResponseFetcher, ABC):
             urltarget: UrlTarget,
             timer: Timer) -> None:
         url = urltarget.url
-        async with session.get(url) as response:
+        entry = resp.cache_entry
+        headers = revalidation_headers(entry)
+        async with session.get(url, headers=headers) as response:
             timer.stop()
             resp.status = response.status
             # Because of redirects the url might have changed. Update it here.
             # This fixes https://github.com/ScholliYT/Broken-Links-Crawler-Action/issues/39
             urltarget.url = str(response.real_url)
 
+            if entry is not None and headers and response.status == 304:
+                # not modified, the links of the last run are still valid
+                resp.status = entry.status
+                resp.links = entry.links
+                resp.cached = CACHED_NOT_MODIFIED
+                update_validators(entry, response)
+                return
+            remember_response(entry, response)
             if has_html(response) and is_onsite(urltarget):
-                resp.html = await response.text()
+                if self.streamparser is not None:
+                    resp.links = await stream_links(
+                        response, self.streamparser.stream(resp))
+                else:
+                    resp.html = await response.text()
 
 
 def has_html(response: ClientResponse) -> bool:
@@ -85,16 +193,90 @@ def is_onsite(urltarget: UrlTarget) -> bool:
     return urltarget.home in urltarget.url
 
 
+async def stream_links(
+        response: ClientResponse, linkstream: LinkStream) -> List[str]:
+    try:
+        decoder = codecs.getincrementaldecoder(
+            response.charset or 'utf-8')(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+        linkstream.feed(decoder.decode(chunk))
+    linkstream.feed(decoder.decode(b'', final=True))
+    return linkstream.close()
+
+
+def revalidation_headers(entry: Optional[CachedResponse]) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    # a page is only worth revalidating if its links are cached
+    if entry is not None and entry.links is not None:
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+    return headers
+
+
+def update_validators(
+        entry: CachedResponse, response: ClientResponse) -> None:
+    entry.etag = response.headers.get('ETag', entry.etag)
+    entry.last_modified = \
+        response.headers.get('Last-Modified', entry.last_modified)
+    entry.checked = time.time()
+
+
+def remember_response(
+        entry: Optional[CachedResponse], response: ClientResponse) -> None:
+    if entry is not None:
+        entry.status = response.status
+        if 'Content-Type' in response.headers:
+            entry.content_type = response.content_type
+        entry.etag = response.headers.get('ETag')
+        entry.last_modified = response.headers.get('Last-Modified')
+        # the links of the new content are not known yet
+        entry.links = None
+        entry.checked = time.time()
+
+
 # Optimized approach: Use HEAD request first, then only
 # use a GET request if the url is onsite and has html body
 class HeadThenGetIfHtmlResponseFetcher(AbstractResponseFetcher):
 
+    def __init__(
+            self,
+            cache: ResponseCache = NoResponseCache(),
+            offsite_ttl: int = 0,
+            streamparser: Optional[LinkParser] = None,
+            hostlimiter: HostLimiter = HostLimiter()) -> None:
+        super().__init__(cache, offsite_ttl, streamparser, hostlimiter)
+        self.headsupport = HeadSupport(cache)
+        # the urls whose HEAD request was answered before it was their
+        # turn to send the GET request too
+        self._head_answered: Set[str] = set()
+
+    def add_statistics(self, results: SeekResults) -> None:
+        super().add_statistics(results)
+        results.head_requests_skipped = self.headsupport.skipped
+
     async def _inner_fetch(
             self,
             session: ClientType,
             resp: UrlFetchResponse,
             urltarget: UrlTarget,
             timer: Timer) -> None:
+        entry = resp.cache_entry
+        if urltarget.url in self._head_answered:
+            self._head_answered.discard(urltarget.url)
+            await self._do_get(session, resp, urltarget, timer)
+            return
+        if entry is not None and entry.links is not None \
+                and is_onsite(urltarget):
+            # a known html page, revalidate it without asking HEAD first
+            await self._do_get(session, resp, urltarget, timer)
+            return
+        if self.headsupport.should_skip(urltarget.url):
+            await self._do_get(session, resp, urltarget, timer)
+            return
         head_not_allowed = False  # pragma: no mutate
         is_html_content = False  # pragma: no mutate
         try:
@@ -102,14 +284,24 @@ class HeadThenGetIfHtmlResponseFetcher(AbstractResponseFetcher):
                 timer.stop()
                 resp.status = response.status
                 is_html_content = has_html(response)
+                remember_response(entry, response)
+            self.headsupport.supported(urltarget.url)
         except aiohttp.ClientResponseError as e:
             # Fixes ScholliYT/Broken-Links-Crawler-Action#8
-            if e.status == 405:
+            if e.status in HEAD_UNSUPPORTED_STATUSES:
                 head_not_allowed = True
+                self.headsupport.unsupported(urltarget.url)
             else:
                 raise e
 
         if head_not_allowed or (is_onsite(urltarget) and is_html_content):
+            # the HEAD request took the turn of the url
+            delay = self.hostlimiter.turn_delay(urltarget.url)
+            if delay > 0:
+                self._head_answered.add(urltarget.url)
+                resp.retry_in = delay
+                return
+            self.hostlimiter.turn(urltarget.url)
             await self._do_get(session, resp, urltarget, timer)
 
 
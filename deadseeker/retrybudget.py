@@ -0,0 +1,38 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RetryBudget:
+    '''
+    The retries allowed for a whole crawl: a number of retries, plus a
+    percentage of the requests sent so far. Without either, any number
+    of retries is allowed.
+    '''
+
+    def __init__(self, tokens: int = -1, percent: int = 0) -> None:
+        self.tokens = tokens
+        self.percent = percent
+        self.requests: int = 0
+        self.retries: int = 0
+        self._spent = False
+
+    def request(self) -> None:
+        self.requests += 1
+
+    def available(self) -> bool:
+        if self.tokens < 0 and self.percent <= 0:
+            return True
+        allowed = max(0, self.tokens) + self.requests * self.percent / 100
+        if self.retries < allowed:
+            return True
+        if not self._spent:
+            self._spent = True
+            logger.warning(
+                f'::warn ::Retry budget spent after {self.retries} retries'
+                f' of {self.requests} requests, failed requests are'
+                ' reported without retrying them')
+        return False
+
+    def retry(self) -> None:
+        self.retries += 1
@@ -11,3 +11,27 @@ class Timer:
         if (self.end is None):
             self.end = time.time()
         return self.end - self.start
+
+
+class Deadline:
+    '''
+    The seconds that a crawl may take, if any. No new request is sent
+    in the last grace seconds, which are left to the requests in flight.
+    '''
+
+    def __init__(self, seconds: float, grace: float = 0.0) -> None:
+        self.seconds = seconds
+        self.end: Optional[float] = None
+        self.closing_at: Optional[float] = None
+        if seconds > 0:
+            self.end = time.monotonic() + seconds
+            self.closing_at = self.end - min(max(0.0, grace), seconds)
+
+    def closing(self) -> bool:
+        return self.closing_at is not None and \
+            time.monotonic() >= self.closing_at
+
+    def remaining(self) -> Optional[float]:
+        if self.end is None:
+            return None
+        return max(0.0, self.end - time.monotonic())
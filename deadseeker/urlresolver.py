@@ -0,0 +1,62 @@
+from typing import List
+from urllib.parse import urlparse, urlunparse, uses_netloc, uses_relative
+
+
+class UrlResolver:
+    '''
+    Resolves the links of a page against the url of the page exactly like
+    urljoin does, but with the url of the page split once for all of its
+    links instead of once per link.
+    '''
+
+    def __init__(self, base: str) -> None:
+        self.base = base
+        self.scheme, self.netloc, self.path, self.params, self.query, _ = \
+            urlparse(base, '')
+        base_parts = self.path.split('/')
+        if base_parts[-1] != '':
+            # the last part is not a directory, links are not relative to it
+            del base_parts[-1]
+        self._base_parts = base_parts
+
+    def resolve(self, url: str) -> str:
+        if not self.base:
+            return url
+        if not url:
+            return self.base
+        scheme, netloc, path, params, query, fragment = \
+            urlparse(url, self.scheme)
+        if scheme != self.scheme or scheme not in uses_relative:
+            return url
+        if scheme in uses_netloc:
+            if netloc:
+                return urlunparse(
+                    (scheme, netloc, path, params, query, fragment))
+            netloc = self.netloc
+        if not path and not params:
+            return urlunparse((
+                scheme, netloc, self.path, self.params,
+                query or self.query, fragment))
+        if path[:1] == '/':
+            segments = path.split('/')
+        else:
+            segments = self._base_parts + path.split('/')
+            # empty segments would give redundant slashes when joined
+            segments[1:-1] = filter(None, segments[1:-1])
+        return urlunparse((
+            scheme, netloc, '/'.join(_resolve_dots(segments)) or '/',
+            params, query, fragment))
+
+
+def _resolve_dots(segments: List[str]) -> List[str]:
+    resolved: List[str] = []
+    for segment in segments:
+        if segment == '..':
+            if resolved:
+                resolved.pop()
+        elif segment != '.':
+            resolved.append(segment)
+    if segments[-1] in ('.', '..'):
+        # a link to a directory keeps its trailing slash
+        resolved.append('')
+    return resolved
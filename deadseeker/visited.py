@@ -0,0 +1,133 @@
+import hashlib
+import math
+import os
+import sqlite3
+import tempfile
+from abc import abstractmethod, ABC
+from typing import Hashable, Optional, Set
+from .common import (
+    SeekerConfig,
+    VISITED_INDEX_EXACT,
+    VISITED_INDEX_BLOOM
+)
+
+
+def url_hash(url: str, bits: int = 64) -> int:
+    digest = hashlib.blake2b(
+        url.encode('utf-8'), digest_size=max(1, bits // 8)).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class VisitedSet(ABC):
+    @abstractmethod  # pragma: no mutate
+    def add(self, url: str) -> bool:
+        '''Marks the url as visited, returns False if it already was'''
+        pass
+
+    def key(self, url: str) -> Hashable:
+        '''What the url is told apart from the other urls by'''
+        return url
+
+    def close(self) -> None:
+        pass
+
+
+class VisitedSetFactory(ABC):
+    @abstractmethod  # pragma: no mutate
+    def get_visited_set(self, config: SeekerConfig) -> VisitedSet:
+        pass
+
+
+class DefaultVisitedSetFactory(VisitedSetFactory):
+    def get_visited_set(self, config: SeekerConfig) -> VisitedSet:
+        if config.visited_index == VISITED_INDEX_EXACT:
+            return ExactVisitedSet()
+        if config.visited_index == VISITED_INDEX_BLOOM:
+            return BloomVisitedSet(
+                config.visited_bloom_capacity,
+                directory=config.frontier_spill_dir)
+        return HashedVisitedSet(config.visited_hash_bits)
+
+
+# Keeps the full url strings, mostly useful for debugging
+class ExactVisitedSet(VisitedSet):
+    def __init__(self) -> None:
+        self.urls: Set[str] = set()
+
+    def add(self, url: str) -> bool:
+        if url in self.urls:
+            return False
+        self.urls.add(url)
+        return True
+
+
+# Keeps a fixed size hash of each url instead of the url itself,
+# with 64 bits a collision is unlikely below billions of urls
+class HashedVisitedSet(VisitedSet):
+    def __init__(self, bits: int = 64) -> None:
+        self.bits = bits
+        self.keys: Set[int] = set()
+
+    def key(self, url: str) -> Hashable:
+        return url_hash(url, self.bits)
+
+    def add(self, url: str) -> bool:
+        key = url_hash(url, self.bits)
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        return True
+
+
+# Keeps only a Bloom filter in memory. A url that the filter has never
+# seen is new for sure, only the (probably) known ones are looked up in
+# the index of 64 bit url hashes, which lives in a temporary sqlite
+# database on disk.
+class BloomVisitedSet(VisitedSet):
+    def __init__(
+            self,
+            capacity: int,
+            error_rate: float = 0.01,
+            directory: Optional[str] = None) -> None:
+        capacity = max(1, capacity)
+        self.size = max(8, int(
+            -capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        fd, self.path = tempfile.mkstemp(suffix='.sqlite', dir=directory)
+        os.close(fd)
+        self.db = sqlite3.connect(self.path, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=OFF')
+        self.db.execute('PRAGMA synchronous=OFF')
+        self.db.execute('CREATE TABLE visited (key INTEGER PRIMARY KEY)')
+        self.lookups = 0
+
+    def key(self, url: str) -> Hashable:
+        # the hash that is looked up in the database
+        return url_hash(url, 128) >> 64
+
+    def add(self, url: str) -> bool:
+        key = url_hash(url, 128)
+        first = key >> 64
+        second = key & 0xFFFFFFFFFFFFFFFF
+        # sqlite integers are signed 64 bit values
+        exact = first - (1 << 63)
+        maybe_seen = True
+        for i in range(self.hashes):
+            position = (first + i * second) % self.size
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                maybe_seen = False
+        if maybe_seen:
+            self.lookups += 1
+            if self.db.execute(
+                    'SELECT 1 FROM visited WHERE key = ?',
+                    (exact,)).fetchone():
+                return False
+        self.db.execute('INSERT INTO visited (key) VALUES (?)', (exact,))
+        return True
+
+    def close(self) -> None:
+        self.db.close()
+        os.remove(self.path)
@@ -13,16 +13,50 @@ TEST_URLS = ['http://test.com/']
 TEST_MAX_DEPTH = 2
 TEST_MAX_TRIES = 3
 TEST_MAX_TIME = 30
+TEST_RETRY_BUDGET = 100
+TEST_RETRY_BUDGET_PERCENT = 10
 TEST_INCLUDE_PREFIX = ['includeprefix']
 TEST_EXCLUDE_PREFIX = ['excludeprefix']
 TEST_INCLUDE_SUFFIX = ['includesuffix']
 TEST_EXCLUDE_SUFFIX = ['excludesuffix']
 TEST_INCLUDE_CONTAINED = ['includecontained']
 TEST_EXCLUDE_CONTAINED = ['excludecontained']
+TEST_INCLUDE_REGEX = ['includeregex']
+TEST_EXCLUDE_REGEX = ['excluderegex']
+TEST_INCLUDE_GLOB = ['includeglob']
+TEST_EXCLUDE_GLOB = ['excludeglob']
 TEST_ALWAYS_GET_ONSITE = True
 TEST_RESOLVE_BEFORE_FILTERING = True
 TEST_CONNECT_LIMIT_PER_HOST = 3
+TEST_ADAPTIVE_CONNECT_LIMIT = True
+TEST_MIN_CONNECT_LIMIT_PER_HOST = 2
+TEST_MAX_CONNECT_LIMIT_PER_HOST = 40
+TEST_REQUESTS_PER_SECOND_PER_HOST = 5
+TEST_CIRCUIT_BREAKER_THRESHOLD = 7
+TEST_CIRCUIT_BREAKER_COOLDOWN = 120
 TEST_TIMEOUT = 60
+TEST_DEADLINE = 540
+TEST_MAX_FAILURES = 1
+TEST_MAX_CONCURRENT_REQUESTS = 20
+TEST_MAX_FRONTIER_SIZE = 500
+TEST_FRONTIER_MEMORY_SIZE = 50
+TEST_FRONTIER_SPILL_DIR = '/tmp/frontier'
+TEST_VISITED_INDEX = 'bloom'
+TEST_VISITED_BLOOM_CAPACITY = 5000
+TEST_CANONICALIZE_URLS = False
+TEST_SORT_QUERY_PARAMS = True
+TEST_DROP_QUERY_PARAMS = ['utm_*']
+TEST_MAX_REFERRERS = 10
+TEST_CACHE_DIR = '/tmp/cache'
+TEST_CHECKPOINT_FILE = '/tmp/journal'
+TEST_RESUME = True
+TEST_OFFSITE_CACHE_TTL = 86400
+TEST_STREAM_HTML = True
+TEST_PARSE_WORKERS = 4
+TEST_PARSE_PROCESS_THRESHOLD = 1048576
+TEST_HTML_PARSER = 'lxml'
+TEST_LINK_CACHE_SIZE = 500
+TEST_USE_UVLOOP = True
 TEST_SEARCH_ATTRS = set(['href', 'src', 'data-src'])
 
 
@@ -37,10 +71,63 @@ class TestAction(unittest.TestCase):
         self.inputvalidator.get_urls.return_value = TEST_URLS
         self.inputvalidator.get_maxdepth.return_value = TEST_MAX_DEPTH
         self.inputvalidator.get_retry_maxtime.return_value = TEST_MAX_TIME
+        self.inputvalidator.get_retry_budget.return_value = TEST_RETRY_BUDGET
+        self.inputvalidator.get_retry_budget_percent.return_value = \
+            TEST_RETRY_BUDGET_PERCENT
         self.inputvalidator.get_retry_maxtries.return_value = TEST_MAX_TRIES
         self.inputvalidator.get_connect_limit_per_host.return_value = \
             TEST_CONNECT_LIMIT_PER_HOST
+        self.inputvalidator.get_adaptive_connect_limit.return_value = \
+            TEST_ADAPTIVE_CONNECT_LIMIT
+        self.inputvalidator.get_min_connect_limit_per_host.return_value = \
+            TEST_MIN_CONNECT_LIMIT_PER_HOST
+        self.inputvalidator.get_max_connect_limit_per_host.return_value = \
+            TEST_MAX_CONNECT_LIMIT_PER_HOST
+        self.inputvalidator.get_requests_per_second_per_host.return_value = \
+            TEST_REQUESTS_PER_SECOND_PER_HOST
+        self.inputvalidator.get_circuit_breaker_threshold.return_value = \
+            TEST_CIRCUIT_BREAKER_THRESHOLD
+        self.inputvalidator.get_circuit_breaker_cooldown.return_value = \
+            TEST_CIRCUIT_BREAKER_COOLDOWN
         self.inputvalidator.get_timeout.return_value = TEST_TIMEOUT
+        self.inputvalidator.get_deadline.return_value = TEST_DEADLINE
+        self.inputvalidator.get_max_failures.return_value = \
+            TEST_MAX_FAILURES
+        self.inputvalidator.get_max_concurrent_requests.return_value = \
+            TEST_MAX_CONCURRENT_REQUESTS
+        self.inputvalidator.get_max_frontier_size.return_value = \
+            TEST_MAX_FRONTIER_SIZE
+        self.inputvalidator.get_frontier_memory_size.return_value = \
+            TEST_FRONTIER_MEMORY_SIZE
+        self.inputvalidator.get_frontier_spill_dir.return_value = \
+            TEST_FRONTIER_SPILL_DIR
+        self.inputvalidator.get_visited_index.return_value = \
+            TEST_VISITED_INDEX
+        self.inputvalidator.get_visited_bloom_capacity.return_value = \
+            TEST_VISITED_BLOOM_CAPACITY
+        self.inputvalidator.get_canonicalize_urls.return_value = \
+            TEST_CANONICALIZE_URLS
+        self.inputvalidator.get_sort_query_params.return_value = \
+            TEST_SORT_QUERY_PARAMS
+        self.inputvalidator.get_drop_query_params.return_value = \
+            TEST_DROP_QUERY_PARAMS
+        self.inputvalidator.get_max_referrers.return_value = \
+            TEST_MAX_REFERRERS
+        self.inputvalidator.get_cache_dir.return_value = TEST_CACHE_DIR
+        self.inputvalidator.get_checkpoint_file.return_value = \
+            TEST_CHECKPOINT_FILE
+        self.inputvalidator.get_resume.return_value = TEST_RESUME
+        self.inputvalidator.get_offsite_cache_ttl.return_value = \
+            TEST_OFFSITE_CACHE_TTL
+        self.inputvalidator.get_stream_html.return_value = TEST_STREAM_HTML
+        self.inputvalidator.get_parse_workers.return_value = \
+            TEST_PARSE_WORKERS
+        self.inputvalidator.get_parse_process_threshold.return_value = \
+            TEST_PARSE_PROCESS_THRESHOLD
+        self.inputvalidator.get_html_parser.return_value = TEST_HTML_PARSER
+        self.inputvalidator.get_link_cache_size.return_value = \
+            TEST_LINK_CACHE_SIZE
+        self.inputvalidator.get_use_uvloop.return_value = TEST_USE_UVLOOP
         self.inputvalidator.get_includeprefix.return_value = \
             TEST_INCLUDE_PREFIX
         self.inputvalidator.get_excludeprefix.return_value = \
@@ -53,6 +140,14 @@ class TestAction(unittest.TestCase):
             TEST_INCLUDE_CONTAINED
         self.inputvalidator.get_excludecontained.return_value = \
             TEST_EXCLUDE_CONTAINED
+        self.inputvalidator.get_includeregex.return_value = \
+            TEST_INCLUDE_REGEX
+        self.inputvalidator.get_excluderegex.return_value = \
+            TEST_EXCLUDE_REGEX
+        self.inputvalidator.get_includeglob.return_value = \
+            TEST_INCLUDE_GLOB
+        self.inputvalidator.get_excludeglob.return_value = \
+            TEST_EXCLUDE_GLOB
         self.inputvalidator.get_alwaysgetonsite.return_value = \
             TEST_ALWAYS_GET_ONSITE
         self.inputvalidator.get_resolvebeforefilter.return_value = \
@@ -136,6 +231,9 @@ class TestAction(unittest.TestCase):
         self.assertEqual(config.search_attrs, TEST_SEARCH_ATTRS)
         self.assertEqual(config.max_tries, TEST_MAX_TRIES)
         self.assertEqual(config.max_time, TEST_MAX_TIME)
+        self.assertEqual(config.retry_budget, TEST_RETRY_BUDGET)
+        self.assertEqual(
+            config.retry_budget_percent, TEST_RETRY_BUDGET_PERCENT)
         self.assertEqual(config.max_depth, TEST_MAX_DEPTH)
         self.assertEqual(config.includeprefix, TEST_INCLUDE_PREFIX)
         self.assertEqual(
@@ -144,10 +242,55 @@ class TestAction(unittest.TestCase):
         self.assertEqual(config.excludesuffix, TEST_EXCLUDE_SUFFIX)
         self.assertEqual(config.includecontained, TEST_INCLUDE_CONTAINED)
         self.assertEqual(config.excludecontained, TEST_EXCLUDE_CONTAINED)
+        self.assertEqual(config.includeregex, TEST_INCLUDE_REGEX)
+        self.assertEqual(config.excluderegex, TEST_EXCLUDE_REGEX)
+        self.assertEqual(config.includeglob, TEST_INCLUDE_GLOB)
+        self.assertEqual(config.excludeglob, TEST_EXCLUDE_GLOB)
         self.assertEqual(config.alwaysgetonsite, TEST_ALWAYS_GET_ONSITE)
         self.assertEqual(
             config.resolvebeforefilter, TEST_RESOLVE_BEFORE_FILTERING)
         self.assertEqual(
             config.connect_limit_per_host,
             TEST_CONNECT_LIMIT_PER_HOST)
+        self.assertEqual(
+            config.adaptive_connect_limit, TEST_ADAPTIVE_CONNECT_LIMIT)
+        self.assertEqual(
+            config.min_connect_limit_per_host,
+            TEST_MIN_CONNECT_LIMIT_PER_HOST)
+        self.assertEqual(
+            config.max_connect_limit_per_host,
+            TEST_MAX_CONNECT_LIMIT_PER_HOST)
+        self.assertEqual(
+            config.requests_per_second_per_host,
+            TEST_REQUESTS_PER_SECOND_PER_HOST)
+        self.assertEqual(
+            config.circuit_breaker_threshold, TEST_CIRCUIT_BREAKER_THRESHOLD)
+        self.assertEqual(
+            config.circuit_breaker_cooldown, TEST_CIRCUIT_BREAKER_COOLDOWN)
         self.assertEqual(config.timeout, TEST_TIMEOUT)
+        self.assertEqual(config.deadline, TEST_DEADLINE)
+        self.assertEqual(config.max_failures, TEST_MAX_FAILURES)
+        self.assertEqual(
+            config.max_concurrent_requests, TEST_MAX_CONCURRENT_REQUESTS)
+        self.assertEqual(config.max_frontier_size, TEST_MAX_FRONTIER_SIZE)
+        self.assertEqual(
+            config.frontier_memory_size, TEST_FRONTIER_MEMORY_SIZE)
+        self.assertEqual(config.frontier_spill_dir, TEST_FRONTIER_SPILL_DIR)
+        self.assertEqual(config.visited_index, TEST_VISITED_INDEX)
+        self.assertEqual(
+            config.visited_bloom_capacity, TEST_VISITED_BLOOM_CAPACITY)
+        self.assertEqual(config.canonicalize_urls, TEST_CANONICALIZE_URLS)
+        self.assertEqual(config.sort_query_params, TEST_SORT_QUERY_PARAMS)
+        self.assertEqual(config.drop_query_params, TEST_DROP_QUERY_PARAMS)
+        self.assertEqual(config.max_referrers, TEST_MAX_REFERRERS)
+        self.assertEqual(config.cache_dir, TEST_CACHE_DIR)
+        self.assertEqual(config.checkpoint_file, TEST_CHECKPOINT_FILE)
+        self.assertEqual(config.resume, TEST_RESUME)
+        self.assertEqual(config.offsite_cache_ttl, TEST_OFFSITE_CACHE_TTL)
+        self.assertEqual(config.stream_html, TEST_STREAM_HTML)
+        self.assertEqual(config.parse_workers, TEST_PARSE_WORKERS)
+        self.assertEqual(
+            config.parse_process_threshold, TEST_PARSE_PROCESS_THRESHOLD)
+        self.assertEqual(config.html_parser, TEST_HTML_PARSER)
+        self.assertEqual(config.link_cache_size, TEST_LINK_CACHE_SIZE)
+        self.assertEqual(config.use_uvloop, TEST_USE_UVLOOP)
@@ -0,0 +1,146 @@
+import unittest
+from unittest.mock import Mock
+from deadseeker.common import SeekerConfig
+from deadseeker.canonicalizer import (
+    CanonicalVisitedSet,
+    DefaultUrlCanonicalizer,
+    DefaultUrlCanonicalizerFactory,
+    remove_dot_segments
+)
+from deadseeker.visited import ExactVisitedSet
+
+
+class TestRemoveDotSegments(unittest.TestCase):
+
+    def test_segments_are_removed(self):
+        for path, expected in [
+                ('/a/b/c', '/a/b/c'),
+                ('/a/./b', '/a/b'),
+                ('/a/b/../c', '/a/c'),
+                ('/a/b/..', '/a/'),
+                ('/a/b/.', '/a/b/'),
+                ('/../a', '/a'),
+                ('/', '/'),
+                ('', '')]:
+            self.assertEqual(expected, remove_dot_segments(path), path)
+
+
+class TestDefaultUrlCanonicalizerFactory(unittest.TestCase):
+
+    def test_config_is_applied(self):
+        config = Mock(spec=SeekerConfig)
+        config.canonicalize_urls = False
+        config.sort_query_params = True
+        config.drop_query_params = ['utm_*']
+        result = DefaultUrlCanonicalizerFactory().get_url_canonicalizer(config)
+        self.assertTrue(isinstance(result, DefaultUrlCanonicalizer))
+        self.assertFalse(result.normalize)
+        self.assertTrue(result.sort_query)
+        self.assertEqual(['utm_*'], result.drop_params)
+
+
+class TestDefaultUrlCanonicalizer(unittest.TestCase):
+
+    def test_equivalent_urls_are_normalized(self):
+        testobj = DefaultUrlCanonicalizer()
+        for url in [
+                'http://x.com/a',
+                'http://x.com/a#top',
+                'http://X.COM:80/a',
+                'HTTP://x.com/./a',
+                'http://x.com/b/../a',
+                'http://x.com:/a']:
+            self.assertEqual('http://x.com/a', testobj.canonicalize(url), url)
+
+    def test_empty_path_is_slash(self):
+        testobj = DefaultUrlCanonicalizer()
+        self.assertEqual(
+            'https://x.com/', testobj.canonicalize('https://x.com:443'))
+
+    def test_other_ports_and_userinfo_are_kept(self):
+        testobj = DefaultUrlCanonicalizer()
+        self.assertEqual(
+            'https://User@x.com:80/a',
+            testobj.canonicalize('https://User@X.com:80/a'))
+
+    def test_path_and_query_case_is_kept(self):
+        testobj = DefaultUrlCanonicalizer()
+        self.assertEqual(
+            'http://x.com/A?B=1&a=2',
+            testobj.canonicalize('http://x.com/A?B=1&a=2'))
+
+    def test_other_schemes_are_not_normalized(self):
+        testobj = DefaultUrlCanonicalizer()
+        self.assertEqual(
+            'mailto:Someone@X.com',
+            testobj.canonicalize('mailto:Someone@X.com'))
+
+    def test_query_is_sorted(self):
+        testobj = DefaultUrlCanonicalizer(sort_query=True)
+        self.assertEqual(
+            'http://x.com/a?a=2&b=1',
+            testobj.canonicalize('http://x.com/a?b=1&a=2'))
+
+    def test_query_params_are_dropped(self):
+        testobj = DefaultUrlCanonicalizer(
+            drop_params=['utm_*', 'session'])
+        self.assertEqual(
+            'http://x.com/a?b=1&sessions=3',
+            testobj.canonicalize(
+                'http://x.com/a?utm_source=x&b=1&session=2'
+                '&sessions=3&utm_medium'))
+        self.assertEqual(
+            'http://x.com/a',
+            testobj.canonicalize('http://x.com/a?utm_source=x'))
+
+    def test_disabled_keeps_url(self):
+        testobj = DefaultUrlCanonicalizer(normalize=False)
+        url = 'http://X.com:80/./a?b=1&a=2#top'
+        self.assertEqual(url, testobj.canonicalize(url))
+
+    def test_invalid_url_is_kept(self):
+        testobj = DefaultUrlCanonicalizer()
+        self.assertEqual('http://[x/a', testobj.canonicalize('http://[x/a'))
+
+
+class TestCanonicalVisitedSet(unittest.TestCase):
+
+    def setUp(self):
+        self.visited = ExactVisitedSet()
+        self.testobj = CanonicalVisitedSet(
+            self.visited, DefaultUrlCanonicalizer())
+
+    def test_canonical_form_is_visited(self):
+        self.assertTrue(self.testobj.add('http://X.com/a#top'))
+        self.assertEqual({'http://x.com/a'}, self.visited.urls)
+        self.assertFalse(self.testobj.add('http://x.com/a'))
+
+    def test_key_is_the_key_of_the_wrapped_set(self):
+        self.assertEqual('http://x.com/a', self.testobj.key('http://x.com/a'))
+
+    def test_saved_fetches_are_counted(self):
+        self.assertTrue(self.testobj.add('http://x.com/a'))
+        # the same url again would not have been fetched anyway
+        self.assertFalse(self.testobj.add('http://x.com/a'))
+        self.assertEqual(0, self.testobj.duplicates)
+        self.assertFalse(self.testobj.add('http://x.com/a#top'))
+        self.assertFalse(self.testobj.add('http://x.com/a#top'))
+        self.assertEqual(1, self.testobj.duplicates)
+        self.assertFalse(self.testobj.add('http://x.com:80/a'))
+        self.assertEqual(2, self.testobj.duplicates)
+
+    def test_canonical_url_after_alias_is_counted_once(self):
+        self.assertTrue(self.testobj.add('http://x.com/a#top'))
+        self.assertEqual(0, self.testobj.duplicates)
+        self.assertFalse(self.testobj.add('http://x.com/a'))
+        self.assertFalse(self.testobj.add('http://x.com/a'))
+        self.assertEqual(1, self.testobj.duplicates)
+
+    def test_close_closes_visited_set(self):
+        visited = Mock(spec=ExactVisitedSet)
+        CanonicalVisitedSet(visited, DefaultUrlCanonicalizer()).close()
+        visited.close.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,305 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from aiohttp import ClientConnectionError
+from deadseeker.checkpoint import (
+    DefaultCheckpointFactory,
+    JournalCheckpoint,
+    NoCheckpoint,
+    RestoredError
+)
+from deadseeker.common import SeekerConfig, UrlFetchResponse, UrlTarget
+from deadseeker.depths import NO_LINKS
+
+TEST_HOME = 'http://test.com/'
+TEST_PAGE1 = 'http://test.com/page1.html'
+TEST_PAGE2 = 'http://test.com/page2.html'
+TEST_LOGO = 'http://test.com/logo.png'
+
+
+def response(
+        target: UrlTarget,
+        status: int,
+        error: Exception = None) -> UrlFetchResponse:
+    resp = UrlFetchResponse(target)
+    resp.status = status
+    resp.elapsed = 12.345
+    resp.error = error
+    return resp
+
+
+class TestDefaultCheckpointFactory(unittest.TestCase):
+
+    def setUp(self):
+        self.testobj = DefaultCheckpointFactory()
+        self.config = SeekerConfig()
+
+    def test_no_checkpoint_is_default(self):
+        result = self.testobj.get_checkpoint(self.config)
+        self.assertTrue(isinstance(result, NoCheckpoint))
+
+    def test_journal_with_checkpoint_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.config.checkpoint_file = \
+                os.path.join(directory, 'crawl', 'journal')
+            result = self.testobj.get_checkpoint(self.config)
+            self.assertTrue(isinstance(result, JournalCheckpoint))
+            self.assertEqual(self.config.checkpoint_file, result.path)
+            result.close()
+
+
+class TestNoCheckpoint(unittest.TestCase):
+
+    def test_nothing_is_restored(self):
+        testobj = NoCheckpoint()
+        target = UrlTarget(TEST_HOME, TEST_HOME, 1)
+        testobj.queued(target)
+        testobj.done(response(target, 200))
+        self.assertEqual(([], [], []), testobj.restore())
+        testobj.close()
+
+
+class TestJournalCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'journal')
+        self.home = UrlTarget(TEST_HOME, TEST_HOME, 2)
+        self.page1 = self.home.child(TEST_PAGE1)
+        self.page2 = self.page1.child(TEST_PAGE2)
+        self.logo = self.home.child(TEST_LOGO)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _crawl_partially(self) -> None:
+        testobj = JournalCheckpoint(self.path)
+        testobj.queued(self.home)
+        testobj.expanded(self.home)
+        for target in [self.page1, self.logo]:
+            testobj.queued(target)
+        testobj.done(response(self.home, 200))
+        testobj.expanded(self.page1)
+        testobj.queued(self.page2)
+        testobj.done(response(
+            self.logo, 0, ClientConnectionError('Cannot connect')))
+        testobj.close()
+
+    def _lines(self):
+        with open(self.path) as file:
+            return [json.loads(line) for line in file]
+
+    def test_records_refer_to_their_parent(self):
+        self._crawl_partially()
+        self.assertEqual([
+            ['q', None, TEST_HOME, 2],
+            ['x', 0, 2],
+            ['q', 0, TEST_PAGE1],
+            ['q', 0, TEST_LOGO],
+            ['d', 0, 200, 12.35, None, None],
+            ['x', 1, 1],
+            ['q', 1, TEST_PAGE2],
+            ['d', 2, 0, 12.35, 'ClientConnectionError', 'Cannot connect']
+        ], self._lines())
+
+    def test_redirected_targets_keep_their_number(self):
+        testobj = JournalCheckpoint(self.path)
+        testobj.queued(self.home)
+        testobj.queued(self.page1)
+        self.page1.url = TEST_HOME + 'page1/'
+        testobj.queued(self.page1.child(TEST_PAGE2))
+        testobj.done(response(self.page1, 200))
+        testobj.close()
+        self.assertEqual([
+            ['q', None, TEST_HOME, 2],
+            ['q', 0, TEST_PAGE1],
+            ['q', 1, TEST_PAGE2],
+            ['d', 1, 200, 12.35, None, None, TEST_HOME + 'page1/']
+        ], self._lines())
+
+    def test_resume_restores_redirected_urls(self):
+        testobj = JournalCheckpoint(self.path)
+        testobj.queued(self.home)
+        testobj.queued(self.page1)
+        self.page1.url = TEST_HOME + 'page1/'
+        testobj.queued(self.page1.child(TEST_PAGE2))
+        testobj.done(response(self.page1, 200))
+        testobj.close()
+        testobj = JournalCheckpoint(self.path, resume=True)
+        found, pending, done = testobj.restore()
+        testobj.close()
+        self.assertEqual(
+            [TEST_HOME, TEST_PAGE1, TEST_PAGE2], [url for url, _, _ in found])
+        self.assertEqual(TEST_HOME + 'page1/', done[0].urltarget.url)
+        self.assertEqual(
+            [TEST_HOME, TEST_HOME + 'page1/'], pending[1].parent_urls())
+
+    def test_revisits_are_restored_without_their_responses(self):
+        testobj = JournalCheckpoint(self.path)
+        for target in [self.home, self.page1, self.logo]:
+            testobj.queued(target)
+        revisit = self.home.child(TEST_PAGE2)
+        revisit.revisit = True
+        testobj.queued(revisit)
+        testobj.done(response(revisit, 200))
+        testobj.queued(self.logo.child(TEST_PAGE2))
+        testobj.close()
+        self.assertEqual(['r', 0, TEST_PAGE2], self._lines()[3])
+        testobj = JournalCheckpoint(self.path, resume=True)
+        _, pending, done = testobj.restore()
+        testobj.close()
+        self.assertEqual([], done)
+        self.assertEqual(
+            [False, False, False, False],
+            [target.revisit for target in pending])
+        self.assertEqual(
+            [TEST_HOME, TEST_PAGE1, TEST_LOGO, TEST_PAGE2],
+            [target.url for target in pending])
+
+    def test_resume_restores_pending_targets(self):
+        self._crawl_partially()
+        testobj = JournalCheckpoint(self.path, resume=True)
+        _, pending, _ = testobj.restore()
+        testobj.close()
+        self.assertEqual(
+            [TEST_PAGE1, TEST_PAGE2], [target.url for target in pending])
+        self.assertEqual([1, 0], [target.depth for target in pending])
+        self.assertEqual(
+            [TEST_HOME, TEST_PAGE1], pending[1].parent_urls())
+        self.assertEqual(TEST_HOME, pending[1].home)
+
+    def test_resume_restores_done_responses(self):
+        self._crawl_partially()
+        testobj = JournalCheckpoint(self.path, resume=True)
+        _, _, done = testobj.restore()
+        testobj.close()
+        self.assertEqual([TEST_HOME, TEST_LOGO], [
+            resp.urltarget.url for resp in done])
+        self.assertEqual([200, 0], [resp.status for resp in done])
+        self.assertEqual(12.35, done[0].elapsed)
+        self.assertIsNone(done[0].error)
+        self.assertTrue(isinstance(done[1].error, RestoredError))
+        self.assertEqual('ClientConnectionError', done[1].error.name)
+        self.assertEqual([TEST_HOME], done[1].urltarget.parent_urls())
+
+    def test_resume_restores_queued_urls(self):
+        self._crawl_partially()
+        testobj = JournalCheckpoint(self.path, resume=True)
+        found, _, _ = testobj.restore()
+        testobj.close()
+        self.assertEqual(
+            [TEST_HOME, TEST_PAGE1, TEST_LOGO, TEST_PAGE2],
+            [url for url, _, _ in found])
+        self.assertEqual([2, 1, 1, 0], [depth for _, depth, _ in found])
+        # the logo was done without queuing any links, it had none
+        self.assertEqual(
+            [2, 1, NO_LINKS, None],
+            [expanded for _, _, expanded in found])
+
+    def test_expanded_depth_is_restored(self):
+        testobj = JournalCheckpoint(self.path)
+        testobj.queued(self.home)
+        testobj.queued(self.page1)
+        self.page1.depth = 3
+        testobj.expanded(self.page1)
+        testobj.queued(self.page1.child(TEST_PAGE2))
+        testobj.close()
+        self.assertEqual(['x', 1, 3], self._lines()[2])
+        testobj = JournalCheckpoint(self.path, resume=True)
+        found, pending, _ = testobj.restore()
+        testobj.close()
+        self.assertEqual([3, 2], [target.depth for target in pending[1:]])
+        self.assertEqual((TEST_PAGE1, 1, 3), found[1])
+        self.assertEqual((TEST_PAGE2, 2, None), found[2])
+
+    def test_depth_of_unlimited_crawl_is_not_recorded(self):
+        testobj = JournalCheckpoint(self.path)
+        target = UrlTarget(TEST_HOME, TEST_HOME, -1)
+        testobj.queued(target)
+        testobj.expanded(target)
+        testobj.close()
+        self.assertEqual(1, len(self._lines()))
+
+    def test_url_found_again_is_restored_with_its_depth(self):
+        testobj = JournalCheckpoint(self.path)
+        for target in [self.home, self.page1, self.page2]:
+            testobj.queued(target)
+        testobj.found(self.home, TEST_PAGE2)
+        testobj.close()
+        self.assertEqual(['f', 0, TEST_PAGE2], self._lines()[3])
+        testobj = JournalCheckpoint(self.path, resume=True)
+        found, pending, _ = testobj.restore()
+        testobj.close()
+        self.assertEqual(3, len(pending))
+        self.assertEqual(
+            [(TEST_PAGE2, 0, None), (TEST_PAGE2, 1, None)], found[2:])
+
+    def test_restored_only_once(self):
+        self._crawl_partially()
+        testobj = JournalCheckpoint(self.path, resume=True)
+        testobj.restore()
+        self.assertEqual(([], [], []), testobj.restore())
+        testobj.close()
+
+    def test_resumed_journal_is_appended_to(self):
+        self._crawl_partially()
+        testobj = JournalCheckpoint(self.path, resume=True)
+        _, pending, _ = testobj.restore()
+        testobj.done(response(pending[1], 200))
+        testobj.close()
+        self.assertEqual(['d', 3, 200, 12.35, None, None], self._lines()[-1])
+        testobj = JournalCheckpoint(self.path, resume=True)
+        _, pending, done = testobj.restore()
+        testobj.close()
+        self.assertEqual([TEST_PAGE1], [target.url for target in pending])
+        self.assertEqual(3, len(done))
+
+    def test_restored_error_keeps_its_name(self):
+        self._crawl_partially()
+        testobj = JournalCheckpoint(self.path, resume=True)
+        _, _, done = testobj.restore()
+        testobj.done(done[1])
+        testobj.close()
+        self.assertEqual('ClientConnectionError', self._lines()[-1][4])
+
+    def test_incomplete_last_line_is_dropped(self):
+        self._crawl_partially()
+        with open(self.path, 'a') as file:
+            file.write('["q",1,"http://test.com/pa')
+        testobj = JournalCheckpoint(self.path, resume=True)
+        _, pending, done = testobj.restore()
+        testobj.queued(self.page2.child(TEST_HOME + 'page3.html'))
+        testobj.close()
+        self.assertEqual(2, len(pending))
+        self.assertEqual(2, len(done))
+        self.assertEqual(['q', 3, TEST_HOME + 'page3.html'], self._lines()[-1])
+
+    def test_journal_starts_over_without_resume(self):
+        self._crawl_partially()
+        testobj = JournalCheckpoint(self.path)
+        self.assertEqual(([], [], []), testobj.restore())
+        testobj.close()
+        self.assertEqual([], self._lines())
+
+    def test_resume_without_journal_starts_over(self):
+        testobj = JournalCheckpoint(self.path, resume=True)
+        self.assertEqual(([], [], []), testobj.restore())
+        testobj.close()
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_records_are_written_periodically(self):
+        with patch('time.monotonic') as monotonic:
+            monotonic.return_value = 100.0
+            testobj = JournalCheckpoint(self.path)
+            testobj.queued(self.home)
+            self.assertEqual([], self._lines())
+            monotonic.return_value = 105.0
+            testobj.queued(self.page1)
+            self.assertEqual(2, len(self._lines()))
+            testobj.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
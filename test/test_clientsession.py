@@ -1,13 +1,20 @@
 import unittest
 from aiounittest import AsyncTestCase
 from unittest.mock import Mock, patch
-from deadseeker.clientsession import DefaultClientSessionFactory
-from deadseeker.common import SeekerConfig
+from deadseeker.clientsession import (
+    BudgetedRetry,
+    BudgetedSession,
+    DefaultClientSessionFactory,
+    RetriedError
+)
+from deadseeker.common import SeekerConfig, SeekResults
+from deadseeker.retrybudget import RetryBudget
 import aiohttp
 import asyncio
 from types import SimpleNamespace
 from aiohttp import TraceRequestStartParams
 from aiohttp_retry.types import ClientType
+from aioresponses import aioresponses
 import logging
 
 
@@ -23,11 +30,13 @@ class TestDefaultClientSessionFactory(AsyncTestCase):
         self.config.max_tries = 3
         self.config.max_time = 45
         self.config.connect_limit_per_host = 0
+        self.config.adaptive_connect_limit = False
         self.config.timeout = 60
+        self.retrybudget = RetryBudget(10, 5)
         self.retryclient_mock = patch('deadseeker.clientsession.RetryClient')
         self.retryclient = self.retryclient_mock.start()
         self.exponentialretry_mock = patch(
-            'deadseeker.clientsession.ExponentialRetry')
+            'deadseeker.clientsession.BudgetedRetry')
         self.exponentialretry = self.exponentialretry_mock.start()
         self.traceconfig_mock = patch(
             'deadseeker.clientsession.TraceConfig')
@@ -39,8 +48,12 @@ class TestDefaultClientSessionFactory(AsyncTestCase):
         self.clienttimeout_patch = patch(
             'deadseeker.clientsession.ClientTimeout')
         self.clienttimeout = self.clienttimeout_patch.start()
+        self.clientsession_patch = patch(
+            'deadseeker.clientsession.aiohttp.ClientSession')
+        self.clientsession = self.clientsession_patch.start()
 
     def tearDown(self):
+        self.clientsession_patch.stop()
         self.retryclient_mock.stop()
         self.exponentialretry_mock.stop()
         self.traceconfig_mock.stop()
@@ -49,31 +62,44 @@ class TestDefaultClientSessionFactory(AsyncTestCase):
 
     def test_retryclient_returned(self):
         actualresult = self.testObj.get_client_session(
-                self.config)
+                self.config, self.retrybudget)
         self.assertIs(actualresult, self.retryclient.return_value)
         self.clienttimeout.assert_called_with(total=60)
-        self.retryclient.assert_called_with(
-                raise_for_status=True,
+        self.clientsession.assert_called_with(
                 connector=self.tcpconnector.return_value,
                 timeout=self.clienttimeout.return_value,
                 headers={'User-Agent': TEST_AGENT},
-                retry_options=self.exponentialretry.return_value,
                 trace_configs=[self.traceconfig.return_value])
+        self.retryclient.assert_called_once()
+        kwargs = self.retryclient.call_args.kwargs
+        self.assertTrue(kwargs['raise_for_status'])
+        self.assertIs(
+            self.exponentialretry.return_value, kwargs['retry_options'])
+        session = kwargs['client_session']
+        self.assertTrue(isinstance(session, BudgetedSession))
+        self.assertIs(self.clientsession.return_value, session.session)
+        self.assertIs(
+            self.exponentialretry.return_value, session.retry_options)
 
     def test_retry_options_configuration(self):
         self.testObj.get_client_session(
-                self.config)
+                self.config, self.retrybudget)
         self.exponentialretry.assert_called_with(
+                            self.testObj.retrybudget,
                             attempts=self.config.max_tries,
                             max_timeout=self.config.max_time,
+                            statuses=set(range(500, 600)) - {503},
+                            retry_all_server_errors=False,
                             exceptions={
-                                aiohttp.ClientError,
+                                aiohttp.ClientConnectionError,
+                                aiohttp.ClientPayloadError,
                                 asyncio.TimeoutError
                             })
+        self.assertIs(self.retrybudget, self.testObj.retrybudget)
 
     async def test_traceconfig_configuration(self):
         self.testObj.get_client_session(
-                self.config)
+                self.config, self.retrybudget)
         self.traceconfig.assert_called_once()
         instance = self.traceconfig.return_value
         append = instance.on_request_start.append
@@ -91,6 +117,7 @@ class TestDefaultClientSessionFactory(AsyncTestCase):
         with patch.object(logger, 'warning') as warning_mock:
             await func(session, trace_config_ctx, params)
             warning_mock.assert_not_called()
+        self.assertEqual(1, self.testObj.retrybudget.requests)
         ctx['current_attempt'] = 2
         with patch.object(logger, 'warning') as warning_mock:
             await func(session, trace_config_ctx, params)
@@ -103,11 +130,22 @@ class TestDefaultClientSessionFactory(AsyncTestCase):
             warning_mock.assert_called_with(
                     '::warn ::Retry Attempt #3 ' +
                     'of 3: http://test.com/')
+        self.assertEqual(1, self.testObj.retrybudget.requests)
+
+    def test_statistics_of_the_last_session_are_added(self):
+        self.testObj.get_client_session(
+                self.config, self.retrybudget)
+        self.testObj.retrybudget.requests = 20
+        self.testObj.retrybudget.retries = 3
+        results = SeekResults()
+        self.testObj.add_statistics(results)
+        self.assertEqual(20, results.requests)
+        self.assertEqual(3, results.retries)
 
     def test_zero_used_if_connect_limit_is_zero(self):
         self.config.connect_limit_per_host = 0
         self.testObj.get_client_session(
-                self.config)
+                self.config, self.retrybudget)
         self.tcpconnector.assert_called_with(
             limit_per_host=0,
             ttl_dns_cache=600
@@ -116,7 +154,7 @@ class TestDefaultClientSessionFactory(AsyncTestCase):
     def test_zero_used_if_connect_limit_lt_zero(self):
         self.config.connect_limit_per_host = -100
         self.testObj.get_client_session(
-                self.config)
+                self.config, self.retrybudget)
         self.tcpconnector.assert_called_with(
             limit_per_host=0,
             ttl_dns_cache=600
@@ -125,12 +163,102 @@ class TestDefaultClientSessionFactory(AsyncTestCase):
     def test_one_used_if_connect_limit_is_one(self):
         self.config.connect_limit_per_host = 1
         self.testObj.get_client_session(
-                self.config)
+                self.config, self.retrybudget)
         self.tcpconnector.assert_called_with(
             limit_per_host=1,
             ttl_dns_cache=600
         )
 
+    def test_max_used_if_connect_limit_is_adaptive(self):
+        self.config.connect_limit_per_host = 10
+        self.config.adaptive_connect_limit = True
+        self.config.max_connect_limit_per_host = 50
+        self.testObj.get_client_session(
+                self.config, self.retrybudget)
+        self.tcpconnector.assert_called_with(
+            limit_per_host=50,
+            ttl_dns_cache=600
+        )
+
+
+class TestBudgetedRetry(unittest.TestCase):
+
+    def setUp(self):
+        self.budget = RetryBudget(1)
+        self.testObj = BudgetedRetry(
+            self.budget, attempts=3, statuses={500},
+            exceptions={asyncio.TimeoutError})
+
+    def test_retries_while_the_budget_allows(self):
+        self.assertIn(500, self.testObj.statuses)
+        self.assertNotIn(404, self.testObj.statuses)
+        self.assertTrue(self.testObj.retries(asyncio.TimeoutError(), 1))
+
+    def test_only_retried_errors_are_raised_to_aiohttp_retry(self):
+        self.assertEqual({RetriedError}, self.testObj.exceptions)
+
+    def test_retrying_spends_the_budget(self):
+        self.assertEqual(0.2, self.testObj.get_timeout(1))
+        self.assertEqual(1, self.budget.retries)
+        self.assertNotIn(500, self.testObj.statuses)
+        self.assertFalse(self.testObj.retries(asyncio.TimeoutError(), 1))
+
+    def test_last_attempt_is_not_retried(self):
+        self.assertFalse(self.testObj.retries(asyncio.TimeoutError(), 3))
+
+    def test_budget_is_only_asked_about_errors_to_retry(self):
+        self.budget.retry()
+        logger = logging.getLogger('deadseeker.retrybudget')
+        with patch.object(logger, 'warning') as warning_mock:
+            self.assertNotIn(200, self.testObj.statuses)
+            self.assertFalse(
+                self.testObj.retries(aiohttp.ClientPayloadError(), 1))
+            self.assertFalse(
+                self.testObj.retries(asyncio.TimeoutError(), 3))
+            warning_mock.assert_not_called()
+
+
+class TestBudgetedSession(AsyncTestCase):
+
+    def setUp(self):
+        self.config = SeekerConfig()
+        self.config.max_tries = 3
+        self.config.max_time = 0.01
+        self.budget = RetryBudget(1)
+        self.testObj = DefaultClientSessionFactory()
+
+    async def test_budget_is_spent_on_a_raised_exception(self):
+        with aioresponses() as m:
+            m.get('http://test.com/', exception=aiohttp.ClientConnectionError())
+            m.get('http://test.com/', status=200)
+            async with self.testObj.get_client_session(
+                    self.config, self.budget) as session:
+                async with session.get('http://test.com/') as response:
+                    self.assertEqual(200, response.status)
+        self.assertEqual(1, self.budget.retries)
+
+    async def test_error_is_raised_as_it_is_once_the_budget_is_spent(self):
+        self.budget.retry()
+        with aioresponses() as m:
+            m.get('http://test.com/', exception=asyncio.TimeoutError())
+            m.get('http://test.com/', status=200)
+            async with self.testObj.get_client_session(
+                    self.config, self.budget) as session:
+                with self.assertRaises(asyncio.TimeoutError):
+                    async with session.get('http://test.com/'):
+                        pass
+        self.assertEqual(1, self.budget.retries)
+
+    async def test_other_errors_are_not_retried(self):
+        with aioresponses() as m:
+            m.get('http://test.com/', exception=ValueError())
+            async with self.testObj.get_client_session(
+                    self.config, self.budget) as session:
+                with self.assertRaises(ValueError):
+                    async with session.get('http://test.com/'):
+                        pass
+        self.assertEqual(0, self.budget.retries)
+
 
 if __name__ == '__main__':
     unittest.main()
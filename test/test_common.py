@@ -44,10 +44,115 @@ class TestSeekerConfig(unittest.TestCase):
         self.assertEqual(
             self.testobj.connect_limit_per_host, 10)
 
+    def test_default_adaptive_connect_limit(self):
+        self.assertFalse(self.testobj.adaptive_connect_limit)
+
+    def test_default_min_connect_limit_per_host(self):
+        self.assertEqual(
+            self.testobj.min_connect_limit_per_host, 1)
+
+    def test_default_max_connect_limit_per_host(self):
+        self.assertEqual(
+            self.testobj.max_connect_limit_per_host, 100)
+
+    def test_default_requests_per_second_per_host(self):
+        self.assertEqual(
+            self.testobj.requests_per_second_per_host, 0)
+
+    def test_default_retry_budget(self):
+        self.assertEqual(
+            self.testobj.retry_budget, -1)
+
+    def test_default_retry_budget_percent(self):
+        self.assertEqual(
+            self.testobj.retry_budget_percent, 0)
+
+    def test_default_circuit_breaker_threshold(self):
+        self.assertEqual(
+            self.testobj.circuit_breaker_threshold, 0)
+
+    def test_default_circuit_breaker_cooldown(self):
+        self.assertEqual(
+            self.testobj.circuit_breaker_cooldown, 30)
+
     def test_default_timeout(self):
         self.assertEqual(
             self.testobj.timeout, 60)
 
+    def test_default_deadline(self):
+        self.assertEqual(
+            self.testobj.deadline, 0)
+
+    def test_default_max_failures(self):
+        self.assertEqual(
+            self.testobj.max_failures, 0)
+
+    def test_default_max_concurrent_requests(self):
+        self.assertEqual(
+            self.testobj.max_concurrent_requests, 100)
+
+    def test_default_max_frontier_size(self):
+        self.assertEqual(
+            self.testobj.max_frontier_size, 10000)
+
+    def test_default_frontier_memory_size(self):
+        self.assertEqual(
+            self.testobj.frontier_memory_size, 0)
+
+    def test_default_frontier_spill_dir(self):
+        self.assertIsNone(self.testobj.frontier_spill_dir)
+
+    def test_default_visited_index(self):
+        self.assertEqual(self.testobj.visited_index, 'hashed')
+
+    def test_default_visited_hash_bits(self):
+        self.assertEqual(self.testobj.visited_hash_bits, 64)
+
+    def test_default_visited_bloom_capacity(self):
+        self.assertEqual(self.testobj.visited_bloom_capacity, 1000000)
+
+    def test_default_canonicalize_urls(self):
+        self.assertTrue(self.testobj.canonicalize_urls)
+
+    def test_default_sort_query_params(self):
+        self.assertFalse(self.testobj.sort_query_params)
+
+    def test_default_drop_query_params(self):
+        self.assertEqual(self.testobj.drop_query_params, [])
+
+    def test_default_max_referrers(self):
+        self.assertEqual(self.testobj.max_referrers, 100)
+
+    def test_default_cache_dir(self):
+        self.assertIsNone(self.testobj.cache_dir)
+
+    def test_default_checkpoint_file(self):
+        self.assertIsNone(self.testobj.checkpoint_file)
+
+    def test_default_resume(self):
+        self.assertFalse(self.testobj.resume)
+
+    def test_default_offsite_cache_ttl(self):
+        self.assertEqual(self.testobj.offsite_cache_ttl, 0)
+
+    def test_default_stream_html(self):
+        self.assertFalse(self.testobj.stream_html)
+
+    def test_default_parse_workers(self):
+        self.assertEqual(self.testobj.parse_workers, 0)
+
+    def test_default_parse_process_threshold(self):
+        self.assertEqual(self.testobj.parse_process_threshold, 262144)
+
+    def test_default_html_parser(self):
+        self.assertEqual(self.testobj.html_parser, 'html.parser')
+
+    def test_default_link_cache_size(self):
+        self.assertEqual(self.testobj.link_cache_size, 10000)
+
+    def test_default_use_uvloop(self):
+        self.assertFalse(self.testobj.use_uvloop)
+
     def test_default_include_prefix(self):
         self.assertEqual(
             self.testobj.includeprefix, [])
@@ -72,6 +177,18 @@ class TestSeekerConfig(unittest.TestCase):
         self.assertEqual(
             self.testobj.excludecontained, [])
 
+    def test_default_include_regex(self):
+        self.assertEqual(self.testobj.includeregex, [])
+
+    def test_default_exclude_regex(self):
+        self.assertEqual(self.testobj.excluderegex, [])
+
+    def test_default_include_glob(self):
+        self.assertEqual(self.testobj.includeglob, [])
+
+    def test_default_exclude_glob(self):
+        self.assertEqual(self.testobj.excludeglob, [])
+
     def test_default_alwaysgetonsite(self):
         self.assertEqual(
             self.testobj.alwaysgetonsite, False)
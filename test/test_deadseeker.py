@@ -1,14 +1,22 @@
+import asyncio
 import logging
+import os
+import tempfile
+import time
 import unittest
 from unittest.mock import Mock, patch
-from typing import List
+from typing import Callable, Dict, List
 from .asyncmock import AsyncContextManagerMock
 from deadseeker.common import (
+    CachedResponse,
+    HostStats,
     SeekerConfig,
+    SeekResults,
     UrlFetchResponseHandler,
     UrlFetchResponse,
     UrlTarget
 )
+import deadseeker.deadseeker
 from deadseeker.deadseeker import DeadSeeker
 from deadseeker.clientsession import (
     ClientSessionFactory,
@@ -29,10 +37,23 @@ from deadseeker.linkparser import (
     LinkParserFactory,
     LinkParser
 )
+from deadseeker.visited import DefaultVisitedSetFactory
+from deadseeker.checkpoint import DefaultCheckpointFactory
+from deadseeker.canonicalizer import DefaultUrlCanonicalizerFactory
+from deadseeker.responsecache import (
+    DefaultResponseCacheFactory,
+    SqliteResponseCache,
+    links_fingerprint
+)
+from deadseeker.canonicalizer import DefaultUrlCanonicalizer
 from deadseeker.timer import Timer
+from deadseeker.urlresolver import UrlResolver
 from aiohttp import ClientResponseError, ClientError
+from aioresponses import aioresponses, CallbackResult
 from aiohttp_retry.types import ClientType
 
+UVLOOP_INSTALLED = deadseeker.deadseeker.uvloop is not None
+
 
 # Preparing test data to represent two web sites, test1.com and test2.com
 # test1 will only have links to itself, but will us various types of links
@@ -72,6 +93,21 @@ TEST3_HTML_PAGE1 = 'test3_page1'
 TEST3_URL_PAGE2 = 'https://www.test3.com/page2/index.html'
 TEST3_HTML_PAGE2 = 'test3_page2'
 
+# test4 has a short path to page x through a slow page and a longer one
+TEST4_URL_HOME = 'http://www.test4.com/'
+TEST4_HTML_HOME = 'test4_home'
+TEST4_URL_SLOW = 'http://www.test4.com/slow.html'
+TEST4_HTML_SLOW = 'test4_slow'
+TEST4_URL_B = 'http://www.test4.com/b.html'
+TEST4_HTML_B = 'test4_b'
+TEST4_URL_C = 'http://www.test4.com/c.html'
+TEST4_HTML_C = 'test4_c'
+TEST4_URL_X = 'http://www.test4.com/x.html'
+TEST4_HTML_X = 'test4_x'
+TEST4_URL_Y = 'http://www.test4.com/y.html'
+TEST4_HTML_Y = 'test4_y'
+TEST4_URL_Z = 'http://www.test4.com/z.html'
+
 ERROR_404 = ClientResponseError(None, None, status=404)
 ERROR_CONNECTION = ClientError()
 
@@ -97,6 +133,9 @@ class MockedResponseCreator:
         elif not isinstance(self.error, ClientError):
             result.status = 200
         result.html = None
+        result.links = None
+        result.cache_entry = None
+        result.retry_in = None
         if urltarget.home in urltarget.url:
             result.html = self.html
         return result
@@ -129,7 +168,14 @@ TEST_RESPONSES_BY_URL = {
     TEST3_URL_PAGE1:
         MockedResponseCreator(html=TEST3_HTML_PAGE1),
     TEST3_URL_PAGE2:
-        MockedResponseCreator(html=TEST3_HTML_PAGE2)
+        MockedResponseCreator(html=TEST3_HTML_PAGE2),
+    TEST4_URL_HOME: MockedResponseCreator(html=TEST4_HTML_HOME),
+    TEST4_URL_SLOW: MockedResponseCreator(html=TEST4_HTML_SLOW),
+    TEST4_URL_B: MockedResponseCreator(html=TEST4_HTML_B),
+    TEST4_URL_C: MockedResponseCreator(html=TEST4_HTML_C),
+    TEST4_URL_X: MockedResponseCreator(html=TEST4_HTML_X),
+    TEST4_URL_Y: MockedResponseCreator(html=TEST4_HTML_Y),
+    TEST4_URL_Z: MockedResponseCreator()
 }
 
 TEST_PARSE_RESULTS_BY_HTML = {
@@ -191,7 +237,26 @@ TEST_PARSE_RESULTS_BY_HTML = {
         '//www.test3.com/page2/index.html'
     ],
     TEST3_HTML_PAGE1: [],
-    TEST3_HTML_PAGE2: []
+    TEST3_HTML_PAGE2: [],
+    TEST4_HTML_HOME: [
+        TEST4_URL_SLOW,
+        TEST4_URL_B
+    ],
+    TEST4_HTML_SLOW: [
+        TEST4_URL_X
+    ],
+    TEST4_HTML_B: [
+        TEST4_URL_C
+    ],
+    TEST4_HTML_C: [
+        TEST4_URL_X
+    ],
+    TEST4_HTML_X: [
+        TEST4_URL_Y
+    ],
+    TEST4_HTML_Y: [
+        TEST4_URL_Z
+    ]
 }
 
 
@@ -204,6 +269,25 @@ class TestDeadSeeker(unittest.TestCase):
     def setUp(self):
         self.config = Mock(spec=SeekerConfig)
         self.config.max_depth = -1
+        self.config.max_concurrent_requests = 10
+        self.config.timeout = 60
+        self.config.deadline = 0
+        self.config.max_failures = 0
+        self.config.max_frontier_size = 1000
+        self.config.frontier_memory_size = 0
+        self.config.frontier_spill_dir = None
+        self.config.visited_index = 'hashed'
+        self.config.visited_hash_bits = 64
+        self.config.canonicalize_urls = True
+        self.config.sort_query_params = False
+        self.config.drop_query_params = []
+        self.config.max_referrers = 100
+        self.config.cache_dir = None
+        self.config.checkpoint_file = None
+        self.config.resume = False
+        self.config.retry_budget = 10
+        self.config.retry_budget_percent = 5
+        self.config.use_uvloop = False
         self.testobj = DeadSeeker(self.config)
         self.testobj.clientsessionfactory = Mock(spec=ClientSessionFactory)
         self.session = AsyncContextManagerMock()
@@ -239,6 +323,8 @@ class TestDeadSeeker(unittest.TestCase):
 
         linkparser = Mock(spec=LinkParser)
         linkparser.parse.side_effect = parse_mock
+        linkparser.parse_async.side_effect = parse_mock
+        self.linkparser = linkparser
 
         def get_link_parser_mock(
                 config: SeekerConfig, linkacceptor: LinkAcceptor):
@@ -264,11 +350,47 @@ class TestDeadSeeker(unittest.TestCase):
             results = self.testobj.seek(TEST1_URL_HOME)
             error_mock.assert_not_called()
             info_mock.assert_not_called()
+            debug_mock.assert_any_call('URL canonicalization saved 0 fetches')
+            debug_mock.assert_any_call(
+                'Skipped 0 HEAD requests to hosts without HEAD support')
+            debug_mock.assert_any_call(
+                'Link acceptance cache: 0 hits, 0 misses')
+            debug_mock.assert_any_call(
+                'Link resolution cache: 0 hits, 0 misses')
+            debug_mock.assert_any_call('Retried 0 of 0 requests')
             debug_mock.assert_called_with('Process took 4000.00 ms')
 
         results = self.testobj.seek(TEST1_URL_HOME)
         self.assertEqual(4000.0, results.elapsed, 'Elapsed time is not 4.0')
 
+    def test_host_limits_are_debug_logged(self):
+        host = HostStats('www.mysite.com', 4)
+        host.limit = 6.5
+        host.peak_limit = 9
+        host.requests = 30
+        host.throttled = 2
+        host.backoffs = 1
+        host.retries = 3
+        host.paused = 2.5
+        host.circuit_opens = 1
+        host.failed_fast = 12
+        unlimited = HostStats('www.othersite.com', 0)
+
+        def add_statistics(results):
+            results.hosts = [host, unlimited]
+        self.responsefetcher.add_statistics.side_effect = add_statistics
+        with patch.object(self.logger, 'debug') as debug_mock:
+            self.testobj.seek(TEST1_URL_HOME)
+            debug_mock.assert_any_call(
+                'Host www.mysite.com: limit 6.5 (peak 9.0), 30 requests,'
+                ' 2 throttled, 1 backoffs, 3 retries, paused 2.5 s,'
+                ' down 1 times, 12 failed fast')
+            debug_mock.assert_any_call(
+                'Host www.othersite.com: no limit, 0 requests,'
+                ' 0 throttled, 0 backoffs, 0 retries, paused 0.0 s,'
+                ' down 0 times, 0 failed fast')
+            debug_mock.assert_called_with('Process took 4000.00 ms')
+
     def test_site1_is_fully_crawled(self):
         results = self.testobj.seek(TEST1_URL_HOME)
         successes = get_urls(results.successes)
@@ -355,6 +477,478 @@ class TestDeadSeeker(unittest.TestCase):
         self.assertEqual(failures, [])
         self.assertEqual(4000.0, results.elapsed)
 
+    def test_slow_response_does_not_block_next_depth(self):
+        fetch_response_mock = self.responsefetcher.fetch_response.side_effect
+
+        async def slow_logo_fetch_response_mock(
+                session: ClientType, urltarget: UrlTarget):
+            if urltarget.url == TEST1_URL_LOGO:
+                await asyncio.sleep(0.1)
+            return fetch_response_mock(session, urltarget)
+
+        self.responsefetcher.fetch_response.side_effect = \
+            slow_logo_fetch_response_mock
+        results = self.testobj.seek(TEST1_URL_HOME)
+        successes = get_urls(results.successes)
+        self.assertEqual(successes, [
+            TEST1_URL_HOME,
+            TEST1_URL_FAVICON,
+            TEST1_URL_PAGE1,
+            TEST1_URL_PAGE2,
+            TEST1_URL_PAGE3,
+            TEST1_URL_PAGE4,
+            TEST1_URL_PAGE5,
+            TEST1_URL_LOGO
+        ])
+
+    def test_links_are_queued_again_with_more_depth_left(self):
+        self.config.max_depth = 3
+        fetch_response_mock = self.responsefetcher.fetch_response.side_effect
+        fetched: List[str] = []
+
+        async def slow_page_fetch_response_mock(
+                session: ClientType, urltarget: UrlTarget):
+            fetched.append(urltarget.url)
+            if urltarget.url == TEST4_URL_SLOW:
+                await asyncio.sleep(0.1)
+            return fetch_response_mock(session, urltarget)
+
+        self.responsefetcher.fetch_response.side_effect = \
+            slow_page_fetch_response_mock
+        results = self.testobj.seek(TEST4_URL_HOME, self.responsehandler)
+        successes = get_urls(results.successes)
+        self.assertEqual(successes, [
+            TEST4_URL_HOME,
+            TEST4_URL_B,
+            TEST4_URL_C,
+            TEST4_URL_X,
+            TEST4_URL_SLOW,
+            TEST4_URL_Y
+        ])
+        self.assertEqual(
+            6, self.responsehandler.handle_response.call_count)
+        self.assertEqual(2, fetched.count(TEST4_URL_X))
+        y = results.successes[-1].urltarget
+        self.assertEqual(
+            [TEST4_URL_HOME, TEST4_URL_SLOW, TEST4_URL_X], y.parent_urls())
+
+    def test_requests_in_flight_are_cancelled_at_the_deadline(self):
+        self.config.deadline = 0.2
+        self.config.timeout = 0
+        fetch_response_mock = self.responsefetcher.fetch_response.side_effect
+
+        async def hanging_logo_fetch_response_mock(
+                session: ClientType, urltarget: UrlTarget):
+            if urltarget.url == TEST1_URL_LOGO:
+                await asyncio.sleep(10)
+            return fetch_response_mock(session, urltarget)
+
+        self.responsefetcher.fetch_response.side_effect = \
+            hanging_logo_fetch_response_mock
+        with patch.object(self.logger, 'warning') as warning_mock:
+            results = self.testobj.seek(TEST1_URL_HOME)
+            warning_mock.assert_called_once_with(
+                '::warn ::Stopped at the deadline of 0.2 s,'
+                ' 1 urls were left unvisited')
+        self.assertEqual(7, len(results.successes))
+        self.assertNotIn(TEST1_URL_LOGO, get_urls(results.successes))
+        self.assertEqual(1, results.unvisited)
+
+    def test_requests_in_flight_are_cancelled_with_the_crawl(self):
+        fetch_response_mock = self.responsefetcher.fetch_response.side_effect
+        events: List[str] = []
+
+        async def hanging_logo_fetch_response_mock(
+                session: ClientType, urltarget: UrlTarget):
+            if urltarget.url == TEST1_URL_LOGO:
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    events.append('cancelled')
+                    raise
+            return fetch_response_mock(session, urltarget)
+
+        self.responsefetcher.fetch_response.side_effect = \
+            hanging_logo_fetch_response_mock
+        self.linkparser.close.side_effect = \
+            lambda wait: events.append(f'closed, wait={wait}')
+
+        async def cancelled_seek() -> None:
+            await asyncio.wait_for(
+                self.testobj._main([TEST1_URL_HOME]), timeout=0.2)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(cancelled_seek())
+        # nothing is left running once the crawl is closed
+        self.assertEqual(['cancelled', 'closed, wait=False'], events)
+
+    def test_no_new_requests_are_sent_close_to_the_deadline(self):
+        self.config.deadline = 0.5
+        self.config.timeout = 60
+        fetch_response_mock = self.responsefetcher.fetch_response.side_effect
+
+        async def slow_home_fetch_response_mock(
+                session: ClientType, urltarget: UrlTarget):
+            if urltarget.url == TEST1_URL_HOME:
+                # past the last tenth of the time
+                await asyncio.sleep(0.47)
+            return fetch_response_mock(session, urltarget)
+
+        self.responsefetcher.fetch_response.side_effect = \
+            slow_home_fetch_response_mock
+        results = self.testobj.seek(TEST1_URL_HOME)
+        self.assertEqual([TEST1_URL_HOME], get_urls(results.successes))
+        self.assertEqual(3, results.unvisited)
+
+    def test_nothing_is_unvisited_before_the_deadline(self):
+        self.config.deadline = 10
+        with patch.object(self.logger, 'warning') as warning_mock:
+            results = self.testobj.seek(TEST1_URL_HOME)
+            warning_mock.assert_not_called()
+        self.assertEqual(8, len(results.successes))
+        self.assertEqual(0, results.unvisited)
+
+    def test_site1_and_site2_crawls_all_with_small_frontier(self):
+        self.config.max_concurrent_requests = 2
+        self.config.max_frontier_size = 1
+        results = self.testobj.seek([TEST1_URL_HOME, TEST2_URL_HOME])
+        self.assertEqual(12, len(results.successes))
+        self.assertEqual(2, len(results.failures))
+
+    def test_site1_and_site2_crawls_all_with_spilled_frontier(self):
+        self.config.frontier_memory_size = 1
+        results = self.testobj.seek([TEST1_URL_HOME, TEST2_URL_HOME])
+        successes = get_urls(results.successes)
+        self.assertEqual(successes, [
+            TEST1_URL_HOME,
+            TEST2_URL_HOME,
+            TEST1_URL_FAVICON,
+            TEST1_URL_LOGO,
+            TEST1_URL_PAGE1,
+            TEST2_URL_PAGE1,
+            TEST1_URL_PAGE2,
+            TEST2_URL_PAGE2,
+            TEST1_URL_PAGE3,
+            TEST1_URL_PAGE4,
+            TEST2_URL_PAGE3,
+            TEST1_URL_PAGE5
+        ])
+        page5 = results.successes[-1].urltarget
+        self.assertEqual(
+            [TEST1_URL_HOME, TEST1_URL_PAGE1, TEST1_URL_PAGE2,
+             TEST1_URL_PAGE4],
+            page5.parent_urls())
+
+    def test_site1_and_site2_crawls_all_with_bloom_visited_set(self):
+        self.config.visited_index = 'bloom'
+        self.config.visited_bloom_capacity = 100
+        results = self.testobj.seek([TEST1_URL_HOME, TEST2_URL_HOME])
+        self.assertEqual(12, len(results.successes))
+        self.assertEqual(2, len(results.failures))
+
+    def test_duplicate_seeds_are_fetched_once(self):
+        results = self.testobj.seek([TEST3_URL_HOME, TEST3_URL_HOME])
+        successes = get_urls(results.successes)
+        self.assertEqual(successes, [
+            TEST3_URL_HOME,
+            TEST3_URL_PAGE1,
+            TEST3_URL_PAGE2
+        ])
+
+    def test_canonical_duplicates_are_fetched_once(self):
+        parse_mock = self.linkparser.parse_async.side_effect
+
+        def aliasing_parse_mock(resp: UrlFetchResponse):
+            links = parse_mock(resp)
+            if resp.urltarget.url == TEST3_URL_HOME:
+                links = links + [
+                    TEST3_URL_PAGE1 + '#top',
+                    TEST3_URL_PAGE1 + '#top',
+                    'HTTPS://WWW.TEST3.COM:443/page1/index.html',
+                    'https://www.test3.com/page1/../page2/index.html'
+                ]
+            return links
+
+        self.linkparser.parse_async.side_effect = aliasing_parse_mock
+        results = self.testobj.seek(TEST3_URL_HOME)
+        successes = get_urls(results.successes)
+        self.assertEqual(successes, [
+            TEST3_URL_HOME,
+            TEST3_URL_PAGE1,
+            TEST3_URL_PAGE2
+        ])
+        self.assertEqual(3, results.canonical_duplicates)
+
+    def test_repeated_links_of_a_page_are_resolved_once(self):
+        parse_mock = self.linkparser.parse_async.side_effect
+
+        def repeating_parse_mock(resp: UrlFetchResponse):
+            return parse_mock(resp) * 3
+
+        self.linkparser.parse_async.side_effect = repeating_parse_mock
+        resolve = UrlResolver.resolve
+        with patch.object(
+                UrlResolver, 'resolve', autospec=True,
+                side_effect=resolve) as resolve_mock:
+            results = self.testobj.seek(TEST3_URL_HOME)
+        self.assertEqual(3, len(results.successes))
+        resolved = [
+            (call.args[0].base, call.args[1])
+            for call in resolve_mock.call_args_list]
+        self.assertTrue(resolved)
+        self.assertEqual(len(set(resolved)), len(resolved))
+
+    def test_failures_have_all_referrers(self):
+        results = self.testobj.seek(TEST2_URL_HOME)
+        self.assertEqual(2, len(results.failures))
+        for failure in results.failures:
+            self.assertEqual(4, failure.referrer_count)
+            self.assertEqual([
+                TEST2_URL_HOME,
+                TEST2_URL_PAGE1,
+                TEST2_URL_PAGE2,
+                TEST2_URL_PAGE3
+            ], failure.referrers)
+
+    def test_crawl_stops_after_max_failures(self):
+        self.config.max_failures = 1
+        fetch_response_mock = self.responsefetcher.fetch_response.side_effect
+
+        async def hanging_fetch_response_mock(
+                session: ClientType, urltarget: UrlTarget):
+            if urltarget.url in [TEST2_URL_LOGO, TEST2_URL_PAGE1]:
+                await asyncio.sleep(10)
+            return fetch_response_mock(session, urltarget)
+
+        self.responsefetcher.fetch_response.side_effect = \
+            hanging_fetch_response_mock
+        started = time.monotonic()
+        with patch.object(self.logger, 'warning') as warning_mock:
+            results = self.testobj.seek(TEST2_URL_HOME)
+            warning_mock.assert_called_once_with(
+                '::warn ::Stopped after 1 failures,'
+                ' 2 urls were left unvisited')
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual([TEST2_URL_FAVICON], get_urls(results.failures))
+        self.assertEqual([TEST2_URL_HOME], get_urls(results.successes))
+        self.assertEqual(2, results.unvisited)
+
+    def test_crawl_goes_on_below_max_failures(self):
+        self.config.max_failures = 3
+        results = self.testobj.seek(TEST2_URL_HOME)
+        self.assertEqual(2, len(results.failures))
+        self.assertEqual(0, results.unvisited)
+
+    def test_failures_have_limited_referrers(self):
+        self.config.max_referrers = 2
+        results = self.testobj.seek(TEST2_URL_HOME)
+        for failure in results.failures:
+            self.assertEqual(4, failure.referrer_count)
+            self.assertEqual(
+                [TEST2_URL_HOME, TEST2_URL_PAGE1], failure.referrers)
+
+    def test_html_is_not_kept_with_the_results(self):
+        results = self.testobj.seek(TEST1_URL_HOME)
+        self.assertEqual(8, len(results.successes))
+        for resp in results.successes:
+            self.assertIsNone(resp.html)
+
+    def test_streamed_links_are_not_kept_with_the_results(self):
+        fetch_response_mock = self.responsefetcher.fetch_response.side_effect
+
+        def streamed_fetch_response_mock(
+                session: ClientType, urltarget: UrlTarget):
+            result = fetch_response_mock(session, urltarget)
+            if result.html:
+                result.links = TEST_PARSE_RESULTS_BY_HTML[result.html]
+                result.html = None
+            return result
+
+        self.responsefetcher.fetch_response.side_effect = \
+            streamed_fetch_response_mock
+        results = self.testobj.seek(TEST1_URL_HOME)
+        self.assertEqual(8, len(results.successes))
+        self.linkparser.parse_async.assert_not_called()
+        for resp in results.successes:
+            self.assertIsNone(resp.links)
+
+    def test_cached_links_are_not_parsed(self):
+        fetch_response_mock = self.responsefetcher.fetch_response.side_effect
+
+        def cached_fetch_response_mock(
+                session: ClientType, urltarget: UrlTarget):
+            result = fetch_response_mock(session, urltarget)
+            if urltarget.url == TEST3_URL_HOME:
+                result.html = None
+                result.links = TEST_PARSE_RESULTS_BY_HTML[TEST3_HTML_HOME]
+            return result
+
+        self.responsefetcher.fetch_response.side_effect = \
+            cached_fetch_response_mock
+        results = self.testobj.seek(TEST3_URL_HOME)
+        successes = get_urls(results.successes)
+        self.assertEqual(successes, [
+            TEST3_URL_HOME,
+            TEST3_URL_PAGE1,
+            TEST3_URL_PAGE2
+        ])
+        self.assertEqual(2, self.linkparser.parse_async.call_count)
+
+    def test_parsed_links_are_cached(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.config.cache_dir = directory
+            self.config.search_attrs = set(['href'])
+            self.config.resolvebeforefilter = False
+            for attr in ['prefix', 'suffix', 'contained', 'regex', 'glob']:
+                setattr(self.config, f'include{attr}', [])
+                setattr(self.config, f'exclude{attr}', [])
+            fetch_response_mock = \
+                self.responsefetcher.fetch_response.side_effect
+
+            def caching_fetch_response_mock(
+                    session: ClientType, urltarget: UrlTarget):
+                result = fetch_response_mock(session, urltarget)
+                result.cache_entry = CachedResponse(urltarget.url)
+                result.cache_entry.status = 200
+                return result
+
+            self.responsefetcher.fetch_response.side_effect = \
+                caching_fetch_response_mock
+            self.testobj.seek(TEST3_URL_HOME)
+            cache = SqliteResponseCache(
+                directory,
+                DefaultUrlCanonicalizer(),
+                links_fingerprint(self.config))
+            self.assertEqual(
+                TEST_PARSE_RESULTS_BY_HTML[TEST3_HTML_HOME],
+                cache.get(TEST3_URL_HOME).links)
+            self.assertEqual([], cache.get(TEST3_URL_PAGE1).links)
+            cache.close()
+
+    def test_interrupted_crawl_is_resumed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.config.checkpoint_file = os.path.join(directory, 'journal')
+            fetch_response_mock = \
+                self.responsefetcher.fetch_response.side_effect
+            fetched: List[str] = []
+
+            def interrupted_fetch_response_mock(
+                    session: ClientType, urltarget: UrlTarget):
+                if urltarget.url == TEST1_URL_PAGE4:
+                    raise RuntimeError('preempted')
+                return fetch_response_mock(session, urltarget)
+
+            self.responsefetcher.fetch_response.side_effect = \
+                interrupted_fetch_response_mock
+            with self.assertRaises(RuntimeError):
+                self.testobj.seek(TEST1_URL_HOME)
+
+            def recording_fetch_response_mock(
+                    session: ClientType, urltarget: UrlTarget):
+                fetched.append(urltarget.url)
+                return fetch_response_mock(session, urltarget)
+
+            self.responsefetcher.fetch_response.side_effect = \
+                recording_fetch_response_mock
+            self.config.resume = True
+            results = self.testobj.seek(TEST1_URL_HOME, self.responsehandler)
+            self.assertEqual(
+                [TEST1_URL_PAGE4, TEST1_URL_PAGE5], sorted(fetched))
+            self.assertEqual(sorted([
+                TEST1_URL_HOME,
+                TEST1_URL_FAVICON,
+                TEST1_URL_LOGO,
+                TEST1_URL_PAGE1,
+                TEST1_URL_PAGE2,
+                TEST1_URL_PAGE3,
+                TEST1_URL_PAGE4,
+                TEST1_URL_PAGE5
+            ]), sorted(get_urls(results.successes)))
+            self.assertEqual(
+                8, self.responsehandler.handle_response.call_count)
+            page5 = results.successes[-1].urltarget
+            self.assertEqual(TEST1_URL_PAGE5, page5.url)
+            self.assertEqual([
+                TEST1_URL_HOME,
+                TEST1_URL_PAGE1,
+                TEST1_URL_PAGE2,
+                TEST1_URL_PAGE4
+            ], page5.parent_urls())
+
+    def _interrupt_and_resume(
+            self,
+            url: str,
+            interrupted: Callable[[str], bool]) -> SeekResults:
+        fetch_response_mock = self.responsefetcher.fetch_response.side_effect
+
+        async def slow_fetch_response_mock(
+                session: ClientType, urltarget: UrlTarget):
+            if urltarget.url == TEST4_URL_SLOW:
+                await asyncio.sleep(0.1)
+            elif urltarget.url == TEST4_URL_X:
+                # found through the slow page before it is done
+                await asyncio.sleep(0.2)
+            if interrupted(urltarget.url):
+                raise RuntimeError('preempted')
+            return fetch_response_mock(session, urltarget)
+
+        self.responsefetcher.fetch_response.side_effect = \
+            slow_fetch_response_mock
+        with self.assertRaises(RuntimeError):
+            self.testobj.seek(url)
+        self.config.resume = True
+        return self.testobj.seek(url)
+
+    def test_resumed_crawl_keeps_the_most_depth_left(self):
+        self.config.max_depth = 3
+        with tempfile.TemporaryDirectory() as directory:
+            self.config.checkpoint_file = os.path.join(directory, 'journal')
+            results = self._interrupt_and_resume(
+                TEST4_URL_HOME,
+                lambda url: url == TEST4_URL_X and not self.config.resume)
+        successes = get_urls(results.successes)
+        # x was found through the slow page again before the interruption
+        self.assertIn(TEST4_URL_Y, successes)
+        self.assertEqual(0, results.successes[-1].urltarget.depth)
+
+    def test_resumed_crawl_keeps_the_expanded_depth(self):
+        self.config.max_depth = 3
+        with tempfile.TemporaryDirectory() as directory:
+            self.config.checkpoint_file = os.path.join(directory, 'journal')
+            results = self._interrupt_and_resume(
+                TEST4_URL_HOME,
+                lambda url: url == TEST4_URL_Y and not self.config.resume)
+        y = results.successes[-1].urltarget
+        self.assertEqual(TEST4_URL_Y, y.url)
+        self.assertEqual(0, y.depth)
+        self.assertNotIn(TEST4_URL_Z, get_urls(results.successes))
+
+    def test_concurrent_requests_are_limited(self):
+        self.config.max_concurrent_requests = 2
+        fetch_response_mock = self.responsefetcher.fetch_response.side_effect
+        in_flight: List[str] = []
+        max_in_flight: List[int] = [0]
+
+        async def counting_fetch_response_mock(
+                session: ClientType, urltarget: UrlTarget):
+            in_flight.append(urltarget.url)
+            max_in_flight[0] = max(max_in_flight[0], len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(urltarget.url)
+            return fetch_response_mock(session, urltarget)
+
+        self.responsefetcher.fetch_response.side_effect = \
+            counting_fetch_response_mock
+        results = self.testobj.seek([TEST1_URL_HOME, TEST2_URL_HOME])
+        self.assertEqual(12, len(results.successes))
+        self.assertEqual(2, max_in_flight[0])
+
+    def test_worker_error_is_raised(self):
+        self.responsefetcher.fetch_response.side_effect = \
+            RuntimeError('boom')
+        with self.assertRaises(RuntimeError):
+            self.testobj.seek(TEST1_URL_HOME)
+
     def test_response_handler_is_Called(self):
         results = self.testobj.seek(
             [TEST1_URL_HOME, TEST2_URL_HOME], self.responsehandler)
@@ -362,6 +956,86 @@ class TestDeadSeeker(unittest.TestCase):
             self.responsehandler.handle_response.assert_any_call(result)
         for result in results.failures:
             self.responsehandler.handle_response.assert_any_call(result)
+        self.responsehandler.handle_results.assert_called_once_with(results)
+
+    def test_session_and_fetcher_share_the_retry_budget(self):
+        self.testobj.seek(TEST1_URL_HOME)
+        retrybudget = self.testobj.clientsessionfactory.get_client_session\
+            .call_args.args[1]
+        self.assertEqual(10, retrybudget.tokens)
+        self.assertEqual(5, retrybudget.percent)
+        self.assertIs(
+            retrybudget, self.testobj.responsefetcherfactory
+            .get_response_fetcher.call_args.args[3])
+
+    def test_session_statistics_are_added(self):
+        results = self.testobj.seek(TEST1_URL_HOME)
+        self.testobj.clientsessionfactory.add_statistics\
+            .assert_called_once_with(results)
+
+    def test_fetcher_statistics_are_added(self):
+        results = self.testobj.seek(TEST1_URL_HOME)
+        self.responsefetcher.add_statistics.assert_called_once_with(results)
+
+    def test_linkparser_statistics_are_added(self):
+        results = self.testobj.seek(TEST1_URL_HOME)
+        self.linkparser.add_statistics.assert_called_once_with(results)
+
+    def test_links_are_parsed_async(self):
+        self.testobj.seek(TEST1_URL_HOME)
+        self.linkparser.parse.assert_not_called()
+        self.assertEqual(6, self.linkparser.parse_async.call_count)
+
+    def test_runs_on_asyncio_loop_by_default(self):
+        self.assertFalse(self._loop_is_uvloop())
+
+    @unittest.skipUnless(UVLOOP_INSTALLED, 'uvloop is not installed')
+    def test_runs_on_uvloop(self):
+        self.config.use_uvloop = True
+        policy = asyncio.get_event_loop_policy()
+        self.assertTrue(self._loop_is_uvloop())
+        self.assertIs(policy, asyncio.get_event_loop_policy())
+
+    def test_falls_back_without_uvloop(self):
+        self.config.use_uvloop = True
+        with patch.object(deadseeker.deadseeker, 'uvloop', None), \
+                patch.object(self.logger, 'warning') as warning_mock:
+            self.assertFalse(self._loop_is_uvloop())
+        warning_mock.assert_called_once_with(
+            'uvloop is not installed, using the asyncio event loop instead')
+
+    def _loop_is_uvloop(self) -> bool:
+        loops = []
+        parse_mock = self.linkparser.parse_async.side_effect
+
+        def loop_parse_mock(resp: UrlFetchResponse):
+            loops.append(type(asyncio.get_running_loop()))
+            return parse_mock(resp)
+
+        self.linkparser.parse_async.side_effect = loop_parse_mock
+        self.testobj.seek(TEST1_URL_HOME)
+        self.assertTrue(loops)
+        return all(loop.__module__.startswith('uvloop') for loop in loops)
+
+    def test_linkparser_is_closed(self):
+        self.testobj.seek(TEST1_URL_HOME)
+        self.linkparser.close.assert_called_once_with(wait=True)
+
+    def test_linkparser_is_not_waited_for_at_the_deadline(self):
+        self.config.deadline = 0.2
+        self.config.timeout = 0
+        fetch_response_mock = self.responsefetcher.fetch_response.side_effect
+
+        async def hanging_logo_fetch_response_mock(
+                session: ClientType, urltarget: UrlTarget):
+            if urltarget.url == TEST1_URL_LOGO:
+                await asyncio.sleep(10)
+            return fetch_response_mock(session, urltarget)
+
+        self.responsefetcher.fetch_response.side_effect = \
+            hanging_logo_fetch_response_mock
+        self.testobj.seek(TEST1_URL_HOME)
+        self.linkparser.close.assert_called_once_with(wait=False)
 
     def test_defaults(self):
         deadseeker = DeadSeeker(self.config)
@@ -378,6 +1052,101 @@ class TestDeadSeeker(unittest.TestCase):
             isinstance(
                 deadseeker.responsefetcherfactory,
                 DefaultResponseFetcherFactory))
+        self.assertTrue(
+            isinstance(
+                deadseeker.visitedsetfactory, DefaultVisitedSetFactory))
+        self.assertTrue(
+            isinstance(
+                deadseeker.urlcanonicalizerfactory,
+                DefaultUrlCanonicalizerFactory))
+        self.assertTrue(
+            isinstance(
+                deadseeker.responsecachefactory,
+                DefaultResponseCacheFactory))
+        self.assertTrue(
+            isinstance(
+                deadseeker.checkpointfactory,
+                DefaultCheckpointFactory))
+
+
+SLOW_HOST_URL = 'http://slow.test/'
+FAST_HOST_URL = 'http://fast.test/'
+
+
+class TestThrottledHost(unittest.TestCase):
+    '''A host that throttles the crawl does not hold up the other ones'''
+
+    def setUp(self):
+        self.config = SeekerConfig()
+        # a single worker, which would be held up by any wait
+        self.config.max_concurrent_requests = 1
+        self.config.max_tries = 2
+        self.config.max_time = 1
+        self.testobj = DeadSeeker(self.config)
+        self.sent: Dict[str, List[float]] = {}
+
+    def _head(
+            self,
+            m: aioresponses,
+            url: str,
+            *statuses: int,
+            latency: float = 0.0) -> None:
+        async def callback(url, **kwargs) -> CallbackResult:
+            sent = self.sent.setdefault(str(url), [])
+            sent.append(time.monotonic() - self.started)
+            await asyncio.sleep(latency)
+            status = statuses[min(len(sent), len(statuses)) - 1]
+            return CallbackResult(
+                status=status, reason='Test', headers={'Retry-After': '1'},
+                content_type='image/png')
+        m.head(url, callback=callback, repeat=True)
+
+    def _seek(self, urls: List[str]) -> SeekResults:
+        self.started = time.monotonic()
+        return self.testobj.seek(urls)
+
+    def test_paused_host_does_not_hold_up_the_others(self):
+        fast = [f'{FAST_HOST_URL}{i}.png' for i in range(5)]
+        with aioresponses() as m:
+            self._head(m, SLOW_HOST_URL, 429, 200)
+            for url in fast:
+                self._head(m, url, 200)
+            results = self._seek([SLOW_HOST_URL] + fast)
+        self.assertEqual(6, len(results.successes))
+        for url in fast:
+            self.assertLess(self.sent[url][0], 0.5)
+        first, retry = self.sent[SLOW_HOST_URL]
+        self.assertGreaterEqual(retry - first, 0.9)
+
+    def test_paced_host_does_not_hold_up_the_others(self):
+        self.config.requests_per_second_per_host = 10
+        slow = [f'{SLOW_HOST_URL}{i}.png' for i in range(5)]
+        with aioresponses() as m:
+            for url in slow:
+                self._head(m, url, 200)
+            self._head(m, FAST_HOST_URL, 200)
+            results = self._seek(slow + [FAST_HOST_URL])
+        self.assertEqual(6, len(results.successes))
+        self.assertLess(self.sent[FAST_HOST_URL][0], 0.09)
+        sent = sorted(self.sent[url][0] for url in slow)
+        for earlier, later in zip(sent, sent[1:]):
+            self.assertGreaterEqual(later - earlier, 0.09)
+
+    def test_host_at_its_limit_does_not_hold_up_the_others(self):
+        self.config.max_concurrent_requests = 2
+        self.config.adaptive_connect_limit = True
+        self.config.max_connect_limit_per_host = 1
+        slow = [f'{SLOW_HOST_URL}{i}.png' for i in range(3)]
+        with aioresponses() as m:
+            for url in slow:
+                self._head(m, url, 200, latency=0.1)
+            self._head(m, FAST_HOST_URL, 200)
+            results = self._seek(slow + [FAST_HOST_URL])
+        self.assertEqual(4, len(results.successes))
+        self.assertLess(self.sent[FAST_HOST_URL][0], 0.09)
+        sent = sorted(self.sent[url][0] for url in slow)
+        for earlier, later in zip(sent, sent[1:]):
+            self.assertGreaterEqual(later - earlier, 0.09)
 
 
 if __name__ == '__main__':
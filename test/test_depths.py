@@ -0,0 +1,90 @@
+import unittest
+from deadseeker.common import SeekerConfig
+from deadseeker.depths import BestDepthIndex, DepthIndex, new_depth_index
+from deadseeker.visited import ExactVisitedSet, HashedVisitedSet, url_hash
+
+TEST_KEY = 'http://test.com/page1.html'
+
+
+class TestNewDepthIndex(unittest.TestCase):
+
+    def test_no_index_without_max_depth(self):
+        config = SeekerConfig()
+        config.max_depth = -1
+        result = new_depth_index(config, ExactVisitedSet())
+        self.assertFalse(isinstance(result, BestDepthIndex))
+
+    def test_best_index_with_max_depth(self):
+        config = SeekerConfig()
+        config.max_depth = 3
+        result = new_depth_index(config, HashedVisitedSet(32))
+        self.assertTrue(isinstance(result, BestDepthIndex))
+        result.found(TEST_KEY, 2)
+        # keyed like the visited set
+        self.assertEqual([url_hash(TEST_KEY, 32)], list(result._depths))
+
+
+class TestDepthIndex(unittest.TestCase):
+
+    def test_expands_with_the_depth_of_the_target(self):
+        testobj = DepthIndex()
+        self.assertEqual(2, testobj.expand(TEST_KEY, 2))
+        self.assertFalse(testobj.found(TEST_KEY, 5))
+        self.assertFalse(testobj.deeper(TEST_KEY, 5))
+
+
+class TestBestDepthIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.testobj = BestDepthIndex()
+
+    def test_expands_with_the_most_depth_found(self):
+        self.assertFalse(self.testobj.found(TEST_KEY, 1))
+        self.assertFalse(self.testobj.found(TEST_KEY, 3))
+        self.assertFalse(self.testobj.found(TEST_KEY, 2))
+        self.assertEqual(3, self.testobj.expand(TEST_KEY, 1))
+
+    def test_deeper_than_the_most_depth_found(self):
+        self.assertTrue(self.testobj.deeper(TEST_KEY, 0))
+        self.testobj.found(TEST_KEY, 2)
+        self.assertFalse(self.testobj.deeper(TEST_KEY, 2))
+        self.assertTrue(self.testobj.deeper(TEST_KEY, 3))
+
+    def test_urls_are_kept_as_they_are_by_default(self):
+        self.testobj.found(TEST_KEY, 2)
+        self.testobj.expand(TEST_KEY, 2)
+        self.assertEqual([TEST_KEY], list(self.testobj._depths))
+
+    def test_urls_are_kept_by_their_key(self):
+        testobj = BestDepthIndex(HashedVisitedSet().key)
+        testobj.found(TEST_KEY, 2)
+        testobj.expand(TEST_KEY, 2)
+        self.assertEqual([url_hash(TEST_KEY)], list(testobj._depths))
+
+    def test_expands_again_with_more_depth(self):
+        self.testobj.found(TEST_KEY, 0)
+        self.assertEqual(0, self.testobj.expand(TEST_KEY, 0))
+        self.assertTrue(self.testobj.found(TEST_KEY, 1))
+        self.assertEqual(1, self.testobj.expand(TEST_KEY, 1))
+
+    def test_expands_again_only_once_until_expanded(self):
+        self.testobj.found(TEST_KEY, 0)
+        self.testobj.expand(TEST_KEY, 0)
+        self.assertTrue(self.testobj.found(TEST_KEY, 1))
+        self.assertFalse(self.testobj.found(TEST_KEY, 2))
+        self.assertEqual(2, self.testobj.expand(TEST_KEY, 1))
+
+    def test_less_depth_is_not_expanded_again(self):
+        self.testobj.found(TEST_KEY, 2)
+        self.testobj.expand(TEST_KEY, 2)
+        self.assertFalse(self.testobj.found(TEST_KEY, 1))
+        self.assertFalse(self.testobj.found(TEST_KEY, 2))
+
+    def test_url_without_links_is_not_expanded_again(self):
+        self.testobj.found(TEST_KEY, 0)
+        self.testobj.no_links(TEST_KEY)
+        self.assertFalse(self.testobj.found(TEST_KEY, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
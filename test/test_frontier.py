@@ -0,0 +1,222 @@
+import asyncio
+import math
+import unittest
+from aiounittest import AsyncTestCase
+from deadseeker.common import UrlTarget
+from deadseeker.frontier import (
+    Frontier,
+    TargetSpillFile,
+    decode_target,
+    encode_target
+)
+
+TEST_URL = 'http://test.com/'
+
+
+def _target(index: int) -> UrlTarget:
+    url = f'{TEST_URL}page{index}.html'
+    return UrlTarget(TEST_URL, url, -1)
+
+
+class TestFrontier(AsyncTestCase):
+
+    async def test_fifo_order(self):
+        testobj = Frontier()
+        targets = [_target(i) for i in range(3)]
+        for target in targets:
+            await testobj.put(target)
+        for target in targets:
+            self.assertIs(target, await testobj.get())
+
+    async def test_unbounded_when_maxsize_not_positive(self):
+        testobj = Frontier(-1)
+        for i in range(100):
+            await testobj.put(_target(i))
+        self.assertFalse(testobj.full())
+        self.assertEqual(100, testobj.qsize())
+
+    async def test_put_waits_while_full(self):
+        testobj = Frontier(1, consumers=2)
+        await testobj.put(_target(0))
+        self.assertTrue(testobj.full())
+        putter = asyncio.ensure_future(testobj.put(_target(1)))
+        await asyncio.sleep(0)
+        self.assertFalse(putter.done())
+        self.assertEqual(1, testobj.qsize())
+        await testobj.get()
+        await asyncio.wait_for(putter, 1)
+        self.assertEqual(1, testobj.qsize())
+
+    async def test_last_consumer_is_not_blocked(self):
+        testobj = Frontier(1, consumers=2)
+        await testobj.put(_target(0))
+        first = asyncio.ensure_future(testobj.put(_target(1)))
+        await asyncio.sleep(0)
+        self.assertFalse(first.done())
+        # all consumers are producing now, nobody would drain the frontier
+        await asyncio.wait_for(testobj.put(_target(2)), 1)
+        self.assertEqual(2, testobj.qsize())
+        self.assertFalse(first.done())
+        # the frontier is over its bound, first has to wait for two slots
+        await testobj.get()
+        await asyncio.sleep(0)
+        self.assertFalse(first.done())
+        await testobj.get()
+        await asyncio.wait_for(first, 1)
+        self.assertEqual(1, testobj.qsize())
+
+
+class TestDeferringFrontier(AsyncTestCase):
+
+    def setUp(self):
+        self.testobj = Frontier()
+
+    def tearDown(self):
+        self.testobj.close()
+
+    async def _defer(self, count: int, key: str, delay: float) -> None:
+        for i in range(count):
+            await self.testobj.put(_target(i))
+            self.testobj.defer(await self.testobj.get(), key, delay)
+            self.testobj.task_done()
+
+    async def test_deferred_target_is_handed_out_after_its_delay(self):
+        await self._defer(1, 'a', 0.05)
+        self.assertTrue(self.testobj.empty())
+        self.assertEqual(1, self.testobj.qsize())
+        getter = asyncio.ensure_future(self.testobj.get())
+        await asyncio.sleep(0.03)
+        self.assertFalse(getter.done())
+        target = await asyncio.wait_for(getter, 1)
+        self.assertEqual(f'{TEST_URL}page0.html', target.url)
+        self.assertEqual(0, self.testobj.qsize())
+
+    async def test_join_waits_for_deferred_targets(self):
+        await self._defer(1, 'a', 0.01)
+        joined = asyncio.ensure_future(self.testobj.join())
+        await asyncio.sleep(0.02)
+        self.assertFalse(joined.done())
+        await self.testobj.get()
+        self.testobj.task_done()
+        await asyncio.wait_for(joined, 1)
+
+    async def test_other_targets_are_not_held_up(self):
+        await self._defer(2, 'a', 10)
+        other = _target(9)
+        await self.testobj.put(other)
+        self.assertIs(other, await asyncio.wait_for(self.testobj.get(), 1))
+        self.assertEqual(2, self.testobj.qsize())
+
+    async def test_targets_of_a_key_are_handed_out_one_at_a_time(self):
+        await self._defer(3, 'a', 0.01)
+        await asyncio.sleep(0.02)
+        self.assertEqual(1, len(self.testobj._targets))
+        await self.testobj.get()
+        self.assertEqual(0, len(self.testobj._targets))
+        # the next one once the previous one was taken
+        await asyncio.sleep(0)
+        self.assertEqual(1, len(self.testobj._targets))
+
+    async def test_deferred_again_waits_for_the_delay(self):
+        await self._defer(2, 'a', 0.01)
+        await asyncio.sleep(0.02)
+        self.testobj.defer(await self.testobj.get(), 'a', 10)
+        await asyncio.sleep(0.01)
+        self.assertTrue(self.testobj.empty())
+        self.assertEqual(2, self.testobj.qsize())
+
+    async def test_waiting_target_is_handed_out_on_resume(self):
+        await self._defer(1, 'a', math.inf)
+        await asyncio.sleep(0.01)
+        self.assertTrue(self.testobj.empty())
+        self.testobj.resume('b')
+        self.assertTrue(self.testobj.empty())
+        self.testobj.resume('a')
+        self.assertFalse(self.testobj.empty())
+        self.assertEqual(1, self.testobj.qsize())
+
+
+class TestTargetEncoding(unittest.TestCase):
+
+    def test_roundtrip_keeps_depth_and_parents(self):
+        root = UrlTarget(TEST_URL, TEST_URL, 3)
+        child = root.child(f'{TEST_URL}page1.html')
+        grandchild = child.child(f'{TEST_URL}page2.html')
+        result = decode_target(encode_target(grandchild))
+        self.assertEqual(TEST_URL, result.home)
+        self.assertEqual(grandchild.url, result.url)
+        self.assertEqual(1, result.depth)
+        self.assertEqual(grandchild.parent_urls(), result.parent_urls())
+        self.assertEqual(2, result.parent.depth)
+        self.assertEqual(3, result.parent.parent.depth)
+        self.assertIsNone(result.parent.parent.parent)
+
+    def test_roundtrip_of_seed(self):
+        result = decode_target(encode_target(_target(0)))
+        self.assertEqual(f'{TEST_URL}page0.html', result.url)
+        self.assertEqual(-1, result.depth)
+        self.assertIsNone(result.parent)
+        self.assertIsNone(result.number)
+
+    def test_roundtrip_keeps_checkpoint_number(self):
+        target = _target(0)
+        target.number = 42
+        self.assertEqual(42, decode_target(encode_target(target)).number)
+
+    def test_roundtrip_keeps_revisit(self):
+        target = _target(0)
+        self.assertFalse(decode_target(encode_target(target)).revisit)
+        target.revisit = True
+        self.assertTrue(decode_target(encode_target(target)).revisit)
+
+
+class TestTargetSpillFile(unittest.TestCase):
+
+    def setUp(self):
+        self.testobj = TargetSpillFile()
+
+    def tearDown(self):
+        self.testobj.close()
+
+    def test_reads_back_in_order(self):
+        for i in range(5):
+            self.testobj.append(_target(i))
+        self.assertEqual(5, len(self.testobj))
+        first = self.testobj.read(3)
+        self.testobj.append(_target(5))
+        rest = self.testobj.read(10)
+        self.assertEqual(
+            [f'{TEST_URL}page{i}.html' for i in range(6)],
+            [target.url for target in first + rest])
+        self.assertEqual(0, len(self.testobj))
+
+    def test_file_is_truncated_when_drained(self):
+        self.testobj.append(_target(0))
+        self.testobj.read(1)
+        self.assertEqual(0, self.testobj._file.seek(0, 2))
+
+
+class TestSpillingFrontier(AsyncTestCase):
+
+    async def test_spills_beyond_memory_size_and_keeps_order(self):
+        testobj = Frontier(memory_size=2)
+        try:
+            targets = [_target(i) for i in range(5)]
+            for target in targets:
+                await testobj.put(target)
+            self.assertEqual(5, testobj.qsize())
+            self.assertEqual(2, len(testobj._targets))
+            urls = [(await testobj.get()).url for _ in range(5)]
+            self.assertEqual([target.url for target in targets], urls)
+            self.assertTrue(testobj.empty())
+        finally:
+            testobj.close()
+
+    async def test_maxsize_counts_spilled_targets(self):
+        testobj = Frontier(3, consumers=2, memory_size=1)
+        try:
+            for i in range(3):
+                await testobj.put(_target(i))
+            self.assertTrue(testobj.full())
+        finally:
+            testobj.close()
@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import Mock
+from deadseeker.headsupport import HeadSupport, url_host
+from deadseeker.responsecache import ResponseCache
+
+TEST_URL = 'http://Test.com:8080/page1.html'
+TEST_OTHER_URL = 'http://test.com:8080/page2.html'
+
+
+class TestHeadSupport(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = Mock(spec=ResponseCache)
+        self.cache.get_hosts_without_head.return_value = set()
+        self.testobj = HeadSupport(self.cache)
+
+    def test_url_host(self):
+        self.assertEqual('test.com:8080', url_host(TEST_URL))
+
+    def test_head_is_sent_by_default(self):
+        self.assertFalse(self.testobj.should_skip(TEST_URL))
+        self.assertEqual(0, self.testobj.skipped)
+
+    def test_host_is_learned_after_threshold(self):
+        self.testobj.unsupported(TEST_URL)
+        self.assertFalse(self.testobj.should_skip(TEST_OTHER_URL))
+        self.cache.add_host_without_head.assert_not_called()
+        self.testobj.unsupported(TEST_OTHER_URL)
+        self.assertTrue(self.testobj.should_skip(TEST_URL))
+        self.assertTrue(self.testobj.should_skip(TEST_OTHER_URL))
+        self.assertEqual(2, self.testobj.skipped)
+        self.cache.add_host_without_head.assert_called_once_with(
+            'test.com:8080')
+
+    def test_host_with_working_head_is_not_learned(self):
+        self.testobj.supported(TEST_URL)
+        self.testobj.unsupported(TEST_OTHER_URL)
+        self.testobj.unsupported(TEST_OTHER_URL)
+        self.assertFalse(self.testobj.should_skip(TEST_OTHER_URL))
+        self.cache.add_host_without_head.assert_not_called()
+
+    def test_hosts_are_loaded_from_cache(self):
+        self.cache.get_hosts_without_head.return_value = set(
+            ['test.com:8080'])
+        testobj = HeadSupport(self.cache)
+        self.assertTrue(testobj.should_skip(TEST_URL))
+        self.assertFalse(testobj.should_skip('http://test2.com/'))
+
+
+if __name__ == '__main__':
+    unittest.main()
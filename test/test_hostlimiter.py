@@ -0,0 +1,394 @@
+import asyncio
+import math
+import time
+import unittest
+from email.utils import formatdate
+from unittest.mock import Mock
+from aiohttp import ClientConnectionError, ClientResponseError, InvalidURL
+from aiounittest import AsyncTestCase
+from deadseeker.common import SeekerConfig, UrlFetchResponse, UrlTarget
+from deadseeker.hostlimiter import (
+    AdaptiveHostLimiter,
+    HostLimiter,
+    HostUnavailableError,
+    PacedHostLimiter,
+    new_host_limiter,
+    retry_after
+)
+from deadseeker.retrybudget import RetryBudget
+
+URL = 'https://www.mysite.com/page.html'
+OTHER_URL = 'https://www.othersite.com/page.html'
+
+
+def _response(
+        status: int,
+        elapsed: float = 10.0,
+        error: Exception = None) -> UrlFetchResponse:
+    resp = UrlFetchResponse(UrlTarget(URL, URL, 0))
+    resp.status = status
+    resp.elapsed = elapsed
+    resp.error = error
+    return resp
+
+
+def _throttled(status: int, retry_after: str = None) -> UrlFetchResponse:
+    headers = {} if retry_after is None else {'Retry-After': retry_after}
+    return _response(status, error=ClientResponseError(
+        Mock(), (), status=status, headers=headers))
+
+
+class TestRetryAfter(unittest.TestCase):
+
+    def test_seconds(self):
+        self.assertEqual(120.0, retry_after(_throttled(429, '120')))
+
+    def test_http_date(self):
+        when = formatdate(time.time() + 60, usegmt=True)
+        self.assertAlmostEqual(
+            60.0, retry_after(_throttled(503, when)), delta=1.0)
+
+    def test_http_date_in_the_past(self):
+        when = formatdate(time.time() - 60, usegmt=True)
+        self.assertEqual(0.0, retry_after(_throttled(503, when)))
+
+    def test_missing_or_invalid(self):
+        self.assertIsNone(retry_after(_throttled(429)))
+        self.assertIsNone(retry_after(_throttled(429, 'soon')))
+        self.assertIsNone(retry_after(_response(429)))
+
+
+class TestNewHostLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.config = SeekerConfig()
+
+    def test_not_adaptive_by_default(self):
+        result = new_host_limiter(self.config)
+        self.assertIsInstance(result, PacedHostLimiter)
+        self.assertNotIsInstance(result, AdaptiveHostLimiter)
+        self.assertEqual(0.0, result.interval)
+        self.assertEqual(self.config.max_tries, result.max_tries)
+        self.assertEqual(self.config.max_time, result.max_time)
+        self.assertEqual(0, result.failure_threshold)
+        self.assertEqual(30, result.cooldown)
+
+    def test_retry_budget_is_passed(self):
+        budget = RetryBudget()
+        for adaptive in [False, True]:
+            self.config.adaptive_connect_limit = adaptive
+            self.assertIs(
+                budget, new_host_limiter(self.config, budget).retrybudget)
+
+    def test_requests_per_second_are_passed(self):
+        self.config.requests_per_second_per_host = 4
+        for adaptive in [False, True]:
+            self.config.adaptive_connect_limit = adaptive
+            self.assertEqual(0.25, new_host_limiter(self.config).interval)
+
+    def test_starts_at_connect_limit(self):
+        self.config.adaptive_connect_limit = True
+        self.config.connect_limit_per_host = 5
+        self.config.min_connect_limit_per_host = 2
+        self.config.max_connect_limit_per_host = 50
+        result = new_host_limiter(self.config)
+        self.assertIsInstance(result, AdaptiveHostLimiter)
+        self.assertEqual(5, result.initial)
+        self.assertEqual(2, result.minimum)
+        self.assertEqual(50, result.maximum)
+
+    def test_starts_at_maximum_without_connect_limit(self):
+        self.config.adaptive_connect_limit = True
+        self.config.connect_limit_per_host = 0
+        self.config.max_connect_limit_per_host = 50
+        self.assertEqual(50, new_host_limiter(self.config).initial)
+
+    def test_limits_are_kept_within_the_bounds(self):
+        self.config.adaptive_connect_limit = True
+        self.config.connect_limit_per_host = 500
+        self.config.min_connect_limit_per_host = 80
+        self.config.max_connect_limit_per_host = 50
+        result = new_host_limiter(self.config)
+        self.assertEqual(50, result.initial)
+        self.assertEqual(50, result.minimum)
+        self.assertEqual(50, result.maximum)
+
+
+class TestHostLimiter(AsyncTestCase):
+
+    async def test_never_waits(self):
+        testobj = HostLimiter()
+        for _ in range(1000):
+            self.assertEqual(0.0, testobj.delay(URL))
+            await testobj.acquire(URL)
+        testobj.release(URL, _response(429), 0.0)
+        self.assertEqual([], testobj.get_stats())
+
+
+class TestPacedHostLimiter(AsyncTestCase):
+
+    def setUp(self):
+        self.testobj = PacedHostLimiter(0, 3, 0.2)
+
+    async def test_no_delay_without_a_limit(self):
+        for _ in range(100):
+            self.assertEqual(0.0, self.testobj.delay(URL))
+            await self.testobj.acquire(URL)
+
+    async def test_requests_are_spaced_by_the_rate(self):
+        self.testobj = PacedHostLimiter(20)
+        await self.testobj.acquire(URL)
+        self.assertAlmostEqual(0.05, self.testobj.delay(URL), delta=0.01)
+        self.testobj.turn(URL)
+        self.assertAlmostEqual(0.1, self.testobj.delay(URL), delta=0.01)
+        self.assertEqual(0.0, self.testobj.delay(OTHER_URL))
+        await asyncio.sleep(0.1)
+        self.assertEqual(0.0, self.testobj.delay(URL))
+
+    async def test_host_is_paused_as_asked(self):
+        self.testobj.release(URL, _throttled(429, '0'), 0.0)
+        self.assertEqual(0.0, self.testobj.delay(URL))
+        self.testobj.max_time = 0.1
+        self.testobj.release(URL, _throttled(503, '1'), 0.0)
+        self.assertEqual(0.0, self.testobj.delay(OTHER_URL))
+        self.assertAlmostEqual(0.1, self.testobj.delay(URL), delta=0.01)
+        self.assertAlmostEqual(0.1, self.testobj.get_stats()[0].paused, 2)
+
+    async def test_host_is_paused_without_retry_after(self):
+        self.testobj.release(URL, _throttled(429), 0.0)
+        self.assertAlmostEqual(0.2, self.testobj.get_stats()[0].paused, 2)
+
+    async def test_turn_follows_a_later_pause(self):
+        self.testobj = PacedHostLimiter(20, 3, 0.1)
+        await self.testobj.acquire(URL)
+        self.assertAlmostEqual(0.05, self.testobj.delay(URL), delta=0.01)
+        self.testobj.release(URL, _throttled(429, '1'), 0.0)
+        self.assertAlmostEqual(0.1, self.testobj.delay(URL), delta=0.01)
+
+    async def test_other_errors_do_not_pause(self):
+        self.testobj.release(URL, _throttled(500, '10'), 0.0)
+        self.testobj.release(URL, _response(404), 0.0)
+        self.assertEqual(0.0, self.testobj.delay(URL))
+        stats = self.testobj.get_stats()[0]
+        self.assertEqual(2, stats.requests)
+        self.assertEqual(0, stats.throttled)
+
+    def test_throttled_response_is_retried(self):
+        for resp in [_throttled(429), _throttled(503, '0')]:
+            self.assertTrue(self.testobj.should_retry(resp, 1))
+        self.assertEqual(2, self.testobj.get_stats()[0].retries)
+
+    def test_retries_are_limited(self):
+        self.assertFalse(self.testobj.should_retry(_throttled(429), 3))
+
+    def test_longer_pause_than_max_time_is_not_retried(self):
+        self.assertFalse(self.testobj.should_retry(_throttled(429, '1'), 1))
+
+    def test_other_responses_are_not_retried(self):
+        self.assertFalse(self.testobj.should_retry(_response(200), 1))
+        self.assertFalse(self.testobj.should_retry(_throttled(500), 1))
+
+    def test_retries_spend_the_retry_budget(self):
+        budget = RetryBudget(1)
+        self.testobj = PacedHostLimiter(max_tries=3, retrybudget=budget)
+        self.assertTrue(self.testobj.should_retry(_throttled(429), 1))
+        self.assertEqual(1, budget.retries)
+        self.assertFalse(self.testobj.should_retry(_throttled(429), 2))
+        self.assertEqual(1, budget.retries)
+
+
+class TestCircuitBreaker(AsyncTestCase):
+
+    def setUp(self):
+        self.testobj = PacedHostLimiter(failure_threshold=3, cooldown=0.05)
+
+    async def _fail(self, count: int, url: str = URL) -> None:
+        for _ in range(count):
+            acquired = await self.testobj.acquire(url)
+            self.testobj.release(url, _response(
+                0, error=ClientConnectionError()), acquired)
+
+    async def test_host_is_down_after_failures_in_a_row(self):
+        await self._fail(3)
+        with self.assertRaises(HostUnavailableError):
+            await self.testobj.acquire(URL)
+        await self.testobj.acquire(OTHER_URL)
+        stats = self.testobj.get_stats()[0]
+        self.assertEqual(1, stats.circuit_opens)
+        self.assertEqual(1, stats.failed_fast)
+
+    async def test_timeouts_are_failures(self):
+        for _ in range(3):
+            acquired = await self.testobj.acquire(URL)
+            self.testobj.release(URL, _response(
+                0, error=asyncio.TimeoutError()), acquired)
+        with self.assertRaises(HostUnavailableError):
+            await self.testobj.acquire(URL)
+
+    async def test_any_answer_breaks_the_row(self):
+        await self._fail(2)
+        self.testobj.release(URL, _throttled(500), 0.0)
+        await self._fail(2)
+        await self.testobj.acquire(URL)
+
+    async def test_other_errors_are_not_failures(self):
+        await self._fail(2)
+        self.testobj.release(URL, _response(0, error=ValueError()), 0.0)
+        await self.testobj.acquire(URL)
+
+    async def test_disabled_without_threshold(self):
+        self.testobj = PacedHostLimiter()
+        await self._fail(100)
+        await self.testobj.acquire(URL)
+
+    async def test_one_probe_after_the_cooldown(self):
+        await self._fail(3)
+        await asyncio.sleep(0.06)
+        probe = await self.testobj.acquire(URL)
+        with self.assertRaises(HostUnavailableError):
+            await self.testobj.acquire(URL)
+        self.testobj.release(URL, _response(200), probe)
+        await self.testobj.acquire(URL)
+
+    async def test_failed_probe_keeps_the_host_down(self):
+        await self._fail(3)
+        await asyncio.sleep(0.06)
+        await self._fail(1)
+        with self.assertRaises(HostUnavailableError):
+            await self.testobj.acquire(URL)
+        self.assertEqual(2, self.testobj.get_stats()[0].circuit_opens)
+        await asyncio.sleep(0.06)
+        await self.testobj.acquire(URL)
+
+    async def test_probe_without_an_answer_keeps_the_host_down(self):
+        for error in [InvalidURL(URL), None]:
+            with self.subTest(error=error):
+                await self._fail(3)
+                await asyncio.sleep(0.06)
+                probe = await self.testobj.acquire(URL)
+                # an invalid url, or a probe cancelled while in flight
+                self.testobj.release(URL, _response(0, error=error), probe)
+                with self.assertRaises(HostUnavailableError):
+                    await self.testobj.acquire(URL)
+                await asyncio.sleep(0.06)
+                probe = await self.testobj.acquire(URL)
+                self.testobj.release(URL, _response(200), probe)
+
+    async def test_probe_is_sent_on_its_turn(self):
+        self.testobj = PacedHostLimiter(
+            5, failure_threshold=3, cooldown=0.05)
+        await self._fail(3)
+        await asyncio.sleep(0.06)
+        # the turns that the failed requests took are not over yet
+        self.assertGreater(self.testobj.delay(URL), 0.0)
+        self.assertFalse(self.testobj._state('www.mysite.com').probing)
+
+    async def test_never_probes_without_cooldown(self):
+        self.testobj = PacedHostLimiter(failure_threshold=1)
+        await self._fail(1)
+        await asyncio.sleep(0.01)
+        with self.assertRaises(HostUnavailableError):
+            await self.testobj.acquire(URL)
+
+    async def test_adaptive_does_not_delay_a_host_that_is_down(self):
+        self.testobj = AdaptiveHostLimiter(1, 1, 1, failure_threshold=1)
+        acquired = await self.testobj.acquire(URL)
+        self.assertEqual(math.inf, self.testobj.delay(URL))
+        self.testobj.release(
+            URL, _response(0, error=ClientConnectionError()), acquired)
+        self.assertEqual(0.0, self.testobj.delay(URL))
+        with self.assertRaises(HostUnavailableError):
+            await self.testobj.acquire(URL)
+        self.assertEqual(0, self.testobj._state('www.mysite.com').in_flight)
+
+
+class TestAdaptiveHostLimiter(AsyncTestCase):
+
+    def setUp(self):
+        self.testobj = AdaptiveHostLimiter(4, 1, 20)
+
+    def _limit(self, url: str = URL) -> float:
+        stats = {s.host: s for s in self.testobj.get_stats()}
+        return stats[url.split('/')[2]].limit
+
+    async def _request(self, resp: UrlFetchResponse) -> None:
+        acquired = await self.testobj.acquire(URL)
+        self.testobj.release(URL, resp, acquired)
+
+    async def test_grows_by_one_per_response_in_slow_start(self):
+        for _ in range(3):
+            await self._request(_response(200))
+        self.assertEqual(7, self._limit())
+
+    async def test_client_errors_are_healthy_responses(self):
+        await self._request(_response(404))
+        self.assertEqual(5, self._limit())
+
+    async def test_does_not_grow_beyond_the_maximum(self):
+        for _ in range(100):
+            await self._request(_response(200))
+        self.assertEqual(20, self._limit())
+        self.assertEqual(20, self.testobj.get_stats()[0].peak_limit)
+
+    async def test_halves_on_throttling(self):
+        for status in [429, 503]:
+            with self.subTest(status=status):
+                self.testobj = AdaptiveHostLimiter(8, 1, 20)
+                await self._request(_response(status))
+                self.assertEqual(4, self._limit())
+
+    async def test_halves_on_timeout(self):
+        await self._request(_response(0, error=asyncio.TimeoutError()))
+        self.assertEqual(2, self._limit())
+
+    async def test_other_errors_leave_the_limit(self):
+        await self._request(_response(500))
+        await self._request(_response(0, error=ValueError()))
+        self.assertEqual(4, self._limit())
+
+    async def test_does_not_back_off_below_the_minimum(self):
+        for _ in range(10):
+            await self._request(_response(429))
+        self.assertEqual(1, self._limit())
+
+    async def test_grows_slowly_after_backing_off(self):
+        await self._request(_response(429))
+        for _ in range(2):
+            await self._request(_response(200))
+        self.assertEqual(3, self._limit())
+
+    async def test_does_not_grow_on_slow_responses(self):
+        await self._request(_response(200, elapsed=10.0))
+        await self._request(_response(200, elapsed=100.0))
+        self.assertEqual(5, self._limit())
+
+    async def test_backs_off_once_for_requests_sent_together(self):
+        acquired = [await self.testobj.acquire(URL) for _ in range(4)]
+        for when in acquired:
+            self.testobj.release(URL, _response(429), when)
+        stats = self.testobj.get_stats()[0]
+        self.assertEqual(2, stats.limit)
+        self.assertEqual(1, stats.backoffs)
+        self.assertEqual(4, stats.throttled)
+        self.assertEqual(4, stats.requests)
+
+    async def test_delays_while_the_limit_is_reached(self):
+        acquired = [await self.testobj.acquire(URL) for _ in range(4)]
+        self.assertEqual(math.inf, self.testobj.delay(URL))
+        self.assertEqual(0.0, self.testobj.delay(OTHER_URL))
+        self.testobj.release(URL, _response(200), acquired[0])
+        self.assertEqual(0.0, self.testobj.delay(URL))
+
+    async def test_acquired_url_does_not_wait_for_the_limit(self):
+        for _ in range(4):
+            await self.testobj.acquire(URL)
+        # the request after HEAD goes in the place of the HEAD request
+        self.assertEqual(0.0, self.testobj.turn_delay(URL))
+
+    async def test_hosts_have_their_own_limits(self):
+        for _ in range(4):
+            await self.testobj.acquire(URL)
+        await asyncio.wait_for(self.testobj.acquire(OTHER_URL), 1)
+        self.testobj.release(URL, _response(429), 0.0)
+        self.assertEqual(2, self._limit())
+        self.assertEqual(4, self._limit(OTHER_URL))
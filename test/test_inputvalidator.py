@@ -5,7 +5,23 @@ from deadseeker.common import (
     DEFAULT_WEB_AGENT,
     DEFAULT_MAX_DEPTH,
     DEFAULT_CONNECT_LIMIT_PER_HOST,
-    DEFAULT_TIMEOUT
+    DEFAULT_MIN_CONNECT_LIMIT_PER_HOST,
+    DEFAULT_MAX_CONNECT_LIMIT_PER_HOST,
+    DEFAULT_CIRCUIT_BREAKER_THRESHOLD,
+    DEFAULT_CIRCUIT_BREAKER_COOLDOWN,
+    DEFAULT_TIMEOUT,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_MAX_FRONTIER_SIZE,
+    DEFAULT_FRONTIER_MEMORY_SIZE,
+    DEFAULT_VISITED_INDEX,
+    DEFAULT_VISITED_BLOOM_CAPACITY,
+    DEFAULT_CANONICALIZE_URLS,
+    DEFAULT_MAX_REFERRERS,
+    DEFAULT_OFFSITE_CACHE_TTL,
+    DEFAULT_PARSE_WORKERS,
+    DEFAULT_PARSE_PROCESS_THRESHOLD,
+    DEFAULT_HTML_PARSER,
+    DEFAULT_LINK_CACHE_SIZE
 )
 from deadseeker.inputvalidator import InputValidator
 import unittest
@@ -20,6 +36,12 @@ INCLUDE_EXCLUDE_METHODS_BY_VARNAME: Dict[str, str] = {
     'INPUT_EXCLUDE_URL_SUFFIX': 'get_excludesuffix',
     'INPUT_INCLUDE_URL_CONTAINED': 'get_includecontained',
     'INPUT_EXCLUDE_URL_CONTAINED': 'get_excludecontained',
+    'INPUT_INCLUDE_URL_GLOB': 'get_includeglob',
+    'INPUT_EXCLUDE_URL_GLOB': 'get_excludeglob',
+}
+REGEX_METHODS_BY_VARNAME: Dict[str, str] = {
+    'INPUT_INCLUDE_URL_REGEX': 'get_includeregex',
+    'INPUT_EXCLUDE_URL_REGEX': 'get_excluderegex',
 }
 
 
@@ -109,6 +131,46 @@ class TestInputValidator(unittest.TestCase):
             'INPUT_ALWAYS_GET_ONSITE',
             lambda: self.testObj.get_alwaysgetonsite())
 
+    def test_stream_html_true(self):
+        self._test_get_boolean_true(
+            'INPUT_STREAM_HTML',
+            lambda: self.testObj.get_stream_html())
+
+    def test_stream_html_false(self):
+        self._test_get_boolean_false(
+            'INPUT_STREAM_HTML',
+            lambda: self.testObj.get_stream_html())
+
+    def test_resume_true(self):
+        self._test_get_boolean_true(
+            'INPUT_RESUME',
+            lambda: self.testObj.get_resume())
+
+    def test_resume_false(self):
+        self._test_get_boolean_false(
+            'INPUT_RESUME',
+            lambda: self.testObj.get_resume())
+
+    def test_use_uvloop_true(self):
+        self._test_get_boolean_true(
+            'INPUT_USE_UVLOOP',
+            lambda: self.testObj.get_use_uvloop())
+
+    def test_use_uvloop_false(self):
+        self._test_get_boolean_false(
+            'INPUT_USE_UVLOOP',
+            lambda: self.testObj.get_use_uvloop())
+
+    def test_adaptive_connect_limit_true(self):
+        self._test_get_boolean_true(
+            'INPUT_ADAPTIVE_CONNECT_LIMIT',
+            lambda: self.testObj.get_adaptive_connect_limit())
+
+    def test_adaptive_connect_limit_false(self):
+        self._test_get_boolean_false(
+            'INPUT_ADAPTIVE_CONNECT_LIMIT',
+            lambda: self.testObj.get_adaptive_connect_limit())
+
     def test_resolvebeforefilter_true(self):
         self._test_get_boolean_true(
             'INPUT_RESOLVE_BEFORE_FILTERING',
@@ -179,6 +241,28 @@ class TestInputValidator(unittest.TestCase):
             results = method()
             self.assertEqual(5, len(results))
 
+    def test_regexes_default(self):
+        for methodName in REGEX_METHODS_BY_VARNAME.values():
+            self.assertEqual([], getattr(self.testObj, methodName)())
+
+    def test_regexes_are_one_per_line(self):
+        for varName, methodName in REGEX_METHODS_BY_VARNAME.items():
+            self.env.clear()
+            self.env[varName] = '^/a{1,3}/\n\n  /b[,.]c$ \n'
+            self.assertEqual(
+                ['^/a{1,3}/', '/b[,.]c$'], getattr(self.testObj, methodName)())
+
+    def test_regexes_bad(self):
+        for varName, methodName in REGEX_METHODS_BY_VARNAME.items():
+            self.env.clear()
+            self.env[varName] = '/a\n/b(c'
+            with self.assertRaises(Exception) as context:
+                getattr(self.testObj, methodName)()
+            self.assert_exception_message(
+                context,
+                f"'{varName}' environment variable" +
+                " expected to contain valid regular expression: /b(c")
+
     def test_defaultMaxTries(self):
         self.assertEqual(
             DEFAULT_RETRY_MAX_TRIES, self.testObj.get_retry_maxtries())
@@ -251,6 +335,164 @@ class TestInputValidator(unittest.TestCase):
             "'INPUT_CONNECT_LIMIT_PER_HOST' environment variable" +
             " expected to be a number")
 
+    def test_min_connect_limit_per_host_default(self):
+        self.assertEqual(
+            DEFAULT_MIN_CONNECT_LIMIT_PER_HOST,
+            self.testObj.get_min_connect_limit_per_host())
+
+    def test_min_connect_limit_per_host_good(self):
+        self.env['INPUT_MIN_CONNECT_LIMIT_PER_HOST'] = '2'
+        self.assertEqual(
+            2, self.testObj.get_min_connect_limit_per_host())
+
+    def test_min_connect_limit_per_host_bad(self):
+        self.env['INPUT_MIN_CONNECT_LIMIT_PER_HOST'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_min_connect_limit_per_host()
+        self.assert_exception_message(
+            context,
+            "'INPUT_MIN_CONNECT_LIMIT_PER_HOST' environment variable" +
+            " expected to be a number")
+
+    def test_max_connect_limit_per_host_default(self):
+        self.assertEqual(
+            DEFAULT_MAX_CONNECT_LIMIT_PER_HOST,
+            self.testObj.get_max_connect_limit_per_host())
+
+    def test_max_connect_limit_per_host_good(self):
+        self.env['INPUT_MAX_CONNECT_LIMIT_PER_HOST'] = '50'
+        self.assertEqual(
+            50, self.testObj.get_max_connect_limit_per_host())
+
+    def test_max_connect_limit_per_host_bad(self):
+        self.env['INPUT_MAX_CONNECT_LIMIT_PER_HOST'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_max_connect_limit_per_host()
+        self.assert_exception_message(
+            context,
+            "'INPUT_MAX_CONNECT_LIMIT_PER_HOST' environment variable" +
+            " expected to be a number")
+
+    def test_requests_per_second_per_host_default(self):
+        self.assertEqual(
+            0, self.testObj.get_requests_per_second_per_host())
+
+    def test_requests_per_second_per_host_good(self):
+        self.env['INPUT_REQUESTS_PER_SECOND_PER_HOST'] = '5'
+        self.assertEqual(
+            5, self.testObj.get_requests_per_second_per_host())
+
+    def test_requests_per_second_per_host_bad(self):
+        self.env['INPUT_REQUESTS_PER_SECOND_PER_HOST'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_requests_per_second_per_host()
+        self.assert_exception_message(
+            context,
+            "'INPUT_REQUESTS_PER_SECOND_PER_HOST' environment variable" +
+            " expected to be a number")
+
+    def test_circuit_breaker_threshold_default(self):
+        self.assertEqual(
+            DEFAULT_CIRCUIT_BREAKER_THRESHOLD,
+            self.testObj.get_circuit_breaker_threshold())
+
+    def test_circuit_breaker_threshold_good(self):
+        self.env['INPUT_CIRCUIT_BREAKER_THRESHOLD'] = '3'
+        self.assertEqual(
+            3, self.testObj.get_circuit_breaker_threshold())
+
+    def test_circuit_breaker_threshold_bad(self):
+        self.env['INPUT_CIRCUIT_BREAKER_THRESHOLD'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_circuit_breaker_threshold()
+        self.assert_exception_message(
+            context,
+            "'INPUT_CIRCUIT_BREAKER_THRESHOLD' environment variable" +
+            " expected to be a number")
+
+    def test_retry_budget_default(self):
+        self.assertEqual(-1, self.testObj.get_retry_budget())
+
+    def test_retry_budget_good(self):
+        self.env['INPUT_RETRY_BUDGET'] = '50'
+        self.assertEqual(50, self.testObj.get_retry_budget())
+
+    def test_retry_budget_bad(self):
+        self.env['INPUT_RETRY_BUDGET'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_retry_budget()
+        self.assert_exception_message(
+            context,
+            "'INPUT_RETRY_BUDGET' environment variable" +
+            " expected to be a number")
+
+    def test_retry_budget_percent_default(self):
+        self.assertEqual(0, self.testObj.get_retry_budget_percent())
+
+    def test_retry_budget_percent_good(self):
+        self.env['INPUT_RETRY_BUDGET_PERCENT'] = '10'
+        self.assertEqual(10, self.testObj.get_retry_budget_percent())
+
+    def test_retry_budget_percent_bad(self):
+        self.env['INPUT_RETRY_BUDGET_PERCENT'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_retry_budget_percent()
+        self.assert_exception_message(
+            context,
+            "'INPUT_RETRY_BUDGET_PERCENT' environment variable" +
+            " expected to be a number")
+
+    def test_circuit_breaker_cooldown_default(self):
+        self.assertEqual(
+            DEFAULT_CIRCUIT_BREAKER_COOLDOWN,
+            self.testObj.get_circuit_breaker_cooldown())
+
+    def test_circuit_breaker_cooldown_good(self):
+        self.env['INPUT_CIRCUIT_BREAKER_COOLDOWN'] = '60'
+        self.assertEqual(
+            60, self.testObj.get_circuit_breaker_cooldown())
+
+    def test_circuit_breaker_cooldown_bad(self):
+        self.env['INPUT_CIRCUIT_BREAKER_COOLDOWN'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_circuit_breaker_cooldown()
+        self.assert_exception_message(
+            context,
+            "'INPUT_CIRCUIT_BREAKER_COOLDOWN' environment variable" +
+            " expected to be a number")
+
+    def test_deadline_default(self):
+        self.assertEqual(0, self.testObj.get_deadline())
+
+    def test_deadline_good(self):
+        self.env['INPUT_DEADLINE'] = '540'
+        self.assertEqual(540, self.testObj.get_deadline())
+
+    def test_deadline_bad(self):
+        self.env['INPUT_DEADLINE'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_deadline()
+        self.assert_exception_message(
+            context,
+            "'INPUT_DEADLINE' environment variable" +
+            " expected to be a number")
+
+    def test_max_failures_default(self):
+        self.assertEqual(0, self.testObj.get_max_failures())
+
+    def test_max_failures_good(self):
+        self.env['INPUT_MAX_FAILURES'] = '1'
+        self.assertEqual(1, self.testObj.get_max_failures())
+
+    def test_max_failures_bad(self):
+        self.env['INPUT_MAX_FAILURES'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_max_failures()
+        self.assert_exception_message(
+            context,
+            "'INPUT_MAX_FAILURES' environment variable" +
+            " expected to be a number")
+
     def test_timeout_default(self):
         self.assertEqual(
             DEFAULT_TIMEOUT,
@@ -270,6 +512,265 @@ class TestInputValidator(unittest.TestCase):
             "'INPUT_TIMEOUT' environment variable" +
             " expected to be a number")
 
+    def test_max_concurrent_requests_default(self):
+        self.assertEqual(
+            DEFAULT_MAX_CONCURRENT_REQUESTS,
+            self.testObj.get_max_concurrent_requests())
+
+    def test_max_concurrent_requests_good(self):
+        self.env['INPUT_MAX_CONCURRENT_REQUESTS'] = '25'
+        self.assertEqual(
+            25, self.testObj.get_max_concurrent_requests())
+
+    def test_max_concurrent_requests_bad(self):
+        self.env['INPUT_MAX_CONCURRENT_REQUESTS'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_max_concurrent_requests()
+        self.assert_exception_message(
+            context,
+            "'INPUT_MAX_CONCURRENT_REQUESTS' environment variable" +
+            " expected to be a number")
+
+    def test_max_frontier_size_default(self):
+        self.assertEqual(
+            DEFAULT_MAX_FRONTIER_SIZE,
+            self.testObj.get_max_frontier_size())
+
+    def test_max_frontier_size_good(self):
+        self.env['INPUT_MAX_FRONTIER_SIZE'] = '500'
+        self.assertEqual(
+            500, self.testObj.get_max_frontier_size())
+
+    def test_max_frontier_size_bad(self):
+        self.env['INPUT_MAX_FRONTIER_SIZE'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_max_frontier_size()
+        self.assert_exception_message(
+            context,
+            "'INPUT_MAX_FRONTIER_SIZE' environment variable" +
+            " expected to be a number")
+
+    def test_frontier_memory_size_default(self):
+        self.assertEqual(
+            DEFAULT_FRONTIER_MEMORY_SIZE,
+            self.testObj.get_frontier_memory_size())
+
+    def test_frontier_memory_size_good(self):
+        self.env['INPUT_FRONTIER_MEMORY_SIZE'] = '1000'
+        self.assertEqual(
+            1000, self.testObj.get_frontier_memory_size())
+
+    def test_frontier_memory_size_bad(self):
+        self.env['INPUT_FRONTIER_MEMORY_SIZE'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_frontier_memory_size()
+        self.assert_exception_message(
+            context,
+            "'INPUT_FRONTIER_MEMORY_SIZE' environment variable" +
+            " expected to be a number")
+
+    def test_frontier_spill_dir_default(self):
+        self.assertIsNone(self.testObj.get_frontier_spill_dir())
+
+    def test_frontier_spill_dir_empty(self):
+        self.env['INPUT_FRONTIER_SPILL_DIR'] = ''
+        self.assertIsNone(self.testObj.get_frontier_spill_dir())
+
+    def test_frontier_spill_dir_value(self):
+        self.env['INPUT_FRONTIER_SPILL_DIR'] = '/tmp/frontier'
+        self.assertEqual(
+            '/tmp/frontier', self.testObj.get_frontier_spill_dir())
+
+    def test_visited_index_default(self):
+        self.assertEqual(
+            DEFAULT_VISITED_INDEX, self.testObj.get_visited_index())
+
+    def test_visited_index_good(self):
+        for index in ['exact', 'hashed', 'bloom']:
+            self.env['INPUT_VISITED_INDEX'] = f' {index.upper()} '
+            self.assertEqual(index, self.testObj.get_visited_index())
+
+    def test_visited_index_bad(self):
+        self.env['INPUT_VISITED_INDEX'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_visited_index()
+        self.assert_exception_message(
+            context,
+            "'INPUT_VISITED_INDEX' environment variable" +
+            " expected to be one of: exact, hashed, bloom")
+
+    def test_visited_bloom_capacity_default(self):
+        self.assertEqual(
+            DEFAULT_VISITED_BLOOM_CAPACITY,
+            self.testObj.get_visited_bloom_capacity())
+
+    def test_visited_bloom_capacity_good(self):
+        self.env['INPUT_VISITED_BLOOM_CAPACITY'] = '5000'
+        self.assertEqual(
+            5000, self.testObj.get_visited_bloom_capacity())
+
+    def test_visited_bloom_capacity_bad(self):
+        self.env['INPUT_VISITED_BLOOM_CAPACITY'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_visited_bloom_capacity()
+        self.assert_exception_message(
+            context,
+            "'INPUT_VISITED_BLOOM_CAPACITY' environment variable" +
+            " expected to be a number")
+
+    def test_canonicalize_urls_default(self):
+        self.assertEqual(
+            DEFAULT_CANONICALIZE_URLS,
+            self.testObj.get_canonicalize_urls())
+
+    def test_canonicalize_urls_true(self):
+        self._test_get_boolean_true(
+            'INPUT_CANONICALIZE_URLS',
+            lambda: self.testObj.get_canonicalize_urls())
+
+    def test_canonicalize_urls_false(self):
+        for valueStr in ['false', 'F', 'no', 'off']:
+            self.env['INPUT_CANONICALIZE_URLS'] = valueStr
+            self.assertFalse(self.testObj.get_canonicalize_urls())
+
+    def test_sort_query_params_true(self):
+        self._test_get_boolean_true(
+            'INPUT_SORT_QUERY_PARAMS',
+            lambda: self.testObj.get_sort_query_params())
+
+    def test_sort_query_params_false(self):
+        self._test_get_boolean_false(
+            'INPUT_SORT_QUERY_PARAMS',
+            lambda: self.testObj.get_sort_query_params())
+
+    def test_drop_query_params_default(self):
+        self.assertEqual([], self.testObj.get_drop_query_params())
+
+    def test_drop_query_params_value(self):
+        self.env['INPUT_DROP_QUERY_PARAMS'] = 'utm_*, sessionid'
+        self.assertEqual(
+            ['utm_*', 'sessionid'], self.testObj.get_drop_query_params())
+
+    def test_max_referrers_default(self):
+        self.assertEqual(
+            DEFAULT_MAX_REFERRERS, self.testObj.get_max_referrers())
+
+    def test_max_referrers_good(self):
+        self.env['INPUT_MAX_REFERRERS'] = '10'
+        self.assertEqual(10, self.testObj.get_max_referrers())
+
+    def test_max_referrers_bad(self):
+        self.env['INPUT_MAX_REFERRERS'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_max_referrers()
+        self.assert_exception_message(
+            context,
+            "'INPUT_MAX_REFERRERS' environment variable" +
+            " expected to be a number")
+
+    def test_checkpoint_file_default(self):
+        self.assertIsNone(self.testObj.get_checkpoint_file())
+
+    def test_checkpoint_file_value(self):
+        self.env['INPUT_CHECKPOINT_FILE'] = '.deadseeker-journal'
+        self.assertEqual(
+            '.deadseeker-journal', self.testObj.get_checkpoint_file())
+
+    def test_cache_dir_default(self):
+        self.assertIsNone(self.testObj.get_cache_dir())
+
+    def test_cache_dir_value(self):
+        self.env['INPUT_CACHE_DIR'] = '.deadseeker-cache'
+        self.assertEqual('.deadseeker-cache', self.testObj.get_cache_dir())
+
+    def test_offsite_cache_ttl_default(self):
+        self.assertEqual(
+            DEFAULT_OFFSITE_CACHE_TTL, self.testObj.get_offsite_cache_ttl())
+
+    def test_offsite_cache_ttl_good(self):
+        self.env['INPUT_OFFSITE_CACHE_TTL'] = '86400'
+        self.assertEqual(86400, self.testObj.get_offsite_cache_ttl())
+
+    def test_offsite_cache_ttl_bad(self):
+        self.env['INPUT_OFFSITE_CACHE_TTL'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_offsite_cache_ttl()
+        self.assert_exception_message(
+            context,
+            "'INPUT_OFFSITE_CACHE_TTL' environment variable" +
+            " expected to be a number")
+
+    def test_parse_workers_default(self):
+        self.assertEqual(
+            DEFAULT_PARSE_WORKERS, self.testObj.get_parse_workers())
+
+    def test_parse_workers_good(self):
+        self.env['INPUT_PARSE_WORKERS'] = '4'
+        self.assertEqual(4, self.testObj.get_parse_workers())
+
+    def test_parse_workers_bad(self):
+        self.env['INPUT_PARSE_WORKERS'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_parse_workers()
+        self.assert_exception_message(
+            context,
+            "'INPUT_PARSE_WORKERS' environment variable" +
+            " expected to be a number")
+
+    def test_parse_process_threshold_default(self):
+        self.assertEqual(
+            DEFAULT_PARSE_PROCESS_THRESHOLD,
+            self.testObj.get_parse_process_threshold())
+
+    def test_parse_process_threshold_good(self):
+        self.env['INPUT_PARSE_PROCESS_THRESHOLD'] = '1048576'
+        self.assertEqual(
+            1048576, self.testObj.get_parse_process_threshold())
+
+    def test_parse_process_threshold_bad(self):
+        self.env['INPUT_PARSE_PROCESS_THRESHOLD'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_parse_process_threshold()
+        self.assert_exception_message(
+            context,
+            "'INPUT_PARSE_PROCESS_THRESHOLD' environment variable" +
+            " expected to be a number")
+
+    def test_html_parser_default(self):
+        self.assertEqual(
+            DEFAULT_HTML_PARSER, self.testObj.get_html_parser())
+
+    def test_html_parser_good(self):
+        for html_parser in ['html.parser', 'lxml', 'scan']:
+            self.env['INPUT_HTML_PARSER'] = f' {html_parser.upper()} '
+            self.assertEqual(html_parser, self.testObj.get_html_parser())
+
+    def test_html_parser_bad(self):
+        self.env['INPUT_HTML_PARSER'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_html_parser()
+        self.assert_exception_message(
+            context,
+            "'INPUT_HTML_PARSER' environment variable" +
+            " expected to be one of: html.parser, lxml, scan")
+
+    def test_link_cache_size_default(self):
+        self.assertEqual(
+            DEFAULT_LINK_CACHE_SIZE, self.testObj.get_link_cache_size())
+
+    def test_link_cache_size_good(self):
+        self.env['INPUT_LINK_CACHE_SIZE'] = '0'
+        self.assertEqual(0, self.testObj.get_link_cache_size())
+
+    def test_link_cache_size_bad(self):
+        self.env['INPUT_LINK_CACHE_SIZE'] = 'apples'
+        with self.assertRaises(Exception) as context:
+            self.testObj.get_link_cache_size()
+        self.assert_exception_message(
+            context,
+            "'INPUT_LINK_CACHE_SIZE' environment variable" +
+            " expected to be a number")
+
     def test_defaultWebAgent(self):
         self.assertEqual(
             DEFAULT_WEB_AGENT, self.testObj.get_webagent())
@@ -8,12 +8,19 @@ import socket
 from threading import Thread
 import os
 import sys
+import tempfile
 from typing import ClassVar, List
 import logging
 import pytest
 from deadseeker.action import run_action
+from deadseeker.deadseeker import uvloop
+from deadseeker.linkparser import etree
 
+LXML_INSTALLED = etree is not None
+UVLOOP_INSTALLED = uvloop is not None
 DIRECTORY = os.path.join(os.path.dirname(__file__), "mock_server")
+# paths that were requested with If-Modified-Since
+CONDITIONAL_GETS: List[str] = []
 
 
 class MockServerRequestHandler(SimpleHTTPRequestHandler):
@@ -29,6 +36,8 @@ class MockServerRequestHandler(SimpleHTTPRequestHandler):
             super().do_HEAD()
 
     def do_GET(self):
+        if self.headers.get('If-Modified-Since'):
+            CONDITIONAL_GETS.append(self.path)
         if not self.check_error() and not self.check_redirect():
             super().do_GET()
 
@@ -112,10 +121,11 @@ class TestIntegration(unittest.TestCase):
                 patch.object(self.logger, 'error') as error_mock, \
                 patch.object(self.logger, 'info') as info_mock:
             run_action()
+            # the 404 is final, while the 500 is retried
             expected_errors = [
-                f'::error ::ClientResponseError: 500 - {self.url}/page4.html found by navigating through: {self.url}',
                 f'::error ::ClientResponseError: 404 - {self.url}/page3.html' +
-                f' found by navigating through: {self.url} -> {self.url}/page1.html -> {self.url}/page2.html'
+                f' found by navigating through: {self.url} -> {self.url}/page1.html -> {self.url}/page2.html',
+                f'::error ::ClientResponseError: 500 - {self.url}/page4.html found by navigating through: {self.url}'
             ]
             actual_errors: List[str] = []
             for call in error_mock.call_args_list:
@@ -156,6 +166,75 @@ class TestIntegration(unittest.TestCase):
                 actual_infos,
                 f'Unexpected actual responses: {actual_infos}')
 
+    def test_cached_run_reports_the_same(self):
+        self.env['INPUT_EXCLUDE_URL_PREFIX'] = \
+            'https://www.google.com'
+        with tempfile.TemporaryDirectory() as cache_dir:
+            self.env['INPUT_CACHE_DIR'] = cache_dir
+            first_errors, first_infos = self._run_logged()
+            CONDITIONAL_GETS.clear()
+            second_errors, second_infos = self._run_logged()
+        self.assertIn('/page1.html', CONDITIONAL_GETS)
+        self.assertEqual(first_errors, second_errors)
+        self.assertEqual(
+            sorted(info.rsplit(' - ', 1)[0] for info in first_infos),
+            sorted(info.rsplit(' - ', 1)[0] for info in second_infos))
+
+    def test_checkpointed_run_reports_the_same(self):
+        with tempfile.TemporaryDirectory() as directory:
+            journal = os.path.join(directory, 'journal')
+            # the crawl goes through the redirect of /subpages/subsubpages
+            self._assert_reports_the_same({'INPUT_CHECKPOINT_FILE': journal})
+            self.assertGreater(os.path.getsize(journal), 0)
+
+    def test_resumed_run_reports_the_same(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.env['INPUT_CHECKPOINT_FILE'] = \
+                os.path.join(directory, 'journal')
+            self._assert_reports_the_same({'INPUT_RESUME': 'true'})
+
+    def test_streamed_run_reports_the_same(self):
+        self._assert_reports_the_same({'INPUT_STREAM_HTML': 'true'})
+
+    def test_pooled_run_reports_the_same(self):
+        self._assert_reports_the_same({
+            'INPUT_PARSE_WORKERS': '2',
+            # some pages in worker processes, the others in threads
+            'INPUT_PARSE_PROCESS_THRESHOLD': '400'
+        })
+
+    @unittest.skipUnless(LXML_INSTALLED, 'lxml is not installed')
+    def test_lxml_run_reports_the_same(self):
+        self._assert_reports_the_same({'INPUT_HTML_PARSER': 'lxml'})
+
+    def test_scan_run_reports_the_same(self):
+        self._assert_reports_the_same({'INPUT_HTML_PARSER': 'scan'})
+
+    @unittest.skipUnless(UVLOOP_INSTALLED, 'uvloop is not installed')
+    def test_uvloop_run_reports_the_same(self):
+        self._assert_reports_the_same({'INPUT_USE_UVLOOP': 'true'})
+
+    def _assert_reports_the_same(self, inputs):
+        self.env['INPUT_EXCLUDE_URL_PREFIX'] = \
+            'https://www.google.com'
+        errors, infos = self._run_logged()
+        self.env.update(inputs)
+        other_errors, other_infos = self._run_logged()
+        self.assertEqual(errors, other_errors)
+        self.assertEqual(
+            sorted(info.rsplit(' - ', 1)[0] for info in infos),
+            sorted(info.rsplit(' - ', 1)[0] for info in other_infos))
+
+    def _run_logged(self):
+        with \
+                patch.dict(os.environ, self.env), \
+                patch.object(self.logger, 'error') as error_mock, \
+                patch.object(self.logger, 'info') as info_mock:
+            run_action()
+            errors = [call[0][0] for call in error_mock.call_args_list]
+            infos = [call[0][0] for call in info_mock.call_args_list]
+        return errors, infos
+
 
 if __name__ == '__main__':
     unittest.main()
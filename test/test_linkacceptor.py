@@ -1,11 +1,22 @@
+import pickle
+import random
+import re
+import time
 import unittest
 from unittest.mock import Mock, patch
 from deadseeker.linkacceptor import (
     LinkAcceptorBuilder,
     LinkAcceptor,
     DefaultLinkAcceptorFactory,
-    AcceptAllLinkAcceptor
+    AcceptAllLinkAcceptor,
+    CachingLinkAcceptor,
+    CompiledLinkAcceptor,
+    CompositeLinkAcceptor,
+    glob_pattern,
+    regex_pattern,
+    trie_pattern
 )
+from fnmatch import fnmatchcase, translate
 from deadseeker.common import SeekerConfig
 from typing import List
 
@@ -22,7 +33,12 @@ ALL_METHODS: List[str] = [
     'addExcludeSuffix',
     'addIncludeContained',
     'addExcludeContained',
+    'addIncludeRegex',
+    'addExcludeRegex',
+    'addIncludeGlob',
+    'addExcludeGlob',
 ]
+STRATEGIES = ['prefix', 'suffix', 'contained', 'regex', 'glob']
 
 
 class TestLinkAcceptor(unittest.TestCase):
@@ -64,6 +80,74 @@ class TestLinkAcceptor(unittest.TestCase):
         self.assertNotAccepted(STRING_1)
         self.assertAccepted(STRING_2)
 
+    def test_include_regex(self):
+        self.builder.addIncludeRegex(f'{STRING_1_INNER}a+s$')
+        self.assertAccepted(STRING_1)
+        self.assertNotAccepted(STRING_2)
+
+    def test_exclude_regex(self):
+        self.builder.addExcludeRegex(f'{STRING_1_INNER}a+s$')
+        self.assertNotAccepted(STRING_1)
+        self.assertAccepted(STRING_2)
+
+    def test_include_glob(self):
+        self.builder.addIncludeGlob(f'{STRING_1_PREFIX}*')
+        self.assertAccepted(STRING_1)
+        self.assertNotAccepted(STRING_2)
+
+    def test_exclude_glob(self):
+        self.builder.addExcludeGlob(f'*{STRING_1_SUFFIX}')
+        self.assertNotAccepted(STRING_1)
+        self.assertAccepted(STRING_2)
+
+    def test_glob_matches_whole_link(self):
+        self.builder.addIncludeGlob('https://mysite.com/*.htm?', '*/[0-9]')
+        self.assertAccepted('https://mysite.com/docs/index.html')
+        self.assertAccepted('https://othersite.com/7')
+        self.assertNotAccepted('https://mysite.com/index.html?x=1')
+        self.assertNotAccepted('https://othersite.com/mysite.com/a.html')
+
+    def test_regexes_and_globs_are_compiled_with_other_kinds(self):
+        self.builder\
+            .addIncludeRegex(r'^https://mysite\.com/v\d+/', '/blog/')\
+            .addExcludeRegex(r'/\d{4}/\d{2}/')\
+            .addExcludeGlob('*.pdf')\
+            .addExcludeContained('/private/')
+        self.assertTrue(
+            isinstance(self.builder.build(), CompiledLinkAcceptor))
+        self.assertAccepted('https://mysite.com/v2/index.html')
+        self.assertAccepted('https://othersite.com/blog/post.html')
+        self.assertNotAccepted('https://mysite.com/latest/index.html')
+        self.assertNotAccepted('https://mysite.com/v2/2020/01/index.html')
+        self.assertNotAccepted('https://mysite.com/v2/manual.pdf')
+        self.assertNotAccepted('https://mysite.com/v2/private/a.html')
+
+    def test_regex_flags_stay_with_their_regex(self):
+        self.builder.addIncludeRegex('(?i)^BAN', 'app.es$', '(?s)x.y')
+        self.assertTrue(
+            isinstance(self.builder.build(), CompiledLinkAcceptor))
+        self.assertAccepted(STRING_1.upper())
+        self.assertAccepted(STRING_2)
+        self.assertAccepted('x\ny')
+        self.assertNotAccepted(STRING_2.upper())
+        self.assertNotAccepted('app\nes')
+
+    def test_regexes_that_cannot_be_combined(self):
+        self.builder.addIncludeRegex('(?P<fruit>apples)', '(?P<fruit>ban)')
+        acceptor = self.builder.build()
+        self.assertFalse(isinstance(acceptor, CompiledLinkAcceptor))
+        self.assertTrue(isinstance(acceptor, CompositeLinkAcceptor))
+        self.assertAccepted(STRING_1)
+        self.assertAccepted(STRING_2)
+
+    def test_regexes_with_numbered_references_are_not_combined(self):
+        self.builder.addIncludeRegex('(a)\\1', '(b)\\1')
+        acceptor = self.builder.build()
+        self.assertFalse(isinstance(acceptor, CompiledLinkAcceptor))
+        self.assertAccepted('xaa')
+        self.assertAccepted('xbb')
+        self.assertNotAccepted('xab')
+
     def test_AcceptAllIsReturnedWhenOnlyBlanksAreProvided(self):
         for methodName in ALL_METHODS:
             method = getattr(self.builder, methodName)
@@ -73,6 +157,91 @@ class TestLinkAcceptor(unittest.TestCase):
             self.assertTrue(result.accepts(STRING_1))
             self.assertTrue(result.accepts(STRING_2))
 
+    def test_builds_compiled_acceptor(self):
+        self.builder.addIncludePrefix(STRING_1_PREFIX)
+        self.assertTrue(
+            isinstance(self.builder.build(), CompiledLinkAcceptor))
+
+    def test_values_of_one_kind_are_alternatives(self):
+        self.builder.addIncludePrefix(STRING_1_PREFIX, 'app')
+        self.assertAccepted(STRING_1)
+        self.assertAccepted(STRING_2)
+        self.assertNotAccepted('cherries')
+
+    def test_kinds_must_all_accept(self):
+        self.builder\
+            .addIncludePrefix('https://mysite.com/')\
+            .addExcludeSuffix('.pdf', '.zip')\
+            .addExcludeContained('/private/')
+        self.assertAccepted('https://mysite.com/index.html')
+        self.assertNotAccepted('https://othersite.com/index.html')
+        self.assertNotAccepted('https://mysite.com/report.pdf')
+        self.assertNotAccepted('https://mysite.com/private/index.html')
+
+    def test_values_are_no_patterns(self):
+        self.builder\
+            .addExcludeContained('?print=1', '(', '.*')\
+            .addIncludeSuffix('.html', '$')
+        self.assertAccepted('https://mysite.com/index.html')
+        self.assertAccepted('https://mysite.com/$')
+        self.assertNotAccepted('https://mysite.com/index.htm')
+        self.assertNotAccepted('https://mysite.com/index.html?print=1')
+        self.assertNotAccepted('https://mysite.com/a(1).html')
+        self.assertNotAccepted('https://mysite.com/.*.html')
+
+    def test_empty_value_matches_everything(self):
+        self.builder.addExcludeSuffix('')
+        self.assertNotAccepted(STRING_1)
+        self.assertNotAccepted('')
+
+    def test_multiline_links(self):
+        self.builder.addIncludeSuffix('.html').addExcludeContained('x')
+        self.assertAccepted('/a\n/b.html')
+        self.assertNotAccepted('/a.html\n')
+        self.assertNotAccepted('/a\nx.html')
+
+    def test_same_links_as_composite_acceptor(self):
+        rng = random.Random(7)
+
+        def value():
+            return ''.join(
+                rng.choice('ab/.') for _ in range(rng.randint(0, 4)))
+
+        for _ in range(500):
+            for methodName in rng.sample(ALL_METHODS, rng.randint(1, 4)):
+                getattr(self.builder, methodName)(
+                    *[value() for _ in range(rng.randint(1, 5))])
+            compiled = self.builder.build()
+            composite = CompositeLinkAcceptor(self.builder.acceptors)
+            for _ in range(20):
+                link = value() + value()
+                self.assertEqual(
+                    composite.accepts(link), compiled.accepts(link),
+                    f'{link} for {compiled.pattern.pattern}')
+            self.builder = LinkAcceptorBuilder()
+
+    def test_globs_with_many_stars_accept_like_composite_acceptor(self):
+        globs = ['*/docs/*.png', '*/tags/*', '*/a*b*/*.html', 'x/*/*']
+        links = [
+            '/docs/a.png', 'x/docs/y/z.png', '/docs/a.png.gif', '/tags/',
+            'x/tags', '/ab/c.html', '/a/b/c.html', '/acb/.html', 'x//',
+            'x/y', 'y/docs/tags/a.png'
+        ]
+        for methodName in ['addIncludeGlob', 'addExcludeGlob']:
+            getattr(self.builder, methodName)(*globs)
+            compiled = self.builder.build()
+            self.assertTrue(isinstance(compiled, CompiledLinkAcceptor))
+            composite = CompositeLinkAcceptor(self.builder.acceptors)
+            for link in links:
+                self.assertEqual(
+                    composite.accepts(link), compiled.accepts(link),
+                    f'{link} for {compiled.pattern.pattern}')
+            self.builder = LinkAcceptorBuilder()
+
+    def test_other_acceptors_cannot_be_compiled(self):
+        with self.assertRaises(ValueError):
+            CompiledLinkAcceptor([AcceptAllLinkAcceptor()])
+
     def assertAccepted(self, value: str) -> None:
         self.assertTrue(self.accepts(value))
 
@@ -83,16 +252,200 @@ class TestLinkAcceptor(unittest.TestCase):
         return self.builder.build().accepts(value)
 
 
+class TestTriePattern(unittest.TestCase):
+
+    def test_shared_beginnings_share_a_branch(self):
+        self.assertEqual(
+            'ab(?:c|d)', trie_pattern(['abc', 'abd']))
+
+    def test_shorter_value_is_enough(self):
+        self.assertEqual('ab', trie_pattern(['abc', 'ab']))
+
+    def test_at_end(self):
+        pattern = trie_pattern(['abc', 'ab'], at_end=True)
+        self.assertEqual('ab(?:c\\Z|\\Z)', pattern)
+        self.assertTrue(re.match(pattern, 'ab'))
+        self.assertTrue(re.match(pattern, 'abc'))
+        self.assertFalse(re.match(pattern, 'abd'))
+
+    def test_characters_are_escaped(self):
+        self.assertEqual('\\.\\*', trie_pattern(['.*']))
+
+
+class TestGlobPattern(unittest.TestCase):
+
+    def test_shared_beginnings_share_a_branch(self):
+        self.assertEqual(
+            '.*/(?:a/x\\.png\\Z|b\\Z)', glob_pattern(['*/a/x.png', '**/b']))
+
+    def test_stars_after_the_second_are_translated_by_fnmatch(self):
+        pattern = glob_pattern(['a/*/*.png'])
+        self.assertTrue(pattern.startswith('a/'), pattern)
+        self.assertTrue(
+            pattern.endswith(translate('*.png')[4:-3] + '\\Z'), pattern)
+
+    def test_globs_with_many_stars_share_a_branch(self):
+        pattern = glob_pattern(['*/docs/*.png', '*/docs/*.jpg', '*/tags/*'])
+        self.assertEqual(1, pattern.count('docs'), pattern)
+
+    def test_first_star_does_not_backtrack(self):
+        pattern = re.compile(glob_pattern(['*a*b']), re.DOTALL)
+        start = time.monotonic()
+        self.assertIsNone(pattern.match('a' * 100000))
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_atomic_groups_are_emulated_before_python_3_11(self):
+        globs = ['*/docs/*.png', '*/docs/*.jpg', 'a*b*c']
+        links = ['/docs/x.png', 'x/docs/y.jpg', '/docs/x.gif', 'abc', 'acb']
+        with patch('deadseeker.linkacceptor.sys') as sys_mock:
+            sys_mock.version_info = (3, 10)
+            regex = glob_pattern(globs)
+        self.assertNotIn('(?>', regex)
+        pattern = re.compile(regex, re.DOTALL)
+        for link in links:
+            self.assertEqual(
+                any(fnmatchcase(link, glob) for glob in globs),
+                pattern.match(link) is not None,
+                f'{link} for {globs}')
+
+    def test_many_stars_do_not_backtrack(self):
+        pattern = re.compile(glob_pattern(['*a*a*a*a*a*a*a*b']), re.DOTALL)
+        start = time.monotonic()
+        self.assertIsNone(pattern.match('a' * 60))
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_wildcards(self):
+        self.assertEqual(
+            'x[^a-c].\\Z', glob_pattern(['x[!a-c]?']))
+
+    def test_brackets_are_closed_like_fnmatch(self):
+        self.assertEqual(
+            '(?:[]a]\\Z|\\[(?:!\\]\\Z|a\\Z))', glob_pattern(['[]a]', '[!]', '[a']))
+
+    def test_same_links_as_fnmatch(self):
+        rng = random.Random(3)
+
+        def value(characters, length):
+            return ''.join(
+                rng.choice(characters) for _ in range(rng.randint(0, length)))
+
+        for _ in range(2000):
+            globs = [value('ab*?[]!-/', 6) for _ in range(rng.randint(1, 3))]
+            pattern = re.compile(glob_pattern(globs), re.DOTALL)
+            for _ in range(10):
+                link = value('ab[]!-/\n', 8)
+                self.assertEqual(
+                    any(fnmatchcase(link, glob) for glob in globs),
+                    pattern.match(link) is not None,
+                    f'{link} for {globs}')
+
+
+class TestRegexPattern(unittest.TestCase):
+
+    def test_literal_beginnings_share_a_branch(self):
+        self.assertEqual(
+            '/(?:api/v(?-s:\\d+)|blog/)',
+            regex_pattern(['/api/v\\d+', '/blog/']))
+
+    def test_quantified_character_is_not_shared(self):
+        self.assertEqual(
+            'a(?:(?-s:\\.?d)|(?-s:b*c))', regex_pattern(['ab*c', 'a\\.?d']))
+
+    def test_alternatives_are_not_shared(self):
+        self.assertEqual(
+            '(?:(?-s:a|b)|a(?-s:$))', regex_pattern(['a|b', 'a$']))
+
+    def test_flags_stay_with_their_regex(self):
+        self.assertEqual(
+            '(?:(?i-s:ac)|(?is:ab)|^a)',
+            regex_pattern(['(?is)ab', '(?i)ac', '^a']))
+
+    def test_numbered_references_cannot_be_combined(self):
+        for regex in ['(a)\\1', '(a)?(?(1)b|c)']:
+            with self.assertRaises(re.error):
+                regex_pattern([regex])
+
+    def test_escaped_backslash_is_no_reference(self):
+        self.assertEqual('a\\\\1', regex_pattern(['a\\\\1']))
+
+    def test_same_links_as_search(self):
+        rng = random.Random(5)
+
+        def value(characters, length):
+            return ''.join(
+                rng.choice(characters) for _ in range(rng.randint(0, length)))
+
+        def valid(regex):
+            try:
+                return re.compile(regex).groups == 0
+            except re.error:
+                return False
+
+        for _ in range(2000):
+            regexes = [
+                regex for regex in
+                (value('ab^$.*+?|()\\/-', 7) for _ in range(3))
+                if valid(regex)]
+            if not regexes:
+                continue
+            pattern = re.compile('.*?' + regex_pattern(regexes), re.DOTALL)
+            for _ in range(10):
+                link = value('ab/.-\n', 8)
+                self.assertEqual(
+                    any(re.search(regex, link) for regex in regexes),
+                    pattern.match(link) is not None,
+                    f'{link} for {regexes}')
+
+
+class TestCachingLinkAcceptor(unittest.TestCase):
+
+    def setUp(self):
+        self.source = Mock(spec=LinkAcceptor)
+        self.source.accepts.side_effect = lambda link: link == STRING_1
+        self.testobj = CachingLinkAcceptor(self.source, 2)
+
+    def test_verdicts_are_the_ones_of_the_source(self):
+        self.assertTrue(self.testobj.accepts(STRING_1))
+        self.assertFalse(self.testobj.accepts(STRING_2))
+
+    def test_repeated_links_are_checked_once(self):
+        for _ in range(3):
+            self.assertTrue(self.testobj.accepts(STRING_1))
+        self.source.accepts.assert_called_once_with(STRING_1)
+        self.assertEqual((2, 1), self.testobj.cache_info())
+
+    def test_least_recently_checked_links_are_forgotten(self):
+        self.testobj.accepts(STRING_1)
+        self.testobj.accepts(STRING_2)
+        self.testobj.accepts(STRING_1)
+        self.testobj.accepts('cherries')
+        self.testobj.accepts(STRING_1)
+        self.testobj.accepts(STRING_2)
+        self.assertEqual((2, 4), self.testobj.cache_info())
+
+    def test_can_be_pickled_with_an_empty_cache(self):
+        testobj = CachingLinkAcceptor(
+            LinkAcceptorBuilder().addIncludePrefix(STRING_1_PREFIX).build(),
+            10)
+        testobj.accepts(STRING_1)
+        copy = pickle.loads(pickle.dumps(testobj))
+        self.assertEqual(10, copy.size)
+        self.assertEqual((0, 0), copy.cache_info())
+        self.assertTrue(copy.accepts(STRING_1))
+        self.assertFalse(copy.accepts(STRING_2))
+
+
 class TestDefaultLinkAcceptorFactory(unittest.TestCase):
 
     def setUp(self):
         self.config = Mock(spec=SeekerConfig)
+        self.config.link_cache_size = 0
         self.testobj = DefaultLinkAcceptorFactory()
 
     @patch('deadseeker.linkacceptor.LinkAcceptorBuilder')
     def test_returns_link_acceptor(self, mock_class):
         for inclusion in ['in', 'ex']:
-            for strategy in ['prefix', 'suffix', 'contained']:
+            for strategy in STRATEGIES:
                 attrname = f'{inclusion}clude{strategy}'
                 setattr(self.config, attrname, [attrname])
         mock_instance = mock_class()
@@ -102,18 +455,43 @@ class TestDefaultLinkAcceptorFactory(unittest.TestCase):
         mock_instance.addExcludeSuffix.return_value = mock_instance
         mock_instance.addIncludeContained.return_value = mock_instance
         mock_instance.addExcludeContained.return_value = mock_instance
+        mock_instance.addIncludeRegex.return_value = mock_instance
+        mock_instance.addExcludeRegex.return_value = mock_instance
+        mock_instance.addIncludeGlob.return_value = mock_instance
+        mock_instance.addExcludeGlob.return_value = mock_instance
         expected = Mock(spec=LinkAcceptor)
         mock_instance.build.return_value = expected
         actual = self.testobj.get_link_acceptor(self.config)
         self.assertIs(expected, actual)
 
         for inclusion in ['In', 'Ex']:
-            for strategy in ['Prefix', 'Suffix', 'Contained']:
+            for strategy in STRATEGIES:
                 attrname = f'{inclusion}clude{strategy}'.lower()
+                strategy = strategy.capitalize()
                 methodname = f'add{inclusion}clude{strategy}'
                 method = getattr(mock_instance, methodname)
                 method.assert_any_call(attrname)
 
+    def test_wraps_link_acceptor_in_cache(self):
+        for inclusion in ['in', 'ex']:
+            for strategy in STRATEGIES:
+                setattr(self.config, f'{inclusion}clude{strategy}', [])
+        self.config.excludeprefix = ['mailto:']
+        self.config.link_cache_size = 50
+        actual = self.testobj.get_link_acceptor(self.config)
+        self.assertTrue(isinstance(actual, CachingLinkAcceptor))
+        self.assertEqual(50, actual.size)
+        self.assertTrue(isinstance(actual.source, CompiledLinkAcceptor))
+        self.assertFalse(actual.accepts('mailto:someone@example.com'))
+
+    def test_accept_all_is_not_cached(self):
+        for inclusion in ['in', 'ex']:
+            for strategy in STRATEGIES:
+                setattr(self.config, f'{inclusion}clude{strategy}', [])
+        self.config.link_cache_size = 50
+        actual = self.testobj.get_link_acceptor(self.config)
+        self.assertTrue(isinstance(actual, AcceptAllLinkAcceptor))
+
 
 if __name__ == '__main__':
     unittest.main()
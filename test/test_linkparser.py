@@ -1,24 +1,85 @@
 import logging
-from deadseeker.linkparser import DefaultLinkParser, DefaultLinkParserFactory
-from deadseeker.linkacceptor import LinkAcceptor
-from deadseeker.common import SeekerConfig, UrlFetchResponse, UrlTarget
+from deadseeker.linkparser import (
+    BufferedLinkStream,
+    DefaultLinkParser,
+    DefaultLinkParserFactory,
+    LinkParser,
+    LxmlLinkParser,
+    PooledLinkParser,
+    ScanLinkParser
+)
+import deadseeker.linkparser
+from deadseeker.linkacceptor import LinkAcceptor, LinkAcceptorBuilder
+from deadseeker.common import (
+    SeekerConfig,
+    SeekResults,
+    UrlFetchResponse,
+    UrlTarget
+)
 import unittest
+from aiounittest import AsyncTestCase
 from unittest.mock import Mock, patch
 import os
 
 TESTFILE_LOC = os.path.join(os.path.dirname(__file__), "test_linkparser.html")
+LXML_INSTALLED = deadseeker.linkparser.etree is not None
 
 
 class TestDefaultLinkParserFactory(unittest.TestCase):
 
     def setUp(self):
         self.config = Mock(specf=SeekerConfig)
+        self.config.parse_workers = 0
+        self.config.html_parser = 'html.parser'
+        self.config.link_cache_size = 0
         self.linkacceptor = Mock(spec=LinkAcceptor)
         self.testobj = DefaultLinkParserFactory()
 
     def test_returns_defaultlinkparser(self):
         result = self.testobj.get_link_parser(self.config, self.linkacceptor)
         self.assertTrue(isinstance(result, DefaultLinkParser))
+        self.assertFalse(isinstance(result, PooledLinkParser))
+
+    def test_returns_pooledlinkparser_with_workers(self):
+        self.config.parse_workers = 3
+        self.config.parse_process_threshold = 1000
+        result = self.testobj.get_link_parser(self.config, self.linkacceptor)
+        self.assertTrue(isinstance(result, PooledLinkParser))
+        self.assertEqual(3, result.workers)
+        self.assertEqual(1000, result.process_threshold)
+        self.assertIs(self.linkacceptor, result.linkacceptor)
+        self.assertFalse(isinstance(result.linkparser, LxmlLinkParser))
+
+    @unittest.skipUnless(LXML_INSTALLED, 'lxml is not installed')
+    def test_returns_lxmllinkparser(self):
+        self.config.html_parser = 'lxml'
+        result = self.testobj.get_link_parser(self.config, self.linkacceptor)
+        self.assertTrue(isinstance(result, LxmlLinkParser))
+
+    @unittest.skipUnless(LXML_INSTALLED, 'lxml is not installed')
+    def test_pooledlinkparser_uses_lxml(self):
+        self.config.html_parser = 'lxml'
+        self.config.parse_workers = 1
+        self.config.parse_process_threshold = 1000
+        result = self.testobj.get_link_parser(self.config, self.linkacceptor)
+        self.assertTrue(isinstance(result.linkparser, LxmlLinkParser))
+
+    def test_returns_scanlinkparser(self):
+        self.config.html_parser = 'scan'
+        result = self.testobj.get_link_parser(self.config, self.linkacceptor)
+        self.assertTrue(isinstance(result, ScanLinkParser))
+
+    def test_falls_back_without_lxml(self):
+        self.config.html_parser = 'lxml'
+        logger = logging.getLogger('deadseeker.linkparser')
+        with patch.object(deadseeker.linkparser, 'etree', None), \
+                patch.object(logger, 'warning') as warning_mock:
+            result = self.testobj.get_link_parser(
+                self.config, self.linkacceptor)
+        self.assertTrue(isinstance(result, DefaultLinkParser))
+        self.assertFalse(isinstance(result, LxmlLinkParser))
+        warning_mock.assert_called_once_with(
+            'lxml is not installed, using html.parser instead')
 
 
 TEST_SEARCH_ATTRS = set(['href', 'src', 'data-src'])
@@ -35,6 +96,7 @@ class TestDefaultLinkParser(unittest.TestCase):
         self.config = Mock(spec=SeekerConfig)
         self.config.resolvebeforefilter = False
         self.config.search_attrs = TEST_SEARCH_ATTRS
+        self.config.link_cache_size = 100
         self.linkacceptor = Mock(spec=LinkAcceptor)
         self.linkacceptor.accepts.return_value = True
         self.testobj: DefaultLinkParser = \
@@ -100,6 +162,17 @@ class TestDefaultLinkParser(unittest.TestCase):
         ]
         self.assertEqual(expectedlinks, actuallinks)
 
+    def test_streamed_links_are_the_parsed_ones(self):
+        expectedlinks = self.testobj.parse(self.resp)
+        html = self.resp.html
+        self.resp.html = None
+        stream = self.testobj.stream(self.resp)
+        # chunks that split tags and attributes
+        for i in range(0, len(html), 7):
+            stream.feed(html[i:i + 7])
+        self.assertEqual(expectedlinks, stream.close())
+        self.assertIsNone(self.resp.html)
+
     def test_find_links_all_false(self):
         self.linkacceptor.accepts.return_value = False
         actuallinks = self.testobj.parse(self.resp)
@@ -147,6 +220,173 @@ class TestDefaultLinkParser(unittest.TestCase):
         actuallinks = self.testobj.parse(self.resp)
         self.assertEqual([], actuallinks)
 
+    def test_resolved_links_are_cached(self):
+        self.config.resolvebeforefilter = True
+        expectedlinks = self.testobj.parse(self.resp)
+        self.assertEqual(expectedlinks, self.testobj.parse(self.resp))
+        results = SeekResults()
+        self.testobj.add_statistics(results)
+        self.assertEqual(9, results.urljoin_cache_hits)
+        self.assertEqual(9, results.urljoin_cache_misses)
+        self.assertEqual(0, results.accept_cache_hits)
+
+    def test_no_statistics_without_cache(self):
+        self.config.link_cache_size = 0
+        self.config.resolvebeforefilter = True
+        self.testobj = type(self.testobj)(self.config, self.linkacceptor)
+        self.testobj.parse(self.resp)
+        results = SeekResults()
+        self.testobj.add_statistics(results)
+        self.assertEqual(0, results.urljoin_cache_misses)
+
+
+# the lxml parser has to find exactly the links of the default parser
+@unittest.skipUnless(LXML_INSTALLED, 'lxml is not installed')
+class TestLxmlLinkParser(TestDefaultLinkParser):
+
+    def setUp(self):
+        super().setUp()
+        self.testobj = LxmlLinkParser(self.config, self.linkacceptor)
+
+    def test_same_links_as_default_parser(self):
+        self.resp.html = \
+            '<A HREF="/x?a=1&amp;b=2">x</A><img SRC=/y.png />' + \
+            '<svg><image href="/z.svg"/></svg>' + \
+            '<script>var s = \'<a href="/in-script.html">\';</script>' + \
+            '<!-- <a href="/in-comment.html"> -->' + \
+            '<p><a href="/&#x61;&lt;b.html">x</a></p>' + \
+            '<table><a href="/in-table.html"></table>' + \
+            '<a href="/caf\u00e9.html"><a href=" /spaced.html ">'
+        expectedlinks = \
+            DefaultLinkParser(self.config, self.linkacceptor).parse(self.resp)
+        self.assertEqual(expectedlinks, self.testobj.parse(self.resp))
+        self.assertEqual(7, len(expectedlinks))
+
+
+# markup on which html.parser has rules of its own
+SCAN_TEST_HTMLS = [
+    '<A HREF="/x?a=1&amp;b=2">x</A><img SRC=/y.png />',
+    '<a href=\'/single.html\' href="/second.html"><a href>',
+    '<p><a href="/&#x61;&lt;b.html">x</a></p><a href=" /spaced.html ">',
+    '<a title="x>y" href="/q1"><a title=x"y href="/q2">' +
+    '<a b ="x>" href=/q3><a href = "/q4" ><a href=/q5/><a href="/q6"/>',
+    '<script>var s = \'<a href="/in-script.html">\';</script ><a href=/a>',
+    '<SCRIPT src=/s.js>document.write("<a href=/no>")</script><a href=/b>',
+    '<script src="/s.js"/><a href="/in-script-too.html"></script>',
+    '<style>a{} <a href="/in-style"></style><a href=/c>',
+    '<scriptx src=/d><script<="<x src=/e>"><a href=/f>',
+    '<!-- <a href="/in-comment.html"> --><![CDATA[<a href="/in-cdata">]]>',
+    '<!DOCTYPE html><?php <a href="/in-pi"> ?></a href=/in-end-tag>',
+    '<a data-href="/d" xhref="/x" href="&copy=1&amp;x" src=\'/s?a=1\'>',
+    '<a\nhref="/newline"\n><b title="href" class=src><a href="/g"',
+    '<a href="/h"><a title=\'unclosed href="/i"><a href="/j">',
+    '<a href="/k"><!-- unclosed <a href="/l">'
+]
+
+
+class TestScanLinkParser(TestDefaultLinkParser):
+
+    def setUp(self):
+        super().setUp()
+        self.testobj = ScanLinkParser(self.config, self.linkacceptor)
+
+    def test_same_links_as_default_parser(self):
+        defaultparser = DefaultLinkParser(self.config, self.linkacceptor)
+        for html in SCAN_TEST_HTMLS:
+            with self.subTest(html=html):
+                self.resp.html = html
+                self.assertEqual(
+                    defaultparser.parse(self.resp),
+                    self.testobj.parse(self.resp))
+
+    def test_search_attrs_can_change(self):
+        self.resp.html = '<a href="/a.html"><img src="/b.png">'
+        self.assertEqual(['/a.html', '/b.png'], self.testobj.parse(self.resp))
+        self.config.search_attrs = set(['src'])
+        self.assertEqual(['/b.png'], self.testobj.parse(self.resp))
+        self.config.search_attrs = set()
+        self.assertEqual([], self.testobj.parse(self.resp))
+
+
+class TestBufferedLinkStream(unittest.TestCase):
+
+    def test_whole_html_is_parsed_at_once(self):
+        linkparser = Mock(spec=LinkParser)
+        resp = UrlFetchResponse(UrlTarget('http://x.com/', 'http://x.com/', 1))
+        htmls = []
+        linkparser.parse.side_effect = \
+            lambda resp: htmls.append(resp.html) or ['/a.html']
+        stream = BufferedLinkStream(linkparser, resp)
+        stream.feed('<a href=')
+        stream.feed('"/a.html">')
+        self.assertEqual(['/a.html'], stream.close())
+        self.assertEqual(['<a href="/a.html">'], htmls)
+        self.assertIsNone(resp.html)
+
+
+class TestPooledLinkParser(AsyncTestCase):
+
+    def setUp(self):
+        self.resp = UrlFetchResponse(
+            UrlTarget('https://mysite.com/', 'https://mysite.com/', 1))
+        with open(TESTFILE_LOC) as f:
+            self.resp.html = f.read()
+        self.config = SeekerConfig()
+        self.config.search_attrs = TEST_SEARCH_ATTRS
+        self.config.resolvebeforefilter = True
+        # the acceptor has to be picklable to reach the worker processes
+        self.linkacceptor = LinkAcceptorBuilder()\
+            .addExcludeSuffix('.js')\
+            .build()
+        self.expectedlinks = \
+            DefaultLinkParser(self.config, self.linkacceptor).parse(self.resp)
+
+    def make_parser(self, process_threshold: int) -> PooledLinkParser:
+        testobj = PooledLinkParser(
+            self.config, self.linkacceptor, 2, process_threshold)
+        self.addCleanup(testobj.close)
+        return testobj
+
+    async def test_small_pages_are_parsed_in_threads(self):
+        testobj = self.make_parser(len(self.resp.html) + 1)
+        self.assertEqual(
+            self.expectedlinks, await testobj.parse_async(self.resp))
+        self.assertIsNotNone(testobj._threads)
+        self.assertIsNone(testobj._processes)
+
+    async def test_large_pages_are_parsed_in_processes(self):
+        testobj = self.make_parser(len(self.resp.html))
+        self.assertEqual(
+            self.expectedlinks, await testobj.parse_async(self.resp))
+        self.assertIsNone(testobj._threads)
+        self.assertIsNotNone(testobj._processes)
+
+    async def test_no_html_is_not_sent_to_a_pool(self):
+        testobj = self.make_parser(0)
+        self.resp.html = None
+        self.assertEqual([], await testobj.parse_async(self.resp))
+        self.assertIsNone(testobj._threads)
+        self.assertIsNone(testobj._processes)
+
+    async def test_close_shuts_down_the_pools(self):
+        testobj = self.make_parser(len(self.resp.html))
+        await testobj.parse_async(self.resp)
+        testobj.close()
+        self.assertIsNone(testobj._processes)
+        # the pools are started again when needed
+        self.assertEqual(
+            self.expectedlinks, await testobj.parse_async(self.resp))
+
+    async def test_close_without_wait_drops_the_queued_parses(self):
+        testobj = self.make_parser(len(self.resp.html))
+        await testobj.parse_async(self.resp)
+        processes = testobj._processes
+        with patch.object(processes, 'shutdown') as shutdown_mock:
+            testobj.close(wait=False)
+        shutdown_mock.assert_called_once_with(wait=False, cancel_futures=True)
+        self.assertIsNone(testobj._processes)
+        processes.shutdown()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch
-from deadseeker.common import UrlFetchResponse, UrlTarget
+from deadseeker.checkpoint import RestoredError
+from deadseeker.common import SeekResults, UrlFetchResponse, UrlTarget
 from deadseeker.loggingresponsehandler import LoggingUrlFetchResponseHandler
 from aiohttp import ClientError
 import logging
@@ -33,6 +34,15 @@ class TestLoggingResponseHandler(unittest.TestCase):
             info_mock.assert_called_with(expected)
             error_mock.assert_not_called()
 
+    def test_info_logs_when_cached(self):
+        self.resp.status = 200
+        self.resp.cached = 'within ttl'
+        with patch.object(self.logger, 'info') as info_mock:
+            self.testobj.handle_response(self.resp)
+            expected = '200 - http://testing.test.com/ - 1234.12 ms' +\
+                ' (cached, within ttl)'
+            info_mock.assert_called_with(expected)
+
     def test_error_logs_when_responseerror(self):
         self.resp.status = 400
         self.resp.error = ClientError()
@@ -48,6 +58,15 @@ class TestLoggingResponseHandler(unittest.TestCase):
                                           exc_info=self.resp.error)
             info_mock.assert_not_called()
 
+    def test_error_logs_name_of_restored_error(self):
+        self.resp.status = 404
+        self.resp.error = RestoredError('ClientResponseError', '404')
+        with patch.object(self.logger, 'error') as error_mock:
+            self.testobj.handle_response(self.resp)
+            error_mock.assert_called_with(
+                '::error ::ClientResponseError: 404'
+                ' - http://testing.test.com/')
+
     def test_error_logs_when_responseerror_including_navigationpath(self):
         self.subpage_response.status = 400
         self.subpage_response.error = ClientError()
@@ -79,6 +98,29 @@ class TestLoggingResponseHandler(unittest.TestCase):
                                           exc_info=self.resp.error)
             info_mock.assert_not_called()
 
+    def test_warning_logs_all_referrers_of_failure(self):
+        self.subpage_response.error = ClientError()
+        self.subpage_response.referrers = ['http://a.com/', 'http://b.com/']
+        self.subpage_response.referrer_count = 5
+        results = SeekResults()
+        results.failures.append(self.subpage_response)
+        with patch.object(self.logger, 'warning') as warning_mock:
+            self.testobj.handle_results(results)
+            warning_mock.assert_called_once_with(
+                '::warn ::http://subpage.testing.test.com/page1' +
+                ' is linked from 5 pages: http://a.com/, http://b.com/' +
+                ' and 3 more')
+
+    def test_no_warning_for_single_referrer(self):
+        self.subpage_response.error = ClientError()
+        self.subpage_response.referrers = ['http://a.com/']
+        self.subpage_response.referrer_count = 1
+        results = SeekResults()
+        results.failures.append(self.subpage_response)
+        with patch.object(self.logger, 'warning') as warning_mock:
+            self.testobj.handle_results(results)
+            warning_mock.assert_not_called()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from deadseeker.referrers import ReferrerIndex
+
+TEST_URL = 'http://test.com/broken.html'
+
+
+class TestReferrerIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.testobj = ReferrerIndex(3)
+
+    def test_page_ids_are_interned(self):
+        first = self.testobj.page_id('http://test.com/')
+        second = self.testobj.page_id('http://test.com/page1.html')
+        self.assertNotEqual(first, second)
+        self.assertEqual(first, self.testobj.page_id('http://test.com/'))
+
+    def test_unknown_url_has_no_referrers(self):
+        self.assertEqual(([], 0), self.testobj.get(TEST_URL))
+
+    def test_single_referrer(self):
+        page = self.testobj.page_id('http://test.com/')
+        self.testobj.add(TEST_URL, page)
+        self.testobj.add(TEST_URL, page)
+        self.assertEqual(
+            (['http://test.com/'], 1), self.testobj.get(TEST_URL))
+
+    def test_referrers_are_kept_in_order_without_duplicates(self):
+        for i in [0, 1, 0, 2, 1]:
+            self.testobj.add(
+                TEST_URL, self.testobj.page_id(f'http://test.com/p{i}'))
+        self.assertEqual(
+            (['http://test.com/p0', 'http://test.com/p1',
+              'http://test.com/p2'], 3),
+            self.testobj.get(TEST_URL))
+
+    def test_referrers_beyond_limit_are_counted(self):
+        for i in range(5):
+            self.testobj.add(
+                TEST_URL, self.testobj.page_id(f'http://test.com/p{i}'))
+        referrers, count = self.testobj.get(TEST_URL)
+        self.assertEqual(3, len(referrers))
+        self.assertEqual(5, count)
+
+    def test_limit_is_at_least_one(self):
+        self.assertEqual(1, ReferrerIndex(0).max_referrers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+from deadseeker.canonicalizer import DefaultUrlCanonicalizer
+from deadseeker.common import SeekerConfig, UrlFetchResponse, UrlTarget
+from deadseeker.responsecache import (
+    CACHE_FILE_NAME,
+    DefaultResponseCacheFactory,
+    NoResponseCache,
+    SqliteResponseCache,
+    links_fingerprint
+)
+
+TEST_URL = 'http://test.com/page1.html'
+
+
+class TestDefaultResponseCacheFactory(unittest.TestCase):
+
+    def setUp(self):
+        self.testobj = DefaultResponseCacheFactory()
+        self.config = SeekerConfig()
+        self.canonicalizer = DefaultUrlCanonicalizer()
+
+    def test_no_cache_is_default(self):
+        result = self.testobj.get_response_cache(
+            self.config, self.canonicalizer)
+        self.assertTrue(isinstance(result, NoResponseCache))
+
+    def test_sqlite_cache_with_cache_dir(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.config.cache_dir = directory
+            result = self.testobj.get_response_cache(
+                self.config, self.canonicalizer)
+            self.assertTrue(isinstance(result, SqliteResponseCache))
+            self.assertIs(self.canonicalizer, result.canonicalizer)
+            self.assertEqual(
+                os.path.join(directory, CACHE_FILE_NAME), result.path)
+            result.close()
+
+    def test_fingerprint_follows_filters(self):
+        fingerprint = links_fingerprint(self.config)
+        self.config.excludesuffix = ['.png']
+        self.assertNotEqual(fingerprint, links_fingerprint(self.config))
+
+    def test_fingerprint_follows_patterns(self):
+        fingerprint = links_fingerprint(self.config)
+        self.config.excludeglob = ['*.pdf']
+        self.assertNotEqual(fingerprint, links_fingerprint(self.config))
+
+
+class TestNoResponseCache(unittest.TestCase):
+
+    def test_nothing_is_cached(self):
+        testobj = NoResponseCache()
+        self.assertIsNone(testobj.get(TEST_URL))
+        self.assertEqual(set(), testobj.get_hosts_without_head())
+        testobj.add_host_without_head('test.com')
+        testobj.put(Mock(spec=UrlFetchResponse))
+
+
+class TestSqliteResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.canonicalizer = DefaultUrlCanonicalizer()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _open(self, fingerprint: str = 'settings') -> SqliteResponseCache:
+        return SqliteResponseCache(
+            self.directory.name, self.canonicalizer, fingerprint)
+
+    def _response(self, cache: SqliteResponseCache, url: str = TEST_URL):
+        resp = UrlFetchResponse(UrlTarget(url, url, -1))
+        resp.cache_entry = cache.get(url)
+        resp.cache_entry.status = 200
+        resp.cache_entry.content_type = 'text/html'
+        resp.cache_entry.etag = '"v1"'
+        resp.cache_entry.links = ['/page2.html']
+        resp.cache_entry.checked = 1234.5
+        return resp
+
+    def test_unknown_url_gets_empty_entry(self):
+        cache = self._open()
+        entry = cache.get(TEST_URL)
+        self.assertEqual(TEST_URL, entry.url)
+        self.assertEqual(0, entry.status)
+        self.assertIsNone(entry.links)
+        cache.close()
+
+    def test_entry_is_kept_between_runs(self):
+        cache = self._open()
+        resp = self._response(cache)
+        cache.put(resp)
+        self.assertIsNone(resp.cache_entry)
+        cache.close()
+        cache = self._open()
+        entry = cache.get(TEST_URL + '#top')
+        self.assertEqual(TEST_URL + '#top', entry.url)
+        self.assertEqual(200, entry.status)
+        self.assertEqual('text/html', entry.content_type)
+        self.assertEqual('"v1"', entry.etag)
+        self.assertIsNone(entry.last_modified)
+        self.assertEqual(['/page2.html'], entry.links)
+        self.assertEqual(1234.5, entry.checked)
+        cache.close()
+
+    def test_failure_is_not_cached(self):
+        cache = self._open()
+        resp = self._response(cache)
+        resp.error = Exception()
+        cache.put(resp)
+        self.assertEqual(0, cache.get(TEST_URL).status)
+        cache.close()
+
+    def test_hosts_without_head_are_kept_between_runs(self):
+        cache = self._open()
+        self.assertEqual(set(), cache.get_hosts_without_head())
+        cache.add_host_without_head('test.com')
+        cache.add_host_without_head('test.com')
+        cache.close()
+        cache = self._open()
+        self.assertEqual(set(['test.com']), cache.get_hosts_without_head())
+        cache.close()
+
+    def test_links_are_dropped_when_settings_change(self):
+        cache = self._open()
+        cache.put(self._response(cache))
+        cache.close()
+        cache = self._open('other settings')
+        entry = cache.get(TEST_URL)
+        self.assertEqual('"v1"', entry.etag)
+        self.assertIsNone(entry.links)
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
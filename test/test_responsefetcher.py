@@ -1,17 +1,39 @@
+import asyncio
 from functools import partial
+import time
 from typing import Any, Callable, Dict, List
 import unittest
 from aiounittest import AsyncTestCase
 from asyncio import TimeoutError
 from aiohttp import (
+    ClientConnectionError,
     ClientResponseError,
     ClientError
 )
 from aiohttp_retry import RetryClient
 from unittest.mock import Mock, patch
 from aioresponses import aioresponses, CallbackResult
-from deadseeker.common import SeekerConfig
+from deadseeker.common import (
+    CachedResponse,
+    SeekerConfig,
+    SeekResults,
+    UrlFetchResponse,
+    UrlTarget,
+    CACHED_NOT_MODIFIED,
+    CACHED_WITHIN_TTL
+)
 from deadseeker.timer import Timer
+from deadseeker.clientsession import DefaultClientSessionFactory
+from deadseeker.responsecache import NoResponseCache, ResponseCache
+from deadseeker.retrybudget import RetryBudget
+from deadseeker.linkparser import DefaultLinkParser, LinkParser
+from deadseeker.linkacceptor import LinkAcceptor
+from deadseeker.hostlimiter import (
+    AdaptiveHostLimiter,
+    HostLimiter,
+    HostUnavailableError,
+    PacedHostLimiter
+)
 from deadseeker.responsefetcher import (
     DefaultResponseFetcherFactory,
     HeadThenGetIfHtmlResponseFetcher,
@@ -24,15 +46,45 @@ class TestDefaultResponseFetcherFactory(unittest.TestCase):
     def setUp(self):
         self.testobj = DefaultResponseFetcherFactory()
         self.config = SeekerConfig()
+        self.cache = NoResponseCache()
+        self.linkparser = Mock(spec=LinkParser)
+        self.retrybudget = RetryBudget()
 
     def test_head_first_is_default(self):
-        result = self.testobj.get_response_fetcher(self.config)
+        result = self.testobj.get_response_fetcher(
+            self.config, self.cache, self.linkparser, self.retrybudget)
         self.assertTrue(isinstance(result, HeadThenGetIfHtmlResponseFetcher))
+        self.assertIs(self.cache, result.cache)
+        self.assertEqual(0, result.offsite_ttl)
+        self.assertIsNone(result.streamparser)
+
+    def test_stream_parser_is_passed(self):
+        self.config.stream_html = True
+        result = self.testobj.get_response_fetcher(
+            self.config, self.cache, self.linkparser, self.retrybudget)
+        self.assertIs(self.linkparser, result.streamparser)
+
+    def test_offsite_ttl_is_passed(self):
+        self.config.offsite_cache_ttl = 3600
+        result = self.testobj.get_response_fetcher(
+            self.config, self.cache, self.linkparser, self.retrybudget)
+        self.assertEqual(3600, result.offsite_ttl)
 
     def test_always_get_is_returned_when_enabled(self):
         self.config.alwaysgetonsite = True
-        result = self.testobj.get_response_fetcher(self.config)
+        result = self.testobj.get_response_fetcher(
+            self.config, self.cache, self.linkparser, self.retrybudget)
         self.assertTrue(isinstance(result, AlwaysGetIfOnSiteResponseFetcher))
+        self.assertIs(self.cache, result.cache)
+
+    def test_adaptive_host_limiter_is_passed_when_enabled(self):
+        self.config.adaptive_connect_limit = True
+        for alwaysgetonsite in [False, True]:
+            self.config.alwaysgetonsite = alwaysgetonsite
+            result = self.testobj.get_response_fetcher(
+                self.config, self.cache, self.linkparser, self.retrybudget)
+            self.assertTrue(
+                isinstance(result.hostlimiter, AdaptiveHostLimiter))
 
 
 TEST_HOME_URL = 'http://testing.test.com/'
@@ -103,6 +155,64 @@ class TestHeadThenGetIfHtmlResponseFetcher(AsyncTestCase):
             self.assertEqual(1, len(get_calls))
             self.assertEqual(TEST_BODY, response.html)
 
+    @aioresponses()
+    async def test_if_same_site_and_html_streamed(self,  m):
+        config = SeekerConfig()
+        linkacceptor = Mock(spec=LinkAcceptor)
+        linkacceptor.accepts.return_value = True
+        self.testobj.streamparser = DefaultLinkParser(config, linkacceptor)
+        body = '<html>' + '<p>filler</p>' * 10000 + \
+            '<a href="/caf\u00e9.html">caf\u00e9</a><img src="/i.png"></html>'
+        self.urltarget.url = TEST_HOME_URL
+        m.head(TEST_HOME_URL, content_type=TYPE_HTML)
+        m.get(
+            TEST_HOME_URL,
+            body=body.encode('utf-8'),
+            content_type=TYPE_HTML)
+        with patch('deadseeker.responsefetcher.STREAM_CHUNK_SIZE', 1000):
+            async with RetryClient() as session:
+                response = await self.testobj.fetch_response(
+                        session, self.urltarget)
+        self.assertIsNone(response.error)
+        self.assertEqual(200, response.status)
+        self.assertIsNone(response.html)
+        self.assertEqual(['/caf\u00e9.html', '/i.png'], response.links)
+
+    @aioresponses()
+    async def test_host_without_head_support_gets_get_only(self,  m):
+        exception = ClientResponseError(None, None, status=405)
+        for page in ['page1', 'page2']:
+            self._prep_request(
+                m, TEST_OTHER_URL + page,
+                headexception=exception, content_type=TYPE_HTML)
+        get_calls: List[Dict[str, Any]] = []
+        m.get(
+            TEST_OTHER_URL + 'page3',
+            callback=partial(_get_callback, get_calls, TEST_BODY, TYPE_JSON))
+        async with RetryClient() as session:
+            for page in ['page1', 'page2', 'page3']:
+                self.urltarget.url = TEST_OTHER_URL + page
+                response = await self.testobj.fetch_response(
+                        session, self.urltarget)
+                self.assertIsNone(response.error)
+                self.assertEqual(200, response.status)
+        self.assertEqual(1, len(get_calls))
+        results = SeekResults()
+        self.testobj.add_statistics(results)
+        self.assertEqual(1, results.head_requests_skipped)
+
+    @aioresponses()
+    async def test_not_implemented_head_falls_back_to_get(self,  m):
+        exception = ClientResponseError(None, None, status=501)
+        self._prep_request(
+            m, TEST_OTHER_URL, headexception=exception,
+            content_type=TYPE_JSON)
+        async with RetryClient() as session:
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+            self.assertIsNone(response.error)
+            self.assertEqual(200, response.status)
+
     # Test for ScholliYT/Broken-Links-Crawler-Action#8
     @aioresponses()
     async def test_if_same_site_and_not_html_head_not_supported(self,  m):
@@ -246,6 +356,26 @@ class TestHeadThenGetIfHtmlResponseFetcher(AsyncTestCase):
             self.assertIs(exception, response.error)
             self.assertEqual(TEST_EXPECTED_ELAPSED, response.elapsed)
 
+    @aioresponses()
+    async def test_host_limiter_learns_from_the_response(self, m):
+        hostlimiter = Mock(spec=HostLimiter)
+        hostlimiter.delay.return_value = 0.0
+        hostlimiter.acquire.return_value = 12.5
+        hostlimiter.should_retry.return_value = False
+        hostlimiter.get_stats.return_value = ['stats']
+        self.testobj = HeadThenGetIfHtmlResponseFetcher(
+            hostlimiter=hostlimiter)
+        self._prep_request(m, TEST_HOME_URL, content_type=TYPE_HTML)
+        async with RetryClient() as session:
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+        hostlimiter.acquire.assert_called_once_with(TEST_HOME_URL)
+        hostlimiter.release.assert_called_once_with(
+            TEST_HOME_URL, response, 12.5)
+        results = SeekResults()
+        self.testobj.add_statistics(results)
+        self.assertEqual(['stats'], results.hosts)
+
     def _prep_request(
             self,
             mockresponses,
@@ -391,5 +521,307 @@ class TestAlwaysGetIfOnSiteResponseFetcher(AsyncTestCase):
         )
 
 
+class TestThrottledResponseFetcher(AsyncTestCase):
+
+    def setUp(self):
+        self.hostlimiter = PacedHostLimiter(0, 3, 0.1)
+        self.testobj = HeadThenGetIfHtmlResponseFetcher(
+            hostlimiter=self.hostlimiter)
+        self.urltarget = UrlTarget(TEST_HOME_URL, TEST_HOME_URL, 1)
+        # retries the other errors, not the throttled ones
+        self.sessionfactory = DefaultClientSessionFactory()
+
+    async def _fetch_until_done(self, session) -> List[UrlFetchResponse]:
+        responses = [
+            await self.testobj.fetch_response(session, self.urltarget)]
+        while responses[-1].retry_in is not None:
+            await asyncio.sleep(responses[-1].retry_in)
+            responses.append(
+                await self.testobj.fetch_response(session, self.urltarget))
+        return responses
+
+    @aioresponses()
+    async def test_throttled_url_is_to_be_fetched_again(self, m):
+        m.head(TEST_HOME_URL, status=429, headers={'Retry-After': '0'})
+        m.head(TEST_HOME_URL, status=503)
+        m.head(TEST_HOME_URL, content_type=TYPE_JSON)
+        async with self.sessionfactory.get_client_session(
+                SeekerConfig(), RetryBudget()) as session:
+            responses = await self._fetch_until_done(session)
+        self.assertEqual([429, 503, 200], [r.status for r in responses])
+        self.assertEqual(0.0, responses[0].retry_in)
+        self.assertAlmostEqual(0.1, responses[1].retry_in, delta=0.01)
+        self.assertIsNone(responses[-1].error)
+        self.assertEqual(3, self.urltarget.attempt)
+        stats = self.hostlimiter.get_stats()[0]
+        self.assertEqual(3, stats.requests)
+        self.assertEqual(2, stats.retries)
+
+    @aioresponses()
+    async def test_throttled_url_fails_after_max_tries(self, m):
+        m.head(
+            TEST_HOME_URL, status=429, headers={'Retry-After': '0'},
+            repeat=True)
+        async with self.sessionfactory.get_client_session(
+                SeekerConfig(), RetryBudget()) as session:
+            responses = await self._fetch_until_done(session)
+        self.assertEqual(3, len(responses))
+        self.assertEqual(429, responses[-1].status)
+        self.assertIsInstance(responses[-1].error, ClientResponseError)
+        self.assertEqual(3, self.hostlimiter.get_stats()[0].requests)
+
+    @aioresponses()
+    async def test_url_is_not_requested_before_its_turn(self, m):
+        throttled = UrlFetchResponse(self.urltarget)
+        throttled.status = 429
+        self.hostlimiter.release(TEST_HOME_URL, throttled, 0.0)
+        async with RetryClient() as session:
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+        self.assertAlmostEqual(0.1, response.retry_in, delta=0.01)
+        self.assertEqual(0, response.status)
+        self.assertEqual(1, self.urltarget.attempt)
+        self.assertEqual(1, self.hostlimiter.get_stats()[0].requests)
+
+    @aioresponses()
+    async def test_url_of_a_host_that_is_down_fails_fast(self, m):
+        self.testobj = HeadThenGetIfHtmlResponseFetcher(
+            hostlimiter=PacedHostLimiter(failure_threshold=1))
+        m.head(TEST_HOME_URL, exception=ClientConnectionError())
+        config = SeekerConfig()
+        config.max_tries = 1
+        async with self.sessionfactory.get_client_session(
+                config, RetryBudget()) as session:
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+            self.assertIsInstance(response.error, ClientConnectionError)
+            response = await self.testobj.fetch_response(
+                    session, UrlTarget(TEST_HOME_URL, TEST_OTHER_URL, 1))
+            self.assertIsInstance(response.error, ClientConnectionError)
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+        self.assertIsInstance(response.error, HostUnavailableError)
+        self.assertEqual(0, response.status)
+        self.assertEqual(0.0, response.elapsed)
+
+    @aioresponses()
+    async def test_get_after_head_takes_a_turn(self, m):
+        hostlimiter = Mock(spec=HostLimiter)
+        hostlimiter.delay.return_value = 0.0
+        hostlimiter.turn_delay.return_value = 0.0
+        hostlimiter.should_retry.return_value = False
+        self.testobj = HeadThenGetIfHtmlResponseFetcher(
+            hostlimiter=hostlimiter)
+        m.head(TEST_HOME_URL, content_type=TYPE_HTML)
+        m.get(TEST_HOME_URL, content_type=TYPE_HTML, body=TEST_BODY)
+        async with RetryClient() as session:
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+        self.assertEqual(TEST_BODY, response.html)
+        hostlimiter.acquire.assert_called_once_with(TEST_HOME_URL)
+        hostlimiter.turn.assert_called_once_with(TEST_HOME_URL)
+
+    @aioresponses()
+    async def test_get_after_head_is_sent_on_its_turn(self, m):
+        hostlimiter = Mock(spec=HostLimiter)
+        hostlimiter.delay.return_value = 0.0
+        hostlimiter.turn_delay.return_value = 0.5
+        hostlimiter.should_retry.return_value = False
+        self.testobj = HeadThenGetIfHtmlResponseFetcher(
+            hostlimiter=hostlimiter)
+        m.head(TEST_HOME_URL, content_type=TYPE_HTML)
+        m.get(TEST_HOME_URL, content_type=TYPE_HTML, body=TEST_BODY)
+        async with RetryClient() as session:
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+            self.assertEqual(0.5, response.retry_in)
+            self.assertIsNone(response.html)
+            # only the GET request is left
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+        self.assertIsNone(response.retry_in)
+        self.assertEqual(TEST_BODY, response.html)
+        self.assertEqual(2, hostlimiter.acquire.call_count)
+        hostlimiter.turn.assert_not_called()
+
+    @aioresponses()
+    async def test_get_after_unsupported_head_takes_a_turn(self, m):
+        hostlimiter = Mock(spec=HostLimiter)
+        hostlimiter.delay.return_value = 0.0
+        hostlimiter.turn_delay.return_value = 0.0
+        hostlimiter.should_retry.return_value = False
+        self.testobj = HeadThenGetIfHtmlResponseFetcher(
+            hostlimiter=hostlimiter)
+        exception = ClientResponseError(None, None, status=405)
+        m.head(TEST_HOME_URL, exception=exception)
+        m.get(TEST_HOME_URL, content_type=TYPE_HTML, body=TEST_BODY)
+        async with RetryClient() as session:
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+        self.assertEqual(TEST_BODY, response.html)
+        hostlimiter.turn.assert_called_once_with(TEST_HOME_URL)
+
+    @aioresponses()
+    async def test_get_only_does_not_take_another_turn(self, m):
+        hostlimiter = Mock(spec=HostLimiter)
+        hostlimiter.delay.return_value = 0.0
+        hostlimiter.should_retry.return_value = False
+        self.testobj = AlwaysGetIfOnSiteResponseFetcher(
+            hostlimiter=hostlimiter)
+        m.get(TEST_HOME_URL, content_type=TYPE_HTML, body=TEST_BODY)
+        async with RetryClient() as session:
+            await self.testobj.fetch_response(session, self.urltarget)
+        hostlimiter.acquire.assert_called_once_with(TEST_HOME_URL)
+        hostlimiter.turn.assert_not_called()
+
+
+class TestCachedResponseFetcher(AsyncTestCase):
+
+    def setUp(self):
+        self.cache = Mock(spec=ResponseCache)
+        self.entry = CachedResponse(TEST_HOME_URL)
+        self.entry.status = 200
+        self.entry.content_type = TYPE_HTML
+        self.entry.etag = '"v1"'
+        self.entry.last_modified = 'Sat, 01 Jan 2022 00:00:00 GMT'
+        self.entry.links = ['/page1.html']
+        self.cache.get.return_value = self.entry
+        self.cache.get_hosts_without_head.return_value = set()
+        self.testobj = HeadThenGetIfHtmlResponseFetcher(self.cache)
+        self.urltarget = Mock()
+        self.urltarget.home = TEST_HOME_URL
+        self.urltarget.url = TEST_HOME_URL
+        self.get_calls: List[Dict[str, Any]] = []
+
+    @aioresponses()
+    async def test_not_modified_page_uses_cached_links(self, m):
+        def not_modified_callback(url, **kwargs):
+            self.get_calls.append(kwargs)
+            return CallbackResult(status=304, headers={'ETag': '"v2"'})
+
+        m.get(TEST_HOME_URL, callback=not_modified_callback)
+        async with RetryClient() as session:
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+        self.cache.get.assert_called_with(TEST_HOME_URL)
+        self.assertEqual(1, len(self.get_calls))
+        self.assertEqual({
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Sat, 01 Jan 2022 00:00:00 GMT'
+        }, self.get_calls[0]['headers'])
+        self.assertIsNone(response.error)
+        self.assertEqual(200, response.status)
+        self.assertEqual(CACHED_NOT_MODIFIED, response.cached)
+        self.assertIsNone(response.html)
+        self.assertEqual(['/page1.html'], response.links)
+        self.assertIs(self.entry, response.cache_entry)
+        self.assertEqual('"v2"', self.entry.etag)
+        self.assertGreater(self.entry.checked, 0)
+
+    @aioresponses()
+    async def test_modified_page_is_fetched_again(self, m):
+        m.get(
+            TEST_HOME_URL,
+            body=TEST_BODY,
+            content_type=TYPE_HTML,
+            headers={'ETag': '"v2"'})
+        async with RetryClient() as session:
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+        self.assertEqual(200, response.status)
+        self.assertIsNone(response.cached)
+        self.assertEqual(TEST_BODY, response.html)
+        self.assertIsNone(response.links)
+        self.assertEqual('"v2"', self.entry.etag)
+        self.assertIsNone(self.entry.last_modified)
+        self.assertIsNone(self.entry.links)
+
+    @aioresponses()
+    async def test_page_without_cached_links_is_not_revalidated(self, m):
+        self.entry.links = None
+        m.head(TEST_HOME_URL, content_type=TYPE_HTML)
+        m.get(
+            TEST_HOME_URL,
+            callback=partial(
+                _get_callback, self.get_calls, TEST_BODY, TYPE_HTML))
+        async with RetryClient() as session:
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+        self.assertEqual({}, self.get_calls[0]['headers'])
+        self.assertEqual(TEST_BODY, response.html)
+        self.assertIsNone(response.cached)
+
+    @aioresponses()
+    async def test_head_response_is_remembered(self, m):
+        self.urltarget.url = TEST_OTHER_URL
+        self.entry = CachedResponse(TEST_OTHER_URL)
+        self.cache.get.return_value = self.entry
+        m.head(
+            TEST_OTHER_URL,
+            content_type=TYPE_JSON,
+            headers={'Last-Modified': 'Sat, 01 Jan 2022 00:00:00 GMT'})
+        async with RetryClient() as session:
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+        self.assertEqual(200, response.status)
+        self.assertEqual(200, self.entry.status)
+        self.assertEqual(TYPE_JSON, self.entry.content_type)
+        self.assertEqual(
+            'Sat, 01 Jan 2022 00:00:00 GMT', self.entry.last_modified)
+
+    def _offsite_entry(self, age: float) -> None:
+        self.testobj.offsite_ttl = 3600
+        self.urltarget.url = TEST_OTHER_URL
+        self.entry = CachedResponse(TEST_OTHER_URL)
+        self.entry.status = 200
+        self.entry.checked = time.time() - age
+        self.cache.get.return_value = self.entry
+
+    @aioresponses()
+    async def test_fresh_offsite_verdict_is_reused(self, m):
+        self._offsite_entry(60)
+        async with RetryClient() as session:
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+        self.assertEqual(200, response.status)
+        self.assertEqual(CACHED_WITHIN_TTL, response.cached)
+        self.assertEqual(0.0, response.elapsed)
+        self.assertIsNone(response.error)
+        self.assertIsNone(response.cache_entry)
+
+    @aioresponses()
+    async def test_expired_offsite_verdict_is_checked(self, m):
+        self._offsite_entry(7200)
+        m.head(TEST_OTHER_URL, status=204)
+        async with RetryClient() as session:
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+        self.assertEqual(204, response.status)
+        self.assertIsNone(response.cached)
+        self.assertGreater(self.entry.checked, time.time() - 60)
+
+    @aioresponses()
+    async def test_onsite_verdict_is_not_reused(self, m):
+        self._offsite_entry(60)
+        self.urltarget.home = TEST_OTHER_URL
+        m.head(TEST_OTHER_URL, status=204)
+        async with RetryClient() as session:
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+        self.assertEqual(204, response.status)
+        self.assertIsNone(response.cached)
+
+    @aioresponses()
+    async def test_offsite_verdict_is_not_reused_without_ttl(self, m):
+        self._offsite_entry(60)
+        self.testobj.offsite_ttl = 0
+        m.head(TEST_OTHER_URL, status=204)
+        async with RetryClient() as session:
+            response = await self.testobj.fetch_response(
+                    session, self.urltarget)
+        self.assertEqual(204, response.status)
+        self.assertIsNone(response.cached)
+
+
 if __name__ == '__main__':
     unittest.main()
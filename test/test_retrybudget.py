@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import patch
+from deadseeker.retrybudget import RetryBudget
+import logging
+
+
+class TestRetryBudget(unittest.TestCase):
+
+    def _spend(self, budget: RetryBudget) -> int:
+        spent = 0
+        while budget.available() and spent < 1000:
+            budget.retry()
+            spent += 1
+        return spent
+
+    def test_unlimited_by_default(self):
+        self.assertEqual(1000, self._spend(RetryBudget()))
+
+    def test_tokens(self):
+        self.assertEqual(5, self._spend(RetryBudget(5)))
+        self.assertEqual(0, self._spend(RetryBudget(0, 0)))
+
+    def test_percent_of_the_requests(self):
+        budget = RetryBudget(-1, 10)
+        for _ in range(50):
+            budget.request()
+        self.assertEqual(5, self._spend(budget))
+        for _ in range(10):
+            budget.request()
+        self.assertEqual(1, self._spend(budget))
+
+    def test_tokens_and_percent_add_up(self):
+        budget = RetryBudget(2, 10)
+        for _ in range(30):
+            budget.request()
+        self.assertEqual(5, self._spend(budget))
+
+    def test_spent_budget_is_logged_once(self):
+        budget = RetryBudget(0)
+        budget.request()
+        logger = logging.getLogger('deadseeker.retrybudget')
+        with patch.object(logger, 'warning') as warning_mock:
+            budget.available()
+            budget.available()
+            warning_mock.assert_called_once_with(
+                '::warn ::Retry budget spent after 0 retries of 1 requests,'
+                ' failed requests are reported without retrying them')
+
+
+if __name__ == '__main__':
+    unittest.main()
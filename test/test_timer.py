@@ -1,6 +1,6 @@
 import unittest
 from unittest.mock import patch
-from deadseeker.timer import Timer
+from deadseeker.timer import Deadline, Timer
 
 
 class TestTimer(unittest.TestCase):
@@ -24,5 +24,40 @@ class TestTimer(unittest.TestCase):
         self.assertEqual(200.0, self.testobj.stop())
 
 
+class TestDeadline(unittest.TestCase):
+
+    def setUp(self):
+        self.monotonic_patch = patch('time.monotonic')
+        self.monotonic = self.monotonic_patch.start()
+        self.monotonic.return_value = 100.0
+
+    def tearDown(self):
+        self.monotonic_patch.stop()
+
+    def test_no_deadline(self):
+        testobj = Deadline(0, 10)
+        self.monotonic.return_value = 1e9
+        self.assertFalse(testobj.closing())
+        self.assertIsNone(testobj.remaining())
+
+    def test_remaining(self):
+        testobj = Deadline(60, 10)
+        self.monotonic.return_value = 130.0
+        self.assertEqual(30.0, testobj.remaining())
+        self.monotonic.return_value = 170.0
+        self.assertEqual(0.0, testobj.remaining())
+
+    def test_closing_for_the_grace(self):
+        testobj = Deadline(60, 10)
+        self.monotonic.return_value = 149.0
+        self.assertFalse(testobj.closing())
+        self.monotonic.return_value = 150.0
+        self.assertTrue(testobj.closing())
+
+    def test_grace_is_at_most_the_deadline(self):
+        testobj = Deadline(60, 100)
+        self.assertTrue(testobj.closing())
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,69 @@
+import random
+import unittest
+from urllib.parse import urljoin
+from deadseeker.urlresolver import UrlResolver
+
+BASE_URL = 'https://www.mysite.com/docs/guide/index.html?lang=en'
+
+
+class TestUrlResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.testobj = UrlResolver(BASE_URL)
+
+    def test_relative_links(self):
+        self.assertEqual(
+            'https://www.mysite.com/docs/guide/page.html',
+            self.testobj.resolve('page.html'))
+        self.assertEqual(
+            'https://www.mysite.com/docs/api/',
+            self.testobj.resolve('../api/'))
+        self.assertEqual(
+            'https://www.mysite.com/docs/',
+            self.testobj.resolve('..'))
+        self.assertEqual(
+            'https://www.mysite.com/about.html',
+            self.testobj.resolve('/docs/../about.html'))
+
+    def test_query_and_fragment_only(self):
+        self.assertEqual(
+            BASE_URL + '#top', self.testobj.resolve('#top'))
+        self.assertEqual(
+            'https://www.mysite.com/docs/guide/index.html?lang=de',
+            self.testobj.resolve('?lang=de'))
+
+    def test_absolute_links(self):
+        self.assertEqual(
+            'https://othersite.com/a', self.testobj.resolve('//othersite.com/a'))
+        self.assertEqual(
+            'http://othersite.com/a', self.testobj.resolve('http://othersite.com/a'))
+        self.assertEqual(
+            'mailto:someone@mysite.com',
+            self.testobj.resolve('mailto:someone@mysite.com'))
+
+    def test_empty(self):
+        self.assertEqual(BASE_URL, self.testobj.resolve(''))
+        self.assertEqual('/a', UrlResolver('').resolve('/a'))
+
+    def test_same_as_urljoin(self):
+        rng = random.Random(1)
+        parts = [
+            'http:', 'https:', 'mailto:', '//', '/', '..', '.', 'a', '?q',
+            '#f', ';p', 'x:y', '', ' ', '\t', '//h', '@', ':80', '\n']
+
+        def value():
+            return ''.join(
+                rng.choice(parts) for _ in range(rng.randint(0, 6)))
+
+        for _ in range(2000):
+            base = 'https://h.com/' + value() if rng.random() < .5 else value()
+            testobj = UrlResolver(base)
+            for _ in range(5):
+                link = value()
+                self.assertEqual(
+                    urljoin(base, link), testobj.resolve(link),
+                    f'{link!r} on {base!r}')
+
+
+if __name__ == '__main__':
+    unittest.main()
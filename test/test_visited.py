@@ -0,0 +1,124 @@
+import os
+import unittest
+from unittest.mock import Mock
+from deadseeker.common import SeekerConfig
+from deadseeker.visited import (
+    BloomVisitedSet,
+    DefaultVisitedSetFactory,
+    ExactVisitedSet,
+    HashedVisitedSet,
+    url_hash
+)
+
+TEST_URLS = [f'http://test.com/page{i}.html?utm_source={i}' for i in range(500)]
+
+
+class TestUrlHash(unittest.TestCase):
+
+    def test_hash_is_stable(self):
+        self.assertEqual(
+            url_hash('http://test.com/'), url_hash('http://test.com/'))
+        self.assertNotEqual(
+            url_hash('http://test.com/'), url_hash('http://test.com/a'))
+
+    def test_hash_has_requested_size(self):
+        self.assertLess(url_hash('http://test.com/', 64), 1 << 64)
+        self.assertGreaterEqual(url_hash('http://test.com/', 128), 1 << 64)
+
+
+class TestDefaultVisitedSetFactory(unittest.TestCase):
+
+    def setUp(self):
+        self.testobj = DefaultVisitedSetFactory()
+        self.config = Mock(spec=SeekerConfig)
+        self.config.visited_index = 'hashed'
+        self.config.visited_hash_bits = 128
+        self.config.visited_bloom_capacity = 10
+        self.config.frontier_spill_dir = None
+
+    def test_hashed_is_default(self):
+        result = self.testobj.get_visited_set(self.config)
+        self.assertTrue(isinstance(result, HashedVisitedSet))
+        self.assertEqual(128, result.bits)
+
+    def test_exact(self):
+        self.config.visited_index = 'exact'
+        result = self.testobj.get_visited_set(self.config)
+        self.assertTrue(isinstance(result, ExactVisitedSet))
+
+    def test_bloom(self):
+        self.config.visited_index = 'bloom'
+        result = self.testobj.get_visited_set(self.config)
+        try:
+            self.assertTrue(isinstance(result, BloomVisitedSet))
+        finally:
+            result.close()
+
+
+class VisitedSetTests:
+
+    def test_add_reports_new_urls_only(self):
+        for url in TEST_URLS:
+            self.assertTrue(self.testobj.add(url), url)
+        for url in TEST_URLS:
+            self.assertFalse(self.testobj.add(url), url)
+
+
+class TestExactVisitedSet(VisitedSetTests, unittest.TestCase):
+
+    def setUp(self):
+        self.testobj = ExactVisitedSet()
+
+    def test_key_is_the_url(self):
+        self.assertEqual(TEST_URLS[0], self.testobj.key(TEST_URLS[0]))
+
+
+class TestHashedVisitedSet(VisitedSetTests, unittest.TestCase):
+
+    def setUp(self):
+        self.testobj = HashedVisitedSet()
+
+    def test_keeps_hashes_only(self):
+        self.testobj.add(TEST_URLS[0])
+        self.assertEqual({url_hash(TEST_URLS[0])}, self.testobj.keys)
+
+    def test_key_is_the_hash_of_the_url(self):
+        testobj = HashedVisitedSet(32)
+        self.assertEqual(
+            url_hash(TEST_URLS[0], 32), testobj.key(TEST_URLS[0]))
+
+
+class TestBloomVisitedSet(VisitedSetTests, unittest.TestCase):
+
+    def setUp(self):
+        # undersized on purpose to get plenty of false positives
+        self.testobj = BloomVisitedSet(50)
+
+    def tearDown(self):
+        self.testobj.close()
+
+    def test_only_maybe_seen_urls_are_looked_up(self):
+        testobj = BloomVisitedSet(100000)
+        try:
+            for url in TEST_URLS:
+                testobj.add(url)
+            self.assertLess(testobj.lookups, 10)
+            for url in TEST_URLS:
+                testobj.add(url)
+            self.assertGreaterEqual(testobj.lookups, len(TEST_URLS))
+        finally:
+            testobj.close()
+
+    def test_key_is_the_hash_in_the_database(self):
+        self.assertEqual(
+            url_hash(TEST_URLS[0], 128) >> 64,
+            self.testobj.key(TEST_URLS[0]))
+
+    def test_database_is_removed_on_close(self):
+        testobj = BloomVisitedSet(10)
+        testobj.close()
+        self.assertFalse(os.path.exists(testobj.path))
+
+
+if __name__ == '__main__':
+    unittest.main()